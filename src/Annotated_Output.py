@@ -0,0 +1,197 @@
+import os
+
+import cv2
+import numpy as np
+
+from Frame_Pipeline import BackgroundEncoder
+
+
+class AnnotatedVideoWriter(BackgroundEncoder):
+    """
+    Writes the annotated frames to a video file, or to a sequence of fixed-length segment files.
+
+    Segments are named after the path with a four-digit index before the
+    extension, e.g. lot_0000.mp4, lot_0001.mp4, so each one is playable as soon
+    as it is closed.
+
+    Attributes
+    ----------
+    path : str
+        The output file, or the name pattern of the segments.
+    fps : float or None
+        The frame rate of the output. None until set from the processed video.
+    segment_seconds : float or None
+        The length of each segment, or None for a single file.
+    segments : list
+        The paths of the files opened so far.
+    """
+
+    CODECS = {".mp4": "mp4v", ".avi": "MJPG", ".mkv": "XVID"}
+
+    def __init__(self, path, fps=None, segment_seconds=None, codec=None, queue_size=32):
+        """
+        Parameters
+        ----------
+        path : str
+            The output file, or the name pattern of the segments.
+        fps : float, optional
+            The frame rate of the output. By default, the frame rate of the processed video.
+        segment_seconds : float, optional
+            Start a new file every this many seconds of video. By default, write a single file.
+        codec : str, optional
+            The four character code of the encoder. By default, guessed from the extension.
+        queue_size : int, optional
+            The number of frames buffered before the oldest ones are dropped. The default is 32.
+        """
+        self.path = path
+        self.fps = fps
+        self.segment_seconds = segment_seconds
+        extension = os.path.splitext(path)[1].lower()
+        self.codec = codec or AnnotatedVideoWriter.CODECS.get(extension, "mp4v")
+        self.segments = []
+        self.__video = None
+        self.__segment_frames = 0
+        super().__init__(queue_size)
+
+    def write(self, frame):
+        """
+        Queues an annotated frame. The frame must not be modified afterwards.
+
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            The annotated BGR frame.
+
+        Returns
+        -------
+        bool
+            False if the encoder thread has stopped after an error, True otherwise.
+        """
+        return self.submit(frame)
+
+    def encode(self, frame):
+        fps = self.fps or 25.0
+        if self.__video is not None and self.segment_seconds is not None:
+            if self.__segment_frames >= max(1, round(self.segment_seconds * fps)):
+                self.__video.release()
+                self.__video = None
+        if self.__video is None:
+            self.__open(frame, fps)
+        self.__video.write(frame)
+        self.__segment_frames += 1
+
+    def __open(self, frame, fps):
+        path = self.path
+        if self.segment_seconds is not None:
+            root, extension = os.path.splitext(self.path)
+            path = f"{root}_{len(self.segments):04d}{extension}"
+        height, width = frame.shape[:2]
+        self.__video = cv2.VideoWriter(
+            path, cv2.VideoWriter_fourcc(*self.codec), fps, (width, height)
+        )
+        if not self.__video.isOpened():
+            raise IOError(f"Could not open {path} for writing with codec {self.codec}")
+        self.segments.append(path)
+        self.__segment_frames = 0
+
+    def finish(self):
+        if self.__video is not None:
+            self.__video.release()
+            self.__video = None
+
+
+class SpotSnapshotWriter(BackgroundEncoder):
+    """
+    Saves a JPEG crop of every parking spot whose occupancy changed.
+
+    Only the bounding box of each changed spot, plus a margin, is copied and
+    encoded, so a change costs a few small crops rather than a full frame. The
+    first frame only records the initial states. Files are named
+    <frame>_<spot id>_<occupied|free>.jpg, the frame being counted from the
+    first capture.
+
+    Attributes
+    ----------
+    directory : str
+        The directory receiving the snapshots.
+    frames : int
+        The number of frames captured so far.
+    """
+
+    def __init__(self, directory, margin=10, quality=90, queue_size=256):
+        """
+        Parameters
+        ----------
+        directory : str
+            The directory receiving the snapshots, created if needed.
+        margin : int, optional
+            The number of pixels kept around each spot. The default is 10.
+        quality : int, optional
+            The JPEG quality, from 0 to 100. The default is 90.
+        queue_size : int, optional
+            The number of snapshots buffered before the oldest ones are dropped. The default is 256.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.margin = margin
+        self.quality = quality
+        self.frames = 0
+        self.__previous = None
+        self.__boxes = None
+        super().__init__(queue_size)
+
+    def capture(self, frame, parking_coordinates):
+        """
+        Queues a crop of every parking spot whose occupancy changed since the last capture.
+
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            The frame the occupancy was computed on, before any drawing.
+        parking_coordinates : list
+            The list of parking spot dictionaries with their is_occupied flags.
+
+        Returns
+        -------
+        int
+            The number of snapshots queued.
+        """
+        current = np.fromiter(
+            (spot["is_occupied"] for spot in parking_coordinates),
+            dtype=bool,
+            count=len(parking_coordinates),
+        )
+        previous = self.__previous
+        self.__previous = current
+        frame_number = self.frames
+        self.frames += 1
+        if previous is None or len(previous) != len(current):
+            self.__boxes = self.__bounding_boxes(parking_coordinates, frame.shape)
+            return 0
+
+        changed = np.flatnonzero(current != previous)
+        for i in changed:
+            x_1, y_1, x_2, y_2 = self.__boxes[i]
+            if x_2 <= x_1 or y_2 <= y_1:
+                continue
+            state = "occupied" if current[i] else "free"
+            name = f"{frame_number:08d}_{parking_coordinates[i]['id']}_{state}.jpg"
+            self.submit((name, frame[y_1:y_2, x_1:x_2].copy()))
+        return len(changed)
+
+    def __bounding_boxes(self, parking_coordinates, shape):
+        height, width = shape[:2]
+        boxes = np.zeros((len(parking_coordinates), 4), dtype=np.int64)
+        for i, spot in enumerate(parking_coordinates):
+            points = np.asarray(spot["coordinates"]).reshape(-1, 2)
+            boxes[i, :2] = points.min(axis=0) - self.margin
+            boxes[i, 2:] = points.max(axis=0) + self.margin + 1
+        return np.clip(boxes, 0, [width, height, width, height])
+
+    def encode(self, item):
+        name, crop = item
+        ok, data = cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise IOError(f"Could not encode snapshot {name}")
+        with open(os.path.join(self.directory, name), "wb") as output:
+            output.write(data.tobytes())
@@ -1,16 +1,20 @@
 import cv2
-from ultralytics import YOLO
+from Detector_Backends import create_backend
 from util.colors import COLOR_WHITE
 
 
 class CarDetector:
     """
-    A class used to detect cars in an image using YOLOv8x object detection model.
+    A class used to detect cars in an image using a YOLOv8 object detection model.
 
     Attributes
     ----------
+    backend : DetectorBackend
+        The backend running the YOLOv8 model. The model is loaded on the first detection.
     model : YOLO
-        The YOLOv8x object detection model used for car detection.
+        The YOLOv8 object detection model used for car detection, loaded on first access.
+    device : str or int or None
+        The device used for inference, e.g. "cpu" or 0. None lets ultralytics pick one.
     draw_cars : bool
         A flag indicating whether to draw the detected cars on the input image.
     class_id : list
@@ -24,19 +28,54 @@ class CarDetector:
     -------
     detect(image)
         Detects cars in the input image and stores their coordinates in the cars_detected attribute.
+    detect_batch(frames)
+        Detects cars in several frames with one inference call and returns the cars of each frame.
+    low_center(box_coordinates)
+        Returns the point of a car box tested against the parking spots.
     get_Car_Coordinates()
         Returns the list of dictionaries containing the coordinates of the detected cars.
-    draw_car_detected(car)
+    draw_car_detected(car, image=None)
         Draws the detected car on the input image.
     """
 
-    def __init__(self, draw_cars=False):
-        self.model = YOLO("yolov8x.pt")
+    def __init__(
+        self,
+        draw_cars=False,
+        device=None,
+        model_size="x",
+        backend="torch",
+        inference_size=None,
+    ):
+        """
+        Parameters
+        ----------
+        draw_cars : bool, optional
+            A flag indicating whether to draw the detected cars on the input image. The default is False.
+        device : str or int, optional
+            The device used for inference, e.g. "cpu" or 0. None lets ultralytics pick one.
+        model_size : str, optional
+            The YOLOv8 model size, one of "n", "s", "m", "l" or "x". The default is "x".
+        backend : str, optional
+            "torch" for the PyTorch weights, or "onnx" / "openvino" for a CPU export. The default is "torch".
+        inference_size : int, optional
+            The side of the square model input frames are letterboxed to. None keeps the model default.
+        """
+        self.backend = create_backend(
+            backend,
+            model_size=model_size,
+            device=device,
+            inference_size=inference_size,
+        )
+        self.device = device
         self.draw_cars = draw_cars
         self.class_id = [2, 3, 5, 7]
         self.input_image = None
         self.cars_detected = []
 
+    @property
+    def model(self):
+        return self.backend.load()
+
     def detect(self, image):
         """
         Detects cars in the input image and stores their coordinates in the cars_detected attribute.
@@ -47,29 +86,69 @@ class CarDetector:
             The input image for car detection.
         """
         self.input_image = image
-        self.cars_detected = []
-        prediction = self.model.predict(
-            self.input_image, classes=self.class_id, device=0, verbose=False
-        )
-        for result in prediction:
-            boxes = result.boxes.cpu().numpy()
-            for box in boxes:
-                box_coordinates = box.xyxy[0].astype(int)
-                down_the_center = (box_coordinates[1] + 7 * box_coordinates[3]) / 8
-                low_center = (
-                    int((box_coordinates[0] + box_coordinates[2]) / 2),
-                    int(down_the_center),
-                )
+        self.cars_detected = self.detect_batch([image])[0]
+
+    def detect_batch(self, frames):
+        """
+        Detects cars in several frames with one inference call and returns the cars of each frame.
+
+        Frames may have any resolution; the cars are returned in the pixels of their frame.
+
+        Parameters
+        ----------
+        frames : list
+            The list of numpy.ndarray frames for car detection.
+
+        Returns
+        -------
+        list
+            One list of detected car dictionaries per frame, in the order of the frames.
+        """
+        frames = list(frames)
+        if not frames:
+            return []
+
+        boxes_per_frame = self.backend.predict(frames, self.class_id)
+        cars_per_frame = []
+        for frame, boxes in zip(frames, boxes_per_frame):
+            cars_detected = []
+            for box_coordinates in boxes:
                 card_detected = {
                     "x_1": box_coordinates[0],
                     "y_1": box_coordinates[1],
                     "x_2": box_coordinates[2],
                     "y_2": box_coordinates[3],
-                    "low_center": low_center,
+                    "low_center": CarDetector.low_center(box_coordinates),
                 }
-                self.cars_detected.append(card_detected)
+                cars_detected.append(card_detected)
                 if self.draw_cars:
-                    self.draw_car_detected(card_detected)
+                    self.draw_car_detected(card_detected, frame)
+            cars_per_frame.append(cars_detected)
+        return cars_per_frame
+
+    @staticmethod
+    def low_center(box_coordinates):
+        """
+        Returns the point of a car box tested against the parking spots.
+
+        The point lies on the vertical center line, seven eighths of the way down the
+        box, close to where the car touches the ground.
+
+        Parameters
+        ----------
+        box_coordinates : array_like
+            The x_1, y_1, x_2, y_2 bounds of the car box.
+
+        Returns
+        -------
+        tuple
+            The (x, y) integer point.
+        """
+        down_the_center = (box_coordinates[1] + 7 * box_coordinates[3]) / 8
+        return (
+            int((box_coordinates[0] + box_coordinates[2]) / 2),
+            int(down_the_center),
+        )
 
     def get_Car_Coordinates(self):
         """
@@ -82,7 +161,7 @@ class CarDetector:
         """
         return self.cars_detected
 
-    def draw_car_detected(self, car):
+    def draw_car_detected(self, car, image=None):
         """
         Draws the detected car on the input image.
 
@@ -90,12 +169,16 @@ class CarDetector:
         ----------
         car : dict
             A dictionary containing the coordinates of the detected car.
+        image : numpy.ndarray, optional
+            The image to draw on. The default is the input image of the last detect call.
         """
+        if image is None:
+            image = self.input_image
         cv2.rectangle(
-            self.input_image,
+            image,
             (car["x_1"], car["y_1"]),
             (car["x_2"], car["y_2"]),
             COLOR_WHITE,
             1,
         )
-        cv2.circle(self.input_image, car["low_center"], 1, COLOR_WHITE, 1)
+        cv2.circle(image, car["low_center"], 1, COLOR_WHITE, 1)
@@ -0,0 +1,265 @@
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from Car_Detector import CarDetector
+from Parking_Space_Detector import ParkingSpaceDetector
+
+# The car detector of a worker process, loaded once and shared by all its chunks.
+_car_detector = None
+
+
+def split_chunks(frame_count, num_chunks, step=1):
+    """
+    Splits a range of frames into contiguous chunks that start on the sampling grid.
+
+    Some containers and streams do not report their frame count. Without it the
+    video cannot be split, so it is read as a single chunk until the last frame.
+
+    Args:
+        frame_count (int): The number of frames in the video, or 0 if unknown.
+        num_chunks (int): The number of chunks wanted.
+        step (int, optional): The number of frames between two sampled frames. Defaults to 1.
+
+    Returns:
+        list: The (start, end) frame range of each chunk, in video order.
+    """
+    if frame_count <= 0:
+        return [(0, sys.maxsize)]
+    samples = -(-frame_count // step)
+    num_chunks = max(1, min(num_chunks, samples))
+    bounds = np.linspace(0, samples, num_chunks + 1).astype(int) * step
+    bounds[-1] = frame_count
+    return [
+        (int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if start < end
+    ]
+
+
+def _load_car_detector(options):
+    """
+    Loads the detection model of a worker process. Runs once, when the process starts.
+    """
+    global _car_detector
+    _car_detector = CarDetector(
+        device=options.get("device"),
+        model_size=options.get("model_size", "x"),
+        backend=options.get("backend", "torch"),
+        inference_size=options.get("inference_size"),
+    )
+
+
+def _process_chunk(video_path, path_to_coordinate_data, start, end, step, options):
+    """
+    Processes one chunk of a video in a worker process.
+
+    A new ParkingSpaceDetector is built for every chunk, so per-frame state starts
+    afresh, but it reuses the car detector loaded when the process started.
+
+    Returns:
+        tuple: The spot ids, then the frame index, timestamp and (frames, spots)
+        occupancy arrays of every processed frame.
+    """
+    detector = ParkingSpaceDetector(
+        video_path,
+        path_to_coordinate_data,
+        update_coordinate=False,
+        draw_cars=False,
+        car_detector=_car_detector,
+        **options,
+    )
+    video = cv2.VideoCapture(video_path)
+    fps = video.get(cv2.CAP_PROP_FPS) or 0
+    video.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    frame_indices, timestamps, occupancy = [], [], []
+    batch = []
+
+    def flush():
+        frames = [item[2] for item in batch]
+        for (frame_index, timestamp, _), (cars, spot_indices) in zip(
+            batch, detector.detect_frames(frames)
+        ):
+            detector.update_occupancy(cars, spot_indices, timestamp)
+            frame_indices.append(frame_index)
+            timestamps.append(timestamp)
+            occupancy.append(
+                [spot["is_occupied"] for spot in detector.parking_coordinates]
+            )
+        batch.clear()
+
+    frame_index = start
+    while frame_index < end:
+        frame = detector.read_frame(video)
+        if frame is None:
+            break
+        if fps > 0:
+            timestamp = frame_index / fps
+        else:
+            timestamp = video.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if not detector.is_generated:
+            detector.load_parking_coordinates(frame)
+
+        batch.append((frame_index, timestamp, frame))
+        if len(batch) == detector.batch_size:
+            flush()
+
+        # grab() skips frames without converting them to images.
+        for _ in range(min(step, end - frame_index) - 1):
+            if not video.grab():
+                break
+        frame_index += step
+
+    if batch:
+        flush()
+    video.release()
+
+    spot_ids = [spot["id"] for spot in detector.parking_coordinates or []]
+    return (
+        spot_ids,
+        np.array(frame_indices, dtype=np.int64),
+        np.array(timestamps, dtype=np.float64),
+        np.array(occupancy, dtype=bool).reshape(len(frame_indices), len(spot_ids)),
+    )
+
+
+class ChunkedVideoProcessor:
+    """
+    A class that processes a recorded video in parallel time ranges.
+
+    The video is split into contiguous chunks. Each worker process seeks to the
+    start of its chunk and runs its own ParkingSpaceDetector on it, so decoding
+    and inference use several cores. The per-chunk occupancy timelines are then
+    written in video order. With sample_every, only one frame every that many
+    seconds is decoded.
+
+    Each worker process loads its own detection model once and reuses it for all
+    its chunks, so the number of workers is bounded by memory as well as by
+    cores. Per-frame state such as smoothing or the inference scheduler restarts
+    at every chunk boundary.
+
+    Occupancy change events are published from the calling process, on the
+    merged timeline, so they are as continuous as in a sequential run. Like those
+    of a sequential run, they carry wall clock times counted from the start of
+    the run.
+
+    Attributes
+    ----------
+    video_path : str
+        The path to the video file.
+    path_to_data : str
+        The path to the coordinate data file, which must already exist.
+    workers : int
+        The number of worker processes.
+    frames_processed : int
+        The number of frames processed by the last run.
+
+    Methods
+    -------
+    run(writer, event_publisher=None)
+        Processes the whole video and writes the merged occupancy timeline in order.
+    """
+
+    def __init__(
+        self,
+        video_path,
+        path_to_coordinate_data,
+        workers=None,
+        sample_every=None,
+        chunks_per_worker=4,
+        **detector_options,
+    ):
+        """
+        Parameters
+        ----------
+        video_path : str
+            The path to the video file.
+        path_to_coordinate_data : str
+            The path to the coordinate data file, which must already exist.
+        workers : int, optional
+            The number of worker processes. The default is one per core.
+        sample_every : float, optional
+            Process only one frame every this many seconds. The default processes every frame.
+        chunks_per_worker : int, optional
+            The number of chunks per worker. More chunks let ordered output start
+            sooner and balance the load better. The default is 4.
+        **detector_options
+            Extra keyword arguments passed to each worker's ParkingSpaceDetector.
+        """
+        self.video_path = video_path
+        self.path_to_data = path_to_coordinate_data
+        self.workers = workers or os.cpu_count() or 1
+        self.sample_every = sample_every
+        self.chunks_per_worker = chunks_per_worker
+        self.detector_options = detector_options
+        self.frames_processed = 0
+
+    def run(self, writer, event_publisher=None):
+        """
+        Processes the whole video and writes the merged occupancy timeline in order.
+
+        Parameters
+        ----------
+        writer : OccupancyWriter
+            The writer receiving the per-frame occupancy records.
+        event_publisher : OccupancyEventPublisher, optional
+            Publishes the occupancy changes of the merged timeline.
+
+        Returns
+        -------
+        int
+            The number of processed frames.
+        """
+        video = cv2.VideoCapture(self.video_path)
+        frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = video.get(cv2.CAP_PROP_FPS) or 0
+        video.release()
+
+        step = 1
+        if self.sample_every and fps > 0:
+            step = max(1, round(self.sample_every * fps))
+        chunks = split_chunks(frame_count, self.workers * self.chunks_per_worker, step)
+
+        self.frames_processed = 0
+        clock_offset = time.time()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            self.workers,
+            mp_context=context,
+            initializer=_load_car_detector,
+            initargs=(self.detector_options,),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _process_chunk,
+                    self.video_path,
+                    self.path_to_data,
+                    start,
+                    end,
+                    step,
+                    self.detector_options,
+                )
+                for start, end in chunks
+            ]
+            # Results are consumed in chunk order, so the output stays ordered
+            # while later chunks are still running.
+            for future in futures:
+                spot_ids, frame_indices, timestamps, occupancy = future.result()
+                for frame_index, timestamp, occupied in zip(
+                    frame_indices, timestamps, occupancy
+                ):
+                    spots = [
+                        {"id": spot_id, "is_occupied": bool(is_occupied)}
+                        for spot_id, is_occupied in zip(spot_ids, occupied)
+                    ]
+                    writer.write_frame(
+                        int(frame_index), float(timestamp), spots, int(occupied.sum())
+                    )
+                    if event_publisher is not None:
+                        event_publisher.publish(spots, clock_offset + float(timestamp))
+                self.frames_processed += len(frame_indices)
+        return self.frames_processed
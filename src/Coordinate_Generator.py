@@ -1,10 +1,49 @@
+import time
+
 import cv2
-import yaml
+import numpy as np
 
+from Spot_Layout import SpotLayout
 from util.colors import COLOR_GREEN, COLOR_BLUE
 from util.utils import draw_rectangles
 
 
+def subdivide_row(points, count):
+    """
+    Splits a quadrilateral into a row of count parking spots of equal width.
+
+    The points are clicked like a single spot: the first and fourth points bound
+    one long side of the row and the second and third points the other. Both
+    sides are divided evenly in the plane of the ground, through the perspective
+    transform of the quadrilateral, so spots further from the camera come out
+    narrower, as they should.
+
+    Parameters
+    ----------
+    points : list
+        The four (x, y) corners of the whole row, in click order.
+    count : int
+        The number of spots in the row.
+
+    Returns
+    -------
+    list
+        count lists of four (x, y) corners, in the same order as points.
+    """
+    square = np.float32([[0, 0], [0, 1], [1, 1], [1, 0]])
+    transform = cv2.getPerspectiveTransform(square, np.float32(points).reshape(4, 2))
+    fractions = np.linspace(0, 1, count + 1)
+    grid = np.float32(
+        [[(f, 0) for f in fractions], [(f, 1) for f in fractions]]
+    ).reshape(-1, 1, 2)
+    corners = np.rint(cv2.perspectiveTransform(grid, transform)).astype(int)
+    near, far = corners.reshape(2, count + 1, 2).tolist()
+    return [
+        [tuple(near[i]), tuple(far[i]), tuple(far[i + 1]), tuple(near[i + 1])]
+        for i in range(count)
+    ]
+
+
 class CoordinateGenerator:
     """
     A class to generate coordinates for parking spaces in an image.
@@ -18,11 +57,16 @@ class CoordinateGenerator:
     original_image : numpy.ndarray
         A copy of the input image.
     path_to_data : str
-        The path to the file where the generated coordinates will be saved.
+        The path to the file where the generated coordinates will be saved. The
+        format (.yml, .yaml, .json or .npz) follows its extension.
     is_update : bool
         A flag to indicate whether the generator is updating existing coordinates.
     preview_image : numpy.ndarray
-        An image to preview the generated coordinates.
+        The image shown in the window: the original image plus the line being drawn.
+        Only the regions that change are copied into it.
+    row_size : int
+        The number of parking spots made from each clicked quadrilateral. Above 1,
+        the quadrilateral is a whole row, split into row_size spots.
     current_point : tuple
         The current point being selected by the user.
     first_point : tuple
@@ -42,24 +86,40 @@ class CoordinateGenerator:
     -------
     generate(is_update=False):
         Generates coordinates for parking spaces in the input image.
+    load():
+        Loads previously generated coordinates without opening the generator window.
     __mouse_callback(event, x, y, flags, param):
         A callback function to handle mouse events.
     __handle_left_click(x, y):
         Handles left mouse button clicks.
     __handle_mouse_move(x, y):
         Handles mouse movement.
+    __handle_key(k):
+        Handles the keys changing the number of spots per quadrilateral.
+    __refresh(region):
+        Copies a region of the original image into the preview image.
     __save_coordinates():
-        Saves the generated coordinates to a file.
+        Saves the generated coordinates to a file in one write.
     __load_coordinates():
         Loads previously generated coordinates from a file.
     __erase_coordinates_in_file():
         Erases all the coordinates in the saved coordinates file.
     get_Coordinates():
         Returns a list of all the generated coordinates with their occupied status.
+    get_Layout():
+        Returns the generated coordinates as a SpotLayout.
     """
 
     KEY_RESET = ord("r")
     KEY_QUIT = ord("q")
+    KEY_MORE = (ord("+"), ord("="))
+    KEY_FEWER = ord("-")
+    WINDOW = "Coordinates Generator"
+    LINE_THICKNESS = 2
+    # The window only needs to follow the mouse, not to spin on the CPU.
+    WAIT_MS = 20
+    # Digits typed within this many seconds form a single row size, e.g. 1 then 2.
+    TYPING_SECONDS = 1.0
 
     def __init__(self, image, path_to_saved_coordinates):
         """
@@ -75,7 +135,8 @@ class CoordinateGenerator:
         self.path_to_data = path_to_saved_coordinates
 
         self.is_update = False
-        self.preview_image = None
+        self.preview_image = image.copy()
+        self.row_size = 1
         self.current_point = (-1, -1)
         self.first_point = (-1, -1)
         self.num_points = 0
@@ -83,6 +144,11 @@ class CoordinateGenerator:
         self.current_coordinates = []
         self.all_coordinates = {}
         self.loaded_id = None
+        self.__is_modified = False
+        self.__band = None
+        self.__needs_redraw = True
+        self.__typed = ""
+        self.__typed_at = 0.0
 
     def generate(self, is_update=False):
         """
@@ -95,34 +161,47 @@ class CoordinateGenerator:
             The default is False.
         """
         self.is_update = is_update
-        cv2.namedWindow("Coordinates Generator")
-        cv2.setMouseCallback("Coordinates Generator", self.__mouse_callback)
+        cv2.namedWindow(CoordinateGenerator.WINDOW)
+        cv2.setMouseCallback(CoordinateGenerator.WINDOW, self.__mouse_callback)
         if self.is_update:
             self.__load_coordinates()
+        self.__set_title()
 
         while True:
-            if self.preview_image is None:
-                cv2.imshow("Coordinates Generator", self.original_image)
-            else:
-                cv2.imshow("Coordinates Generator", self.preview_image)
+            # The image is only sent to the window when something was drawn.
+            if self.__needs_redraw:
+                cv2.imshow(CoordinateGenerator.WINDOW, self.preview_image)
+                self.__needs_redraw = False
 
-            k = cv2.waitKey(1) & 0xFF
+            k = cv2.waitKey(CoordinateGenerator.WAIT_MS) & 0xFF
 
             if k == CoordinateGenerator.KEY_RESET:
                 self.id = 0
                 self.current_coordinates = []
                 self.all_coordinates = {}
-                self.preview_image = None
                 self.num_points = 0
                 self.is_update = False
+                self.__is_modified = False
                 self.__erase_coordinates_in_file()
                 self.original_image = self.input_image.copy()
+                self.preview_image = self.original_image.copy()
+                self.__band = None
+                self.__needs_redraw = True
             elif k == CoordinateGenerator.KEY_QUIT and self.num_points == 0:
-                if self.id != 0:
+                # An untouched file is left as it is, in whatever format it has.
+                if self.__is_modified:
                     self.__save_coordinates()
                 break
+            elif k != 0xFF:
+                self.__handle_key(k)
 
-        cv2.destroyWindow("Coordinates Generator")
+        cv2.destroyWindow(CoordinateGenerator.WINDOW)
+
+    def load(self):
+        """
+        Loads previously generated coordinates without opening the generator window.
+        """
+        self.__load_coordinates()
 
     def __mouse_callback(self, event, x, y, flags, param):
         """
@@ -158,24 +237,41 @@ class CoordinateGenerator:
         y : int
             The y-coordinate of the mouse click.
         """
+        thickness = CoordinateGenerator.LINE_THICKNESS
+        self.__erase_band()
         if self.num_points == 0:
             self.first_point = (x, y)
 
         if self.num_points != 0:
-            cv2.line(self.original_image, self.current_point, (x, y), COLOR_BLUE, 2)
+            cv2.line(
+                self.original_image, self.current_point, (x, y), COLOR_BLUE, thickness
+            )
+            self.__refresh(self.__region(self.current_point, (x, y)))
 
         self.current_point = (x, y)
         self.current_coordinates.append(self.current_point)
         self.num_points += 1
 
         if self.num_points == 4:
-            self.all_coordinates[self.id] = self.current_coordinates
-            self.id += 1
+            if self.row_size > 1:
+                spots = subdivide_row(self.current_coordinates, self.row_size)
+            else:
+                spots = [self.current_coordinates]
+            for points in spots:
+                self.all_coordinates[self.id] = points
+                self.id += 1
+                draw_rectangles(points, self.original_image)
+            self.__is_modified = True
             self.num_points = 0
             self.current_coordinates = []
             cv2.line(
-                self.original_image, self.current_point, self.first_point, COLOR_BLUE, 2
+                self.original_image,
+                self.current_point,
+                self.first_point,
+                COLOR_BLUE,
+                thickness,
             )
+            self.__refresh(self.__region(*spots[0], *spots[-1]))
 
     def __handle_mouse_move(self, x, y):
         """
@@ -188,73 +284,132 @@ class CoordinateGenerator:
         y : int
             The y-coordinate of the mouse.
         """
+        self.__erase_band()
         if self.num_points > 0:
-            self.preview_image = self.original_image.copy()
-            cv2.line(self.preview_image, self.current_point, (x, y), COLOR_GREEN, 2)
+            cv2.line(
+                self.preview_image,
+                self.current_point,
+                (x, y),
+                COLOR_GREEN,
+                CoordinateGenerator.LINE_THICKNESS,
+            )
+            self.__band = self.__region(self.current_point, (x, y))
+            self.__needs_redraw = True
+
+    def __handle_key(self, k):
+        """
+        Handles the keys changing the number of spots per quadrilateral.
+
+        + and - add or remove one spot, and digits type the number directly. The
+        number can only change between two quadrilaterals.
+
+        Parameters
+        ----------
+        k : int
+            The code of the pressed key.
+        """
+        if self.num_points != 0:
+            return
+        if k in CoordinateGenerator.KEY_MORE:
+            row_size = self.row_size + 1
+        elif k == CoordinateGenerator.KEY_FEWER:
+            row_size = self.row_size - 1
+        elif ord("0") <= k <= ord("9"):
+            now = time.monotonic()
+            if now - self.__typed_at > CoordinateGenerator.TYPING_SECONDS:
+                self.__typed = ""
+            self.__typed = (self.__typed + chr(k))[-3:]
+            self.__typed_at = now
+            row_size = int(self.__typed)
         else:
-            self.preview_image = None
+            return
+        self.row_size = max(1, row_size)
+        self.__set_title()
+
+    def __set_title(self):
+        spots = "1 spot" if self.row_size == 1 else f"a row of {self.row_size} spots"
+        cv2.setWindowTitle(
+            CoordinateGenerator.WINDOW,
+            f"{CoordinateGenerator.WINDOW} - {spots} per quadrilateral",
+        )
+
+    def __region(self, *points):
+        """
+        Returns the bounding box (x_1, y_1, x_2, y_2) of lines joining the points,
+        clipped to the image.
+        """
+        height, width = self.original_image.shape[:2]
+        margin = CoordinateGenerator.LINE_THICKNESS + 1
+        xs = [point[0] for point in points]
+        ys = [point[1] for point in points]
+        return (
+            min(max(min(xs) - margin, 0), width),
+            min(max(min(ys) - margin, 0), height),
+            min(max(max(xs) + margin + 1, 0), width),
+            min(max(max(ys) + margin + 1, 0), height),
+        )
+
+    def __refresh(self, region):
+        """
+        Copies a region of the original image into the preview image.
+
+        Parameters
+        ----------
+        region : tuple
+            The bounding box (x_1, y_1, x_2, y_2) to copy.
+        """
+        x_1, y_1, x_2, y_2 = region
+        self.preview_image[y_1:y_2, x_1:x_2] = self.original_image[y_1:y_2, x_1:x_2]
+        self.__needs_redraw = True
+
+    def __erase_band(self):
+        # Removes the line following the mouse by restoring what was under it.
+        if self.__band is not None:
+            self.__refresh(self.__band)
+            self.__band = None
 
     def __save_coordinates(self):
         """
         Saves the generated coordinates to a file.
         """
-        mode = "a" if self.is_update else "w"
-
-        with open(self.path_to_data, mode) as output:
-            for i in self.all_coordinates:
-                if mode == "a" and self.loaded_id != None and i <= self.loaded_id:
-                    continue
-                output.write(
-                    "-\n          id: "
-                    + str(i)
-                    + "\n          coordinates: ["
-                    + "["
-                    + str(self.all_coordinates[i][0][0])
-                    + ","
-                    + str(self.all_coordinates[i][0][1])
-                    + "],"
-                    + "["
-                    + str(self.all_coordinates[i][1][0])
-                    + ","
-                    + str(self.all_coordinates[i][1][1])
-                    + "],"
-                    + "["
-                    + str(self.all_coordinates[i][2][0])
-                    + ","
-                    + str(self.all_coordinates[i][2][1])
-                    + "],"
-                    + "["
-                    + str(self.all_coordinates[i][3][0])
-                    + ","
-                    + str(self.all_coordinates[i][3][1])
-                    + "]]\n"
-                )
+        self.get_Layout().save(self.path_to_data)
 
     def __load_coordinates(self):
         """
-        Loads previously generated coordinates from a file.
+        Loads previously generated coordinates from a file, scaled to the size of the input image.
         """
-        with open(self.path_to_data, "r") as data:
-            squares = yaml.load(data, Loader=yaml.Loader)
-
-        if squares is None:
+        layout = SpotLayout.load(self.path_to_data).scaled(self.__frame_size())
+        if len(layout) == 0:
             return
 
-        big_Id = 0
-        for square in squares:
-            points = [tuple(i) for i in square["coordinates"]]
-            self.all_coordinates[square["id"]] = points
+        self.all_coordinates = layout.to_coordinates()
+        for points in self.all_coordinates.values():
             draw_rectangles(points, self.original_image)
-            if big_Id < square["id"]:
-                big_Id = square["id"]
-        self.loaded_id = big_Id
-        self.id = big_Id + 1
+        self.preview_image = self.original_image.copy()
+        self.__needs_redraw = True
+        self.loaded_id = max(self.all_coordinates)
+        self.id = self.loaded_id + 1
 
     def __erase_coordinates_in_file(self):
         """
         Erases all the coordinates in the saved coordinates file.
         """
-        open(self.path_to_data, "w").close()
+        SpotLayout.from_coordinates({}, self.__frame_size()).save(self.path_to_data)
+
+    def __frame_size(self):
+        height, width = self.input_image.shape[:2]
+        return (width, height)
+
+    def get_Layout(self):
+        """
+        Returns the generated coordinates as a SpotLayout.
+
+        Returns
+        -------
+        SpotLayout
+            The layout of every generated rectangle, with the size of the input image.
+        """
+        return SpotLayout.from_coordinates(self.all_coordinates, self.__frame_size())
 
     def get_Coordinates(self):
         """
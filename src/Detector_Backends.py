@@ -0,0 +1,200 @@
+import os
+
+MODEL_SIZES = ("n", "s", "m", "l", "x")
+
+
+class DetectorBackend:
+    """
+    A base class for the object detection backends used by CarDetector.
+
+    The model is loaded lazily on the first prediction, so creating a backend is
+    cheap for runs that never detect anything.
+
+    Attributes
+    ----------
+    model_size : str
+        The YOLOv8 model size, one of "n", "s", "m", "l" or "x".
+    device : str or int or None
+        The device used for inference. None lets the backend pick one.
+    inference_size : int or None
+        The side of the square model input frames are letterboxed to. None keeps the model default.
+
+    Methods
+    -------
+    load()
+        Loads the model if it is not loaded yet and returns it.
+    predict(frames, classes)
+        Returns the xyxy bounding boxes detected in each frame.
+    """
+
+    def __init__(self, model_size="x", device=None, inference_size=None):
+        """
+        Parameters
+        ----------
+        model_size : str, optional
+            The YOLOv8 model size, one of "n", "s", "m", "l" or "x". The default is "x".
+        device : str or int, optional
+            The device used for inference. None lets the backend pick one.
+        inference_size : int, optional
+            The side of the square model input frames are letterboxed to, e.g. 320
+            for fast inference on high resolution cameras. None keeps the model default.
+        """
+        if model_size not in MODEL_SIZES:
+            raise ValueError(f"Unknown model size: {model_size}")
+        self.model_size = model_size
+        self.device = device
+        self.inference_size = inference_size
+        self.__model = None
+
+    @property
+    def weights(self):
+        """
+        The path to the PyTorch weights of the selected model size.
+        """
+        return f"yolov8{self.model_size}.pt"
+
+    def load(self):
+        """
+        Loads the model if it is not loaded yet and returns it.
+        """
+        if self.__model is None:
+            self.__model = self._load_model()
+        return self.__model
+
+    def _load_model(self):
+        raise NotImplementedError
+
+    def predict(self, frames, classes):
+        """
+        Returns the xyxy bounding boxes detected in each frame.
+
+        Parameters
+        ----------
+        frames : list
+            The list of numpy.ndarray frames.
+        classes : list
+            The class IDs to keep.
+
+        Returns
+        -------
+        list
+            One integer array of shape (boxes, 4) per frame.
+        """
+        raise NotImplementedError
+
+    def _predict_options(self, classes, device):
+        options = {"classes": classes, "device": device, "verbose": False}
+        if self.inference_size is not None:
+            options["imgsz"] = self.inference_size
+        return options
+
+
+class UltralyticsBackend(DetectorBackend):
+    """
+    Runs the PyTorch YOLOv8 weights through ultralytics.
+    """
+
+    def _load_model(self):
+        from ultralytics import YOLO
+
+        return YOLO(self._model_path(), task="detect")
+
+    def _model_path(self):
+        return self.weights
+
+    def predict(self, frames, classes):
+        # Frames are passed at their source resolution: ultralytics resizes them
+        # once to the inference size and maps the boxes back to the frame.
+        prediction = self.load().predict(
+            frames, **self._predict_options(classes, self.device)
+        )
+        return [
+            result.boxes.cpu().numpy().xyxy.astype(int).reshape(-1, 4)
+            for result in prediction
+        ]
+
+
+class OnnxRuntimeBackend(UltralyticsBackend):
+    """
+    Runs the YOLOv8 model exported to ONNX, which ultralytics executes with ONNX Runtime.
+
+    The model is exported from the PyTorch weights the first time it is needed.
+    Exported models have a fixed input size, so each inference size gets its own export.
+    """
+
+    EXPORT_FORMAT = "onnx"
+
+    def _model_path(self):
+        path = self._exported_path()
+        if not os.path.exists(path):
+            from ultralytics import YOLO
+
+            options = {"format": self.EXPORT_FORMAT}
+            if self.inference_size is not None:
+                options["imgsz"] = self.inference_size
+            exported = YOLO(self.weights).export(**options)
+            if os.path.abspath(exported) != os.path.abspath(path):
+                os.replace(exported, path)
+        return path
+
+    def _export_name(self):
+        name = os.path.splitext(self.weights)[0]
+        if self.inference_size is not None:
+            name = f"{name}-{self.inference_size}"
+        return name
+
+    def _exported_path(self):
+        return self._export_name() + ".onnx"
+
+    def predict(self, frames, classes):
+        # Exported models have a fixed batch size of one.
+        model = self.load()
+        options = self._predict_options(
+            classes, "cpu" if self.device is None else self.device
+        )
+        boxes_per_frame = []
+        for frame in frames:
+            for result in model.predict(frame, **options):
+                boxes_per_frame.append(
+                    result.boxes.cpu().numpy().xyxy.astype(int).reshape(-1, 4)
+                )
+        return boxes_per_frame
+
+
+class OpenVINOBackend(OnnxRuntimeBackend):
+    """
+    Runs the YOLOv8 model exported to OpenVINO, the fastest option on Intel CPUs.
+    """
+
+    EXPORT_FORMAT = "openvino"
+
+    def _exported_path(self):
+        return self._export_name() + "_openvino_model"
+
+
+BACKENDS = {
+    "torch": UltralyticsBackend,
+    "onnx": OnnxRuntimeBackend,
+    "openvino": OpenVINOBackend,
+}
+
+
+def create_backend(name="torch", model_size="x", device=None, inference_size=None):
+    """
+    Creates a detector backend by name.
+
+    Args:
+        name (str, optional): One of "torch", "onnx" or "openvino". Defaults to "torch".
+        model_size (str, optional): The YOLOv8 model size, one of "n", "s", "m", "l" or "x". Defaults to "x".
+        device (str | int, optional): The inference device. None lets the backend pick one.
+        inference_size (int, optional): The side of the square model input. None keeps the model default.
+
+    Returns:
+        DetectorBackend: The requested backend, with its model not loaded yet.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown detector backend: {name}")
+    return BACKENDS[name](
+        model_size=model_size, device=device, inference_size=inference_size
+    )
+
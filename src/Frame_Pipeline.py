@@ -0,0 +1,455 @@
+import threading
+import time
+from collections import deque
+
+
+class BoundedFrameQueue:
+    """
+    A thread-safe FIFO queue with a fixed capacity, used between pipeline stages.
+
+    When the queue is full, put either blocks until a consumer makes room
+    (backpressure) or, with drop_oldest, discards the oldest queued item so a live
+    source never falls behind.
+
+    Attributes
+    ----------
+    maxsize : int
+        The maximum number of queued items.
+    drop_oldest : bool
+        A flag indicating whether a full queue drops its oldest item instead of blocking.
+    dropped : int
+        The number of items discarded because the queue was full.
+    max_depth : int
+        The highest number of items queued at once.
+
+    Methods
+    -------
+    put(item, stop_event=None)
+        Adds an item, blocking or dropping the oldest item when the queue is full.
+    get(timeout=None)
+        Removes and returns the oldest item, or raises TimeoutError.
+    get_nowait()
+        Removes and returns the oldest item, or returns None if the queue is empty.
+    """
+
+    def __init__(self, maxsize, drop_oldest=False):
+        """
+        Parameters
+        ----------
+        maxsize : int
+            The maximum number of queued items.
+        drop_oldest : bool, optional
+            Drop the oldest item instead of blocking when full. The default is False.
+        """
+        if maxsize < 1:
+            raise ValueError(f"Queue size must be at least 1, got {maxsize}")
+        self.maxsize = maxsize
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+        self.max_depth = 0
+        self.__items = deque()
+        self.__condition = threading.Condition()
+
+    def __len__(self):
+        with self.__condition:
+            return len(self.__items)
+
+    def put(self, item, stop_event=None, force=False):
+        """
+        Adds an item, blocking or dropping the oldest item when the queue is full.
+
+        Parameters
+        ----------
+        item : object
+            The item to queue.
+        stop_event : threading.Event, optional
+            An event that aborts a blocking put when set.
+        force : bool, optional
+            Queue the item even if the queue is full, e.g. for end-of-stream markers.
+
+        Returns
+        -------
+        bool
+            False if the put was aborted by the stop event, True otherwise.
+        """
+        with self.__condition:
+            while len(self.__items) >= self.maxsize and not force:
+                if self.drop_oldest:
+                    self.__items.popleft()
+                    self.dropped += 1
+                    break
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                self.__condition.wait(0.1)
+            self.__items.append(item)
+            self.max_depth = max(self.max_depth, len(self.__items))
+            self.__condition.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """
+        Removes and returns the oldest item.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The number of seconds to wait for an item. Waits forever if None.
+
+        Returns
+        -------
+        object
+            The oldest queued item.
+
+        Raises
+        ------
+        TimeoutError
+            If no item arrived within the timeout.
+        """
+        with self.__condition:
+            if not self.__condition.wait_for(lambda: self.__items, timeout):
+                raise TimeoutError
+            item = self.__items.popleft()
+            self.__condition.notify_all()
+            return item
+
+    def get_nowait(self):
+        """
+        Removes and returns the oldest item, or returns None if the queue is empty.
+        """
+        with self.__condition:
+            if not self.__items:
+                return None
+            item = self.__items.popleft()
+            self.__condition.notify_all()
+            return item
+
+
+class BackgroundEncoder:
+    """
+    A base class for outputs that encode and write their items on a background thread.
+
+    Items are handed over through a bounded queue that drops its oldest item when
+    full, so submitting never waits for the encoder and the detection loop keeps
+    its pace. Outputs that must not lose items can block instead. Subclasses
+    implement encode(), called on the encoder thread.
+
+    Attributes
+    ----------
+    queue : BoundedFrameQueue
+        The queue between the submitting thread and the encoder thread.
+    written : int
+        The number of items encoded so far.
+
+    Methods
+    -------
+    submit(item)
+        Queues an item for encoding, without blocking unless drop_oldest is off.
+    encode(item)
+        Encodes and writes one item, on the encoder thread.
+    finish()
+        Releases the resources of the encoder, on the encoder thread.
+    close()
+        Encodes the queued items, stops the encoder thread and raises its error, if any.
+    """
+
+    _END = object()
+
+    def __init__(self, queue_size, drop_oldest=True):
+        """
+        Parameters
+        ----------
+        queue_size : int
+            The number of items buffered before the oldest ones are dropped.
+        drop_oldest : bool, optional
+            Drop the oldest item when the queue is full, instead of blocking submit()
+            until the encoder catches up. The default is True.
+        """
+        self.queue = BoundedFrameQueue(queue_size, drop_oldest=drop_oldest)
+        self.written = 0
+        self.__error = None
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def dropped(self):
+        """
+        The number of items dropped because the encoder fell behind.
+        """
+        return self.queue.dropped
+
+    def submit(self, item):
+        """
+        Queues an item for encoding, without blocking unless drop_oldest is off.
+
+        Parameters
+        ----------
+        item : object
+            The item passed to encode().
+
+        Returns
+        -------
+        bool
+            False if the encoder thread has stopped after an error, True otherwise.
+        """
+        if self.__error is not None:
+            return False
+        self.queue.put(item)
+        return True
+
+    def encode(self, item):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    def close(self):
+        """
+        Encodes the queued items, stops the encoder thread and raises its error, if any.
+        """
+        if self.__thread.is_alive():
+            self.queue.put(BackgroundEncoder._END, force=True)
+            self.__thread.join()
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            raise error
+
+    def __run(self):
+        try:
+            while True:
+                item = self.queue.get()
+                if item is BackgroundEncoder._END:
+                    break
+                self.encode(item)
+                self.written += 1
+        except Exception as error:
+            self.__error = error
+        finally:
+            self.finish()
+
+
+class StageStats:
+    """
+    A class used to accumulate the latency of one pipeline stage.
+
+    Attributes
+    ----------
+    name : str
+        The name of the stage.
+    count : int
+        The number of items processed by the stage.
+    total_time : float
+        The total processing time in seconds.
+    last_latency : float
+        The processing time of the last item in seconds.
+    max_latency : float
+        The longest processing time of a single item in seconds.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total_time = 0.0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.__lock = threading.Lock()
+
+    def record(self, seconds, count=1):
+        """
+        Records the processing time of one call covering count items.
+        """
+        with self.__lock:
+            self.count += count
+            self.total_time += seconds
+            self.last_latency = seconds / count
+            self.max_latency = max(self.max_latency, self.last_latency)
+
+    def as_dict(self):
+        """
+        Returns the statistics of the stage as a dictionary of latencies in milliseconds.
+        """
+        with self.__lock:
+            mean = self.total_time / self.count if self.count else 0.0
+            return {
+                "count": self.count,
+                "mean_ms": mean * 1000,
+                "last_ms": self.last_latency * 1000,
+                "max_ms": self.max_latency * 1000,
+            }
+
+
+class FramePipeline:
+    """
+    A class that runs decode, inference and render as separate stages connected by bounded queues.
+
+    Decoding and inference run on worker threads, so reading the next frames
+    overlaps with model compute. Rendering runs on the calling thread, because
+    OpenCV windows must be driven from the main thread.
+
+    Attributes
+    ----------
+    decode_queue : BoundedFrameQueue
+        The queue between the decode and inference stages.
+    render_queue : BoundedFrameQueue
+        The queue between the inference and render stages.
+    stage_stats : dict
+        The StageStats of the decode, inference and render stages.
+
+    Methods
+    -------
+    run()
+        Runs the pipeline until the source is exhausted or the render stage stops it.
+    stop()
+        Asks every stage to stop.
+    stats()
+        Returns the per-stage latency and queue depth statistics.
+    """
+
+    _END = object()
+
+    def __init__(
+        self, read_frame, infer, render, queue_size=4, batch_size=1, drop_oldest=False
+    ):
+        """
+        Parameters
+        ----------
+        read_frame : callable
+            Returns the next frame, or None at the end of the source.
+        infer : callable
+            Takes a list of frames and returns one result per frame, in order.
+        render : callable
+            Takes a (frame, result) pair and returns False to stop the pipeline.
+        queue_size : int, optional
+            The capacity of each queue. The default is 4.
+        batch_size : int, optional
+            The largest number of queued frames passed to infer at once. The default is 1.
+        drop_oldest : bool, optional
+            Drop the oldest decoded frame instead of blocking the decoder when the
+            inference stage falls behind. Meant for live sources. The default is False.
+        """
+        self.read_frame = read_frame
+        self.infer = infer
+        self.render = render
+        self.batch_size = batch_size
+        self.decode_queue = BoundedFrameQueue(queue_size, drop_oldest=drop_oldest)
+        self.render_queue = BoundedFrameQueue(queue_size)
+        self.stage_stats = {
+            name: StageStats(name) for name in ("decode", "inference", "render")
+        }
+        self.__stop_event = threading.Event()
+        self.__errors = []
+
+    def run(self):
+        """
+        Runs the pipeline until the source is exhausted or the render stage stops it.
+        """
+        workers = [
+            threading.Thread(target=self.__guard, args=(self.__decode,), daemon=True),
+            threading.Thread(target=self.__guard, args=(self.__inference,), daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            self.__render()
+        finally:
+            self.stop()
+            for worker in workers:
+                worker.join()
+
+        if self.__errors:
+            raise self.__errors[0]
+
+    def stop(self):
+        """
+        Asks every stage to stop.
+        """
+        self.__stop_event.set()
+
+    def stats(self):
+        """
+        Returns the per-stage latency and queue depth statistics.
+
+        Returns
+        -------
+        dict
+            The latencies of each stage and the depth of each queue.
+        """
+        stats = {name: stage.as_dict() for name, stage in self.stage_stats.items()}
+        for name, queue in (
+            ("decode_queue", self.decode_queue),
+            ("render_queue", self.render_queue),
+        ):
+            stats[name] = {
+                "depth": len(queue),
+                "max_depth": queue.max_depth,
+                "dropped": queue.dropped,
+            }
+        return stats
+
+    def __guard(self, stage):
+        try:
+            stage()
+        except Exception as error:
+            self.__errors.append(error)
+            self.stop()
+            self.render_queue.put(FramePipeline._END, force=True)
+
+    def __decode(self):
+        stats = self.stage_stats["decode"]
+        while not self.__stop_event.is_set():
+            start = time.perf_counter()
+            frame = self.read_frame()
+            if frame is None:
+                break
+            stats.record(time.perf_counter() - start)
+            if not self.decode_queue.put(frame, self.__stop_event):
+                return
+        self.decode_queue.put(FramePipeline._END, force=True)
+
+    def __inference(self):
+        stats = self.stage_stats["inference"]
+        while not self.__stop_event.is_set():
+            try:
+                frame = self.decode_queue.get(timeout=0.1)
+            except TimeoutError:
+                continue
+
+            batch = []
+            while frame is not None and frame is not FramePipeline._END:
+                batch.append(frame)
+                if len(batch) == self.batch_size:
+                    break
+                frame = self.decode_queue.get_nowait()
+
+            if batch:
+                start = time.perf_counter()
+                results = self.infer(batch)
+                stats.record(time.perf_counter() - start, len(batch))
+                for item in zip(batch, results):
+                    if not self.render_queue.put(item, self.__stop_event):
+                        return
+
+            if frame is FramePipeline._END:
+                break
+        self.render_queue.put(FramePipeline._END, force=True)
+
+    def __render(self):
+        stats = self.stage_stats["render"]
+        while not self.__stop_event.is_set():
+            try:
+                item = self.render_queue.get(timeout=0.1)
+            except TimeoutError:
+                continue
+            if item is FramePipeline._END:
+                break
+            start = time.perf_counter()
+            keep_going = self.render(*item)
+            stats.record(time.perf_counter() - start)
+            if keep_going is False:
+                break
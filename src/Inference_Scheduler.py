@@ -0,0 +1,159 @@
+import cv2
+import numpy as np
+
+
+class InferenceScheduler:
+    """
+    A class that decides on which frames the car detector has to run.
+
+    Full detection runs on the first frame. When a motion threshold is set, it
+    runs again as soon as the share of changed pixels inside the parking spots,
+    compared with the last inferred frame, exceeds that threshold. When
+    every_n_frames is set, it also runs at least every every_n_frames frames,
+    motion or not. On every other frame the previous occupancy is carried forward.
+
+    Attributes
+    ----------
+    every_n_frames : int or None
+        The largest number of frames between two inferences, or None to rely on motion only.
+    motion_threshold : float or None
+        The share of changed spot pixels that triggers an inference, or None to disable motion gating.
+    inferred : int
+        The number of frames sent to the detector.
+    skipped : int
+        The number of frames whose occupancy was carried forward.
+
+    Methods
+    -------
+    set_region(parking_coordinates, frame_size)
+        Restricts motion detection to the parking spot polygons.
+    should_infer(frame)
+        Returns True if the car detector has to run on the frame.
+    stats()
+        Returns the number of inferred and skipped frames and the skip ratio.
+    """
+
+    PIXEL_THRESHOLD = 25
+
+    def __init__(self, every_n_frames=None, motion_threshold=None, downscale=4):
+        """
+        Parameters
+        ----------
+        every_n_frames : int or None, optional
+            The largest number of frames between two inferences. The default is None,
+            which leaves the decision to motion gating alone; 0 means the same.
+        motion_threshold : float or None, optional
+            The share of changed spot pixels, between 0 and 1, that triggers an
+            inference. The default is None, which disables motion gating.
+        downscale : int, optional
+            The factor by which frames are shrunk before comparing them. The default is 4.
+        """
+        if every_n_frames == 0:
+            every_n_frames = None
+        if every_n_frames is None and motion_threshold is None:
+            raise ValueError("Either every_n_frames or motion_threshold must be set")
+        if every_n_frames is not None and every_n_frames < 1:
+            raise ValueError(f"every_n_frames must be at least 1, got {every_n_frames}")
+
+        self.every_n_frames = every_n_frames
+        self.motion_threshold = motion_threshold
+        self.downscale = downscale
+        self.inferred = 0
+        self.skipped = 0
+        self.__region = None
+        self.__small_size = None
+        self.__reference = None
+        self.__since_inference = 0
+
+    def set_region(self, parking_coordinates, frame_size):
+        """
+        Restricts motion detection to the parking spot polygons.
+
+        Parameters
+        ----------
+        parking_coordinates : list
+            A list of dictionaries containing the coordinates of each parking spot.
+        frame_size : tuple
+            The (width, height) of the frames the coordinates refer to. Frames of
+            any other size are resized straight to the downscaled region.
+        """
+        width, height = frame_size
+        self.__small_size = (width // self.downscale, height // self.downscale)
+        region = np.zeros(
+            (height // self.downscale, width // self.downscale), dtype=np.uint8
+        )
+        polygons = [
+            (np.asarray(spot["coordinates"], dtype=np.int32) // self.downscale).reshape(
+                -1, 1, 2
+            )
+            for spot in parking_coordinates
+        ]
+        cv2.fillPoly(region, polygons, 1)
+        self.__region = region.astype(bool) if region.any() else None
+
+    def should_infer(self, frame):
+        """
+        Returns True if the car detector has to run on the frame.
+
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            The next frame of the video, in display order.
+
+        Returns
+        -------
+        bool
+            True to run detection, False to carry the previous occupancy forward.
+        """
+        small = None
+        if self.motion_threshold is not None:
+            small = self.__prepare(frame)
+
+        self.__since_inference += 1
+        is_due = self.inferred == 0
+        if self.every_n_frames is not None:
+            is_due = is_due or self.__since_inference >= self.every_n_frames
+        if not is_due and small is not None:
+            is_due = self.__motion(small) > self.motion_threshold
+
+        if is_due:
+            self.inferred += 1
+            self.__since_inference = 0
+            self.__reference = small
+        else:
+            self.skipped += 1
+        return is_due
+
+    def stats(self):
+        """
+        Returns the number of inferred and skipped frames and the skip ratio.
+
+        Returns
+        -------
+        dict
+            The inferred and skipped frame counts and the share of skipped frames.
+        """
+        total = self.inferred + self.skipped
+        return {
+            "inferred": self.inferred,
+            "skipped": self.skipped,
+            "skip_ratio": self.skipped / total if total else 0.0,
+        }
+
+    def __prepare(self, frame):
+        small_size = self.__small_size
+        if small_size is None:
+            height, width = frame.shape[:2]
+            small_size = (width // self.downscale, height // self.downscale)
+        small = cv2.resize(frame, small_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def __motion(self, small):
+        if self.__reference is None or self.__reference.shape != small.shape:
+            return 1.0
+        changed = cv2.absdiff(small, self.__reference) > InferenceScheduler.PIXEL_THRESHOLD
+        if self.__region is not None and self.__region.shape == changed.shape:
+            return changed[self.__region].mean()
+        return changed.mean()
@@ -0,0 +1,239 @@
+import os
+import threading
+import time
+
+import cv2
+
+
+class LiveCapture:
+    """
+    A video source for live streams, read on a grabber thread that keeps only the latest frame.
+
+    The grabber reads the source as fast as it delivers frames and replaces the
+    previous frame, read or not, so a slow consumer always gets the newest frame
+    and latency never grows into a backlog. Frames that were replaced before being
+    read are counted in dropped. When the source fails, e.g. an RTSP camera
+    restarting, the capture is reopened with an exponential backoff.
+
+    A video file stands in for a camera: it is paced at its frame rate, and with
+    loop it starts over at its end instead of ending the stream.
+
+    LiveCapture offers the read(), get(), isOpened() and release() methods of
+    cv2.VideoCapture, so it can replace one.
+
+    Attributes
+    ----------
+    source : str or int
+        The stream URL, device index or video file.
+    frames : int
+        The number of frames grabbed from the source.
+    dropped : int
+        The number of grabbed frames replaced by a newer one before being read.
+    reconnects : int
+        The number of times the source was reopened after a failure.
+
+    Methods
+    -------
+    read()
+        Waits for a frame newer than the last one read and returns it.
+    get(prop)
+        Returns a property of the stream, like cv2.VideoCapture.get.
+    isOpened()
+        Returns True until the capture is released, or the stream has ended and its last frame was read.
+    release()
+        Stops the grabber thread and closes the source.
+    """
+
+    # The longest release() waits for a grabber stuck in a blocking read of the source.
+    RELEASE_TIMEOUT = 5.0
+
+    def __init__(
+        self,
+        source,
+        loop=False,
+        reconnect_delay=0.5,
+        max_reconnect_delay=30.0,
+        max_reconnects=None,
+    ):
+        """
+        Parameters
+        ----------
+        source : str or int
+            An RTSP or HTTP URL, a device index such as 0 or "0", or a video file.
+        loop : bool, optional
+            Start a video file over at its end instead of ending the stream. The default is False.
+        reconnect_delay : float, optional
+            The number of seconds to wait before the first reconnection attempt. The default is 0.5.
+        max_reconnect_delay : float, optional
+            The longest wait between two reconnection attempts, in seconds. The default is 30.
+        max_reconnects : int, optional
+            The number of consecutive failed attempts after which the stream ends. By default, retry forever.
+        """
+        if isinstance(source, str) and source.isdigit():
+            source = int(source)
+        self.source = source
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.loop = loop
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_reconnects = max_reconnects
+        self.frames = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.__properties = {}
+        self.__frame = None
+        self.__frame_time = 0.0
+        self.__position = 0.0
+        self.__sequence = 0
+        self.__returned = 0
+        self.__ended = False
+        self.__started = time.monotonic()
+        self.__condition = threading.Condition()
+        self.__stop_event = threading.Event()
+        self.__thread = threading.Thread(target=self.__grab, daemon=True)
+        self.__thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def read(self):
+        """
+        Waits for a frame newer than the last one read and returns it.
+
+        An outage does not end the wait: the grabber keeps reconnecting, and only
+        the end of the stream or release() stops it. A thread blocked in read()
+        therefore never outlives the capture.
+
+        Returns
+        -------
+        tuple
+            (True, frame) with the latest frame, or (False, None) once the stream
+            has ended or the capture was released.
+        """
+        with self.__condition:
+            self.__condition.wait_for(
+                lambda: self.__sequence > self.__returned
+                or self.__ended
+                or self.__stop_event.is_set()
+            )
+            if self.__sequence == self.__returned or self.__stop_event.is_set():
+                return False, None
+            self.__returned = self.__sequence
+            self.__position = self.__frame_time
+            return True, self.__frame
+
+    def get(self, prop):
+        """
+        Returns a property of the stream, like cv2.VideoCapture.get.
+
+        CAP_PROP_POS_MSEC is the time the last read frame was grabbed, counted
+        from the start of the capture. Other properties are those of the source,
+        and 0 until it is opened.
+        """
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.__position * 1000
+        return self.__properties.get(prop, 0.0)
+
+    def isOpened(self):
+        if self.__stop_event.is_set():
+            return False
+        with self.__condition:
+            return not self.__ended or self.__sequence > self.__returned
+
+    def release(self):
+        """
+        Stops the grabber thread and closes the source.
+
+        Threads waiting in read() return at once. The grabber closes the source as
+        soon as its current read of the source returns, which release() waits for
+        at most RELEASE_TIMEOUT seconds.
+        """
+        self.__stop_event.set()
+        with self.__condition:
+            self.__condition.notify_all()
+        self.__thread.join(LiveCapture.RELEASE_TIMEOUT)
+
+    def __open(self):
+        capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            capture.release()
+            return None
+        for prop in (
+            cv2.CAP_PROP_FPS,
+            cv2.CAP_PROP_FRAME_WIDTH,
+            cv2.CAP_PROP_FRAME_HEIGHT,
+        ):
+            self.__properties[prop] = capture.get(prop)
+        return capture
+
+    def __wait_to_retry(self, failures, delay):
+        if self.max_reconnects is not None and failures > self.max_reconnects:
+            return False
+        self.__stop_event.wait(delay)
+        return not self.__stop_event.is_set()
+
+    def __publish(self, frame):
+        with self.__condition:
+            if self.__sequence > self.__returned:
+                self.dropped += 1
+            self.__frame = frame
+            self.__frame_time = time.monotonic() - self.__started
+            self.__sequence += 1
+            self.frames += 1
+            self.__condition.notify_all()
+
+    def __grab(self):
+        capture = None
+        delay = self.reconnect_delay
+        failures = 0
+        grabbed = 0
+        period = 0.0
+        next_frame = 0.0
+        try:
+            while not self.__stop_event.is_set():
+                if capture is None:
+                    capture = self.__open()
+                    grabbed = 0
+                    if capture is None:
+                        failures += 1
+                        if not self.__wait_to_retry(failures, delay):
+                            return
+                        delay = min(delay * 2, self.max_reconnect_delay)
+                        continue
+                    fps = self.__properties[cv2.CAP_PROP_FPS]
+                    # A file is decoded much faster than a camera delivers frames.
+                    period = 1 / fps if self.is_file and fps > 0 else 0.0
+                    next_frame = time.monotonic()
+
+                ret, frame = capture.read()
+                if not ret:
+                    capture.release()
+                    capture = None
+                    if self.is_file and not self.loop:
+                        return
+                    if not self.is_file:
+                        self.reconnects += 1
+                    if grabbed == 0:
+                        # The source opens but yields nothing: back off as well.
+                        failures += 1
+                        if not self.__wait_to_retry(failures, delay):
+                            return
+                        delay = min(delay * 2, self.max_reconnect_delay)
+                    continue
+
+                failures = 0
+                grabbed += 1
+                delay = self.reconnect_delay
+                self.__publish(frame)
+                if period:
+                    next_frame = max(next_frame + period, time.monotonic() - period)
+                    self.__stop_event.wait(max(0.0, next_frame - time.monotonic()))
+        finally:
+            if capture is not None:
+                capture.release()
+            with self.__condition:
+                self.__ended = True
+                self.__condition.notify_all()
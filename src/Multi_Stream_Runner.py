@@ -0,0 +1,257 @@
+import multiprocessing
+import os
+import queue
+
+import cv2
+import yaml
+
+from Car_Detector import CarDetector
+from Parking_Space_Detector import ParkingSpaceDetector
+
+
+def load_manifest(path):
+    """
+    Loads a manifest of (video source, coordinates file) pairs.
+
+    The manifest is a YAML file with a ``streams`` list, or a bare list, whose
+    entries have a ``video`` and a ``coordinates`` key and an optional ``name``.
+
+    Args:
+        path (str): The path to the manifest file.
+
+    Returns:
+        list: One dictionary with the name, video and coordinates of each stream.
+    """
+    with open(path, "r") as data:
+        manifest = yaml.safe_load(data)
+
+    entries = manifest.get("streams") if isinstance(manifest, dict) else manifest
+    if not entries:
+        raise ValueError(f"The manifest {path} does not list any stream")
+
+    streams = []
+    for i, entry in enumerate(entries):
+        if "video" not in entry or "coordinates" not in entry:
+            raise ValueError(
+                f"Stream {i} of the manifest {path} needs a video and a coordinates entry"
+            )
+        streams.append(
+            {
+                "name": str(entry.get("name", f"stream{i}")),
+                "video": entry["video"],
+                "coordinates": entry["coordinates"],
+            }
+        )
+    return streams
+
+
+def _decode_streams(assignments, frame_queue, frame_size):
+    """
+    Decodes several streams round-robin and queues their frames. Runs in a worker process.
+
+    Every queued item is a (stream index, frame index, timestamp, frame) tuple. A
+    frame index of None marks the end of a stream. Frames are resized to frame_size
+    before they are queued, unless it is None.
+    """
+    videos = {index: cv2.VideoCapture(video_path) for index, video_path in assignments}
+    frame_indices = dict.fromkeys(videos, 0)
+    try:
+        while videos:
+            for index in list(videos):
+                video = videos[index]
+                ret, frame = video.read()
+                if not ret:
+                    video.release()
+                    del videos[index]
+                    frame_queue.put((index, None, None, None))
+                    continue
+                timestamp = video.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                if frame_size is not None:
+                    frame = cv2.resize(frame, frame_size)
+                frame_queue.put((index, frame_indices[index], timestamp, frame))
+                frame_indices[index] += 1
+    finally:
+        for index, video in videos.items():
+            video.release()
+            frame_queue.put((index, None, None, None))
+
+
+class MultiStreamRunner:
+    """
+    A class that processes many camera streams with one shared car detector.
+
+    Decoding is spread over a pool of worker processes, each handling a share of
+    the streams. The frames of all streams meet in one bounded queue, and the
+    model worker in the calling process batches them together, so the detection
+    weights are loaded only once whatever the number of cameras.
+
+    Attributes
+    ----------
+    streams : list
+        The name, video and coordinates of each stream, as returned by load_manifest.
+    car_detector : CarDetector
+        The car detector shared by every stream.
+    detectors : list
+        One ParkingSpaceDetector per stream, holding its parking spots and occupancy engine.
+    frames_processed : int
+        The number of frames processed so far, all streams included.
+    batches : int
+        The number of inference calls made so far.
+
+    Methods
+    -------
+    run(on_frame)
+        Processes every stream to the end and reports the occupancy of each frame.
+    """
+
+    def __init__(
+        self,
+        streams,
+        batch_size=8,
+        decode_workers=None,
+        queue_size=32,
+        device=None,
+        occupancy_mode="polygon",
+        model_size="x",
+        backend="torch",
+        frame_size=ParkingSpaceDetector.FRAME_SIZE,
+        inference_size=None,
+        **detector_options,
+    ):
+        """
+        Parameters
+        ----------
+        streams : list
+            The name, video and coordinates of each stream, as returned by load_manifest.
+        batch_size : int, optional
+            The largest number of frames, from any stream, inferred together. The default is 8.
+        decode_workers : int, optional
+            The number of decoding processes. The default is one per core, at most one per stream.
+        queue_size : int, optional
+            The capacity of the queue between the decoders and the model worker. The default is 32.
+        device : str or int, optional
+            The inference device, e.g. "cpu" or 0. None lets ultralytics pick one.
+        occupancy_mode : str, optional
+            "polygon" or "mask", see ParkingSpaceDetector. The default is "polygon".
+        model_size : str, optional
+            The YOLOv8 model size, one of "n", "s", "m", "l" or "x". The default is "x".
+        backend : str, optional
+            The detector backend: "torch", "onnx" or "openvino". The default is "torch".
+        frame_size : tuple, optional
+            The (width, height) the decoders resize frames to, which keeps the frames
+            crossing process boundaries small. None sends them at their source resolution.
+        inference_size : int, optional
+            The side of the square model input. None keeps the model default.
+        **detector_options
+            Extra keyword arguments passed to the ParkingSpaceDetector of every
+            stream, e.g. smoothing or tracking options. Options acting before
+            detection, such as the inference scheduler, are not applied.
+        """
+        self.streams = streams
+        self.batch_size = batch_size
+        self.decode_workers = max(
+            1, min(decode_workers or os.cpu_count() or 1, len(streams))
+        )
+        self.queue_size = queue_size
+        self.frame_size = frame_size
+        self.car_detector = CarDetector(
+            device=device,
+            model_size=model_size,
+            backend=backend,
+            inference_size=inference_size,
+        )
+        self.detectors = [
+            ParkingSpaceDetector(
+                stream["video"],
+                stream["coordinates"],
+                update_coordinate=False,
+                draw_cars=False,
+                occupancy_mode=occupancy_mode,
+                car_detector=self.car_detector,
+                frame_size=frame_size,
+                **detector_options,
+            )
+            for stream in streams
+        ]
+        self.frames_processed = 0
+        self.batches = 0
+
+    def run(self, on_frame):
+        """
+        Processes every stream to the end and reports the occupancy of each frame.
+
+        Parameters
+        ----------
+        on_frame : callable
+            Called as on_frame(stream_index, frame_index, timestamp, parking_coordinates,
+            total_occupied) for every processed frame. Frames of one stream are
+            reported in order.
+        """
+        context = multiprocessing.get_context("spawn")
+        frame_queue = context.Queue(self.queue_size)
+        assignments = [[] for _ in range(self.decode_workers)]
+        for index, stream in enumerate(self.streams):
+            assignments[index % self.decode_workers].append((index, stream["video"]))
+
+        workers = [
+            context.Process(
+                target=_decode_streams,
+                args=(assignment, frame_queue, self.frame_size),
+                daemon=True,
+            )
+            for assignment in assignments
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            active = len(self.streams)
+            while active:
+                try:
+                    item = frame_queue.get(timeout=1.0)
+                except queue.Empty:
+                    if not any(worker.is_alive() for worker in workers):
+                        break
+                    continue
+
+                batch = []
+                while True:
+                    if item[1] is None:
+                        active -= 1
+                    else:
+                        batch.append(item)
+                    if len(batch) == self.batch_size or not active:
+                        break
+                    try:
+                        item = frame_queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    self.__process(batch, on_frame)
+        finally:
+            for worker in workers:
+                worker.terminate()
+                worker.join()
+
+    def __process(self, batch, on_frame):
+        for index, _, _, frame in batch:
+            detector = self.detectors[index]
+            if not detector.is_generated:
+                detector.load_parking_coordinates(frame)
+
+        frames = [item[3] for item in batch]
+        detections = self.car_detector.detect_batch(frames)
+        for (index, frame_index, timestamp, _), cars in zip(batch, detections):
+            detector = self.detectors[index]
+            total_occupied = detector.update_occupancy(cars, timestamp=timestamp)
+            on_frame(
+                index,
+                frame_index,
+                timestamp,
+                detector.parking_coordinates,
+                total_occupied,
+            )
+
+        self.frames_processed += len(batch)
+        self.batches += 1
@@ -0,0 +1,338 @@
+import hashlib
+import os
+import zipfile
+
+import cv2
+import numpy as np
+
+
+class OccupancyEngine:
+    """
+    A class used to classify car positions against every parking spot in one vectorized call.
+
+    The spot polygons are converted once into NumPy edge arrays, so each frame only
+    costs a handful of array operations instead of building a shapely Polygon and
+    Point for every (spot, car) pair. Only the pairs whose point falls strictly
+    within the bounding box of the spot go through the exact edge test, so large
+    lots stay cheap. A point lying exactly on a spot boundary is treated as
+    outside, matching shapely's ``Polygon.contains``.
+
+    Attributes
+    ----------
+    spot_ids : numpy.ndarray
+        The ids of the parking spots, in the order of the parking coordinates.
+    edge_start : numpy.ndarray
+        An array of shape (spots, edges, 2) with the first vertex of every edge.
+    edge_end : numpy.ndarray
+        An array of shape (spots, edges, 2) with the second vertex of every edge.
+    bounds : numpy.ndarray
+        An array of shape (spots, 4) with the x_min, y_min, x_max, y_max bounds of every spot.
+
+    Methods
+    -------
+    classify(points, spot_indices=None)
+        Returns a boolean array telling which parking spots contain at least one point.
+    contains(points, spot_indices=None)
+        Returns a boolean matrix telling which spot contains which point.
+    spot_indices(points)
+        Returns the index of the first spot containing each point, or NO_SPOT.
+    """
+
+    NO_SPOT = -1
+
+    def __init__(self, parking_coordinates):
+        """
+        Parameters
+        ----------
+        parking_coordinates : list
+            A list of dictionaries containing the id and coordinates of each parking spot,
+            as returned by CoordinateGenerator.get_Coordinates.
+        """
+        self.spot_ids = np.array(
+            [spot["id"] for spot in parking_coordinates], dtype=np.int64
+        )
+        num_vertices = max(
+            (len(spot["coordinates"]) for spot in parking_coordinates), default=0
+        )
+
+        # Polygons with fewer vertices are padded by repeating their last vertex,
+        # which only adds zero-length edges that never change the result.
+        vertices = np.zeros((len(parking_coordinates), num_vertices, 2), dtype=np.int64)
+        for i, spot in enumerate(parking_coordinates):
+            points = np.asarray(spot["coordinates"], dtype=np.int64).reshape(-1, 2)
+            vertices[i, : len(points)] = points
+            vertices[i, len(points) :] = points[-1]
+
+        self.edge_start = vertices
+        self.edge_end = np.roll(vertices, -1, axis=1)
+        self.bounds = np.zeros((len(vertices), 4), dtype=np.int64)
+        if num_vertices:
+            self.bounds[:, :2] = vertices.min(axis=1)
+            self.bounds[:, 2:] = vertices.max(axis=1)
+
+    def contains(self, points, spot_indices=None):
+        """
+        Returns a boolean matrix telling which spot contains which point.
+
+        Parameters
+        ----------
+        points : array_like
+            A sequence of (x, y) integer points, e.g. the low_center of each detected car.
+        spot_indices : array_like, optional
+            The indices of the spots to test. All spots are tested if omitted.
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean array of shape (spots, points).
+        """
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        edge_start, edge_end, bounds = self.edge_start, self.edge_end, self.bounds
+        if spot_indices is not None:
+            edge_start, edge_end = edge_start[spot_indices], edge_end[spot_indices]
+            bounds = bounds[spot_indices]
+        result = np.zeros((len(edge_start), len(points)), dtype=bool)
+        if len(edge_start) == 0 or len(points) == 0:
+            return result
+
+        # A point strictly inside a polygon is strictly inside its bounding box.
+        px, py = points[None, :, 0], points[None, :, 1]
+        candidates = (
+            (px > bounds[:, 0, None])
+            & (py > bounds[:, 1, None])
+            & (px < bounds[:, 2, None])
+            & (py < bounds[:, 3, None])
+        )
+        spots, point_indices = np.nonzero(candidates)
+        if len(spots) == 0:
+            return result
+
+        # One row per candidate (spot, point) pair, one column per edge.
+        x_1 = edge_start[spots, :, 0]
+        y_1 = edge_start[spots, :, 1]
+        x_2 = edge_end[spots, :, 0]
+        y_2 = edge_end[spots, :, 1]
+        px = points[point_indices, None, 0]
+        py = points[point_indices, None, 1]
+
+        # Integer cross product keeps the test exact for pixel coordinates.
+        cross = (x_2 - x_1) * (py - y_1) - (px - x_1) * (y_2 - y_1)
+
+        straddles = (y_1 > py) != (y_2 > py)
+        crossing = straddles & ((cross > 0) == (y_2 > y_1))
+        inside = np.logical_xor.reduce(crossing, axis=1)
+
+        on_edge = (
+            (cross == 0)
+            & (px >= np.minimum(x_1, x_2))
+            & (px <= np.maximum(x_1, x_2))
+            & (py >= np.minimum(y_1, y_2))
+            & (py <= np.maximum(y_1, y_2))
+        ).any(axis=1)
+
+        result[spots, point_indices] = inside & ~on_edge
+        return result
+
+    def classify(self, points, spot_indices=None):
+        """
+        Returns a boolean array telling which parking spots contain at least one point.
+
+        Parameters
+        ----------
+        points : array_like
+            A sequence of (x, y) integer points, e.g. the low_center of each detected car.
+        spot_indices : array_like, optional
+            The indices of the spots to classify. All spots are classified if omitted.
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean array with one entry per classified parking spot.
+        """
+        return self.contains(points, spot_indices).any(axis=1)
+
+    def spot_indices(self, points):
+        """
+        Returns the index of the first spot containing each point, or NO_SPOT.
+
+        Parameters
+        ----------
+        points : array_like
+            A sequence of (x, y) integer points, e.g. the low_center of each detected car.
+
+        Returns
+        -------
+        numpy.ndarray
+            An integer array with one spot index per point.
+        """
+        inside = self.contains(points)
+        if inside.shape[0] == 0:
+            return np.full(inside.shape[1], OccupancyEngine.NO_SPOT, dtype=np.int64)
+        return np.where(
+            inside.any(axis=0), inside.argmax(axis=0), OccupancyEngine.NO_SPOT
+        ).astype(np.int64)
+
+
+class SpotLabelMask:
+    """
+    A class used to resolve car positions to parking spots with a precomputed label image.
+
+    Every spot polygon is rasterized once into an integer image at the working
+    resolution, where each pixel holds the index of the spot covering it or
+    NO_SPOT. A point then resolves to its spot with a single array lookup.
+    Unlike OccupancyEngine, boundary pixels belong to the spot, and where spots
+    overlap the one listed last wins.
+
+    Attributes
+    ----------
+    labels : numpy.ndarray
+        An integer image of shape (height, width) holding the spot index of each pixel.
+    frame_size : tuple
+        The (width, height) of the working resolution.
+
+    Methods
+    -------
+    load_or_build(parking_coordinates, frame_size, path_to_coordinates)
+        Loads the label image cached next to the coordinates file, rebuilding it if stale.
+    spot_indices(points)
+        Returns the spot index of each point, or NO_SPOT.
+    classify(points, spot_indices=None)
+        Returns a boolean array telling which parking spots contain at least one point.
+    """
+
+    NO_SPOT = -1
+    CACHE_SUFFIX = ".mask.npz"
+
+    def __init__(self, parking_coordinates, frame_size, labels=None):
+        """
+        Parameters
+        ----------
+        parking_coordinates : list
+            A list of dictionaries containing the id and coordinates of each parking spot.
+        frame_size : tuple
+            The (width, height) of the frames the coordinates refer to.
+        labels : numpy.ndarray, optional
+            A previously rasterized label image. It is built from the coordinates if omitted.
+        """
+        self.num_spots = len(parking_coordinates)
+        self.frame_size = tuple(frame_size)
+        if labels is None:
+            labels = self.__rasterize(parking_coordinates, self.frame_size)
+        self.labels = labels
+
+    @staticmethod
+    def __rasterize(parking_coordinates, frame_size):
+        width, height = frame_size
+        labels = np.full((height, width), SpotLabelMask.NO_SPOT, dtype=np.int32)
+        for index, spot in enumerate(parking_coordinates):
+            polygon = np.asarray(spot["coordinates"], dtype=np.int32).reshape(-1, 1, 2)
+            cv2.fillPoly(labels, [polygon], index)
+        return labels
+
+    @classmethod
+    def load_or_build(cls, parking_coordinates, frame_size, path_to_coordinates):
+        """
+        Loads the label image cached next to the coordinates file, rebuilding it if stale.
+
+        The cache is keyed on the content of the coordinates file and the frame size,
+        so it is rebuilt only when either of them changes, or when it cannot be read.
+        It is written to a temporary file and moved into place, so processes building
+        it at the same time never see a partial file.
+
+        Parameters
+        ----------
+        parking_coordinates : list
+            A list of dictionaries containing the id and coordinates of each parking spot.
+        frame_size : tuple
+            The (width, height) of the frames the coordinates refer to.
+        path_to_coordinates : str
+            The path to the coordinates file the parking spots were loaded from.
+
+        Returns
+        -------
+        SpotLabelMask
+            The label mask for the given parking spots.
+        """
+        cache_path = os.path.splitext(path_to_coordinates)[0] + cls.CACHE_SUFFIX
+        digest = cls.__digest(path_to_coordinates)
+
+        if os.path.exists(cache_path):
+            try:
+                with np.load(cache_path) as cached:
+                    if (
+                        str(cached["digest"]) == digest
+                        and tuple(cached["frame_size"]) == tuple(frame_size)
+                        and int(cached["num_spots"]) == len(parking_coordinates)
+                    ):
+                        return cls(parking_coordinates, frame_size, cached["labels"])
+            except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+                pass
+
+        mask = cls(parking_coordinates, frame_size)
+        temporary = f"{cache_path}.{os.getpid()}.tmp.npz"
+        try:
+            np.savez_compressed(
+                temporary,
+                labels=mask.labels,
+                digest=digest,
+                frame_size=np.array(frame_size),
+                num_spots=mask.num_spots,
+            )
+            os.replace(temporary, cache_path)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        return mask
+
+    @staticmethod
+    def __digest(path_to_coordinates):
+        sha = hashlib.sha1()
+        if os.path.exists(path_to_coordinates):
+            with open(path_to_coordinates, "rb") as data:
+                sha.update(data.read())
+        return sha.hexdigest()
+
+    def spot_indices(self, points):
+        """
+        Returns the spot index of each point, or NO_SPOT.
+
+        Parameters
+        ----------
+        points : array_like
+            A sequence of (x, y) integer points, e.g. the low_center of each detected car.
+
+        Returns
+        -------
+        numpy.ndarray
+            An integer array with one spot index per point.
+        """
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        height, width = self.labels.shape
+        x, y = points[:, 0], points[:, 1]
+        in_frame = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+        indices = np.full(len(points), SpotLabelMask.NO_SPOT, dtype=np.int64)
+        indices[in_frame] = self.labels[y[in_frame], x[in_frame]]
+        return indices
+
+    def classify(self, points, spot_indices=None):
+        """
+        Returns a boolean array telling which parking spots contain at least one point.
+
+        Parameters
+        ----------
+        points : array_like
+            A sequence of (x, y) integer points, e.g. the low_center of each detected car.
+        spot_indices : array_like, optional
+            The indices of the spots to classify. All spots are classified if omitted.
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean array with one entry per classified parking spot.
+        """
+        indices = self.spot_indices(points)
+        occupied = np.zeros(self.num_spots, dtype=bool)
+        occupied[indices[indices != SpotLabelMask.NO_SPOT]] = True
+        if spot_indices is not None:
+            return occupied[spot_indices]
+        return occupied
@@ -0,0 +1,312 @@
+import json
+import os
+import socket
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+from Frame_Pipeline import BackgroundEncoder
+
+
+class EventSink:
+    """
+    A base class for the destinations of occupancy change events.
+
+    Methods
+    -------
+    write(events)
+        Delivers a list of event dictionaries in one bulk operation.
+    close()
+        Releases the resources of the sink.
+    """
+
+    def write(self, events):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def _json_lines(events):
+    return "".join(json.dumps(event) + "\n" for event in events)
+
+
+class StdoutEventSink(EventSink):
+    """
+    Writes the events to the standard output as JSON Lines.
+    """
+
+    def write(self, events):
+        sys.stdout.write(_json_lines(events))
+        sys.stdout.flush()
+
+
+class RotatingFileEventSink(EventSink):
+    """
+    Appends the events to a JSON Lines file, rotating it once it exceeds max_bytes.
+
+    Rotated files are renamed path.1, path.2, ... up to backup_count, the oldest
+    being dropped.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.output = open(path, "a")
+
+    def write(self, events):
+        self.output.write(_json_lines(events))
+        self.output.flush()
+        if self.output.tell() >= self.max_bytes:
+            self.__rotate()
+
+    def __rotate(self):
+        self.output.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self.output = open(self.path, "w")
+
+    def close(self):
+        self.output.close()
+
+
+class SocketEventSink(EventSink):
+    """
+    Sends the events as JSON Lines over a TCP connection, reconnecting after errors.
+
+    Events that cannot be delivered are dropped and counted in dropped.
+    """
+
+    def __init__(self, host, port, timeout=2.0):
+        self.address = (host, port)
+        self.timeout = timeout
+        self.connection = None
+        self.dropped = 0
+
+    def write(self, events):
+        payload = _json_lines(events).encode()
+        for _ in range(2):
+            try:
+                if self.connection is None:
+                    self.connection = socket.create_connection(
+                        self.address, timeout=self.timeout
+                    )
+                self.connection.sendall(payload)
+                return
+            except OSError:
+                self.close()
+        self.dropped += len(events)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class HttpEventSink(EventSink):
+    """
+    POSTs every batch of events to a URL as one JSON array.
+
+    Events that cannot be delivered are dropped and counted in dropped.
+    """
+
+    def __init__(self, url, timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+        self.dropped = 0
+
+    def write(self, events):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(events).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except OSError:
+            self.dropped += len(events)
+
+
+class BackgroundEventSink(BackgroundEncoder, EventSink):
+    """
+    Delivers the events of another sink on a background thread.
+
+    write() only queues the batch, so a slow or unreachable endpoint never blocks
+    the detection loop. The queue is bounded and drops its oldest batch when the
+    delivery falls behind; dropped counts those batches, while the wrapped sink
+    keeps counting the events it failed to deliver. close() delivers the queued
+    batches, then closes the wrapped sink.
+    """
+
+    def __init__(self, sink, queue_size=16):
+        """
+        Parameters
+        ----------
+        sink : EventSink
+            The sink the events are delivered to, on the background thread.
+        queue_size : int, optional
+            The number of batches buffered before the oldest ones are dropped. The default is 16.
+        """
+        self.sink = sink
+        super().__init__(queue_size)
+
+    def write(self, events):
+        self.submit(events)
+
+    def encode(self, events):
+        self.sink.write(events)
+
+    def finish(self):
+        self.sink.close()
+
+
+def create_event_sink(spec):
+    """
+    Creates an event sink from a short description.
+
+    Network sinks deliver their events on a background thread.
+
+    Args:
+        spec (str): "stdout", "file:<path>", "tcp://<host>:<port>" or an http(s) URL.
+
+    Returns:
+        EventSink: The sink described by spec.
+    """
+    if spec == "stdout":
+        return StdoutEventSink()
+    if spec.startswith("file:"):
+        return RotatingFileEventSink(spec[len("file:") :])
+    if spec.startswith("tcp://"):
+        host, port = spec[len("tcp://") :].rsplit(":", 1)
+        return BackgroundEventSink(SocketEventSink(host, int(port)))
+    if spec.startswith(("http://", "https://")):
+        return BackgroundEventSink(HttpEventSink(spec))
+    raise ValueError(f"Unknown event sink: {spec}")
+
+
+class OccupancyEventPublisher:
+    """
+    A class that diffs the occupancy of consecutive processed frames and publishes only the changes.
+
+    Change events are buffered and handed to every sink in bulk, once buffer_size
+    of them are pending or flush_interval seconds have passed since the last flush.
+
+    Attributes
+    ----------
+    sinks : list
+        The EventSink instances receiving the events.
+    lot_id : str or None
+        An identifier added to every event, to tell lots apart downstream.
+    published : int
+        The number of events delivered to the sinks so far.
+
+    Methods
+    -------
+    publish(parking_coordinates, timestamp)
+        Compares the parking spots with the previous call and buffers one event per changed spot.
+    flush()
+        Delivers the buffered events to every sink.
+    close()
+        Flushes the remaining events and closes every sink.
+    """
+
+    def __init__(self, sinks, lot_id=None, buffer_size=256, flush_interval=1.0):
+        """
+        Parameters
+        ----------
+        sinks : list
+            The EventSink instances receiving the events.
+        lot_id : str, optional
+            An identifier added to every event.
+        buffer_size : int, optional
+            The number of pending events that triggers a flush. The default is 256.
+        flush_interval : float, optional
+            The largest number of seconds events stay buffered. The default is 1.
+        """
+        self.sinks = sinks
+        self.lot_id = lot_id
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.published = 0
+        self.__buffer = []
+        self.__previous = None
+        self.__last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def publish(self, parking_coordinates, timestamp):
+        """
+        Compares the parking spots with the previous call and buffers one event per changed spot.
+
+        The first call publishes the state of every spot, so consumers start from a
+        full picture.
+
+        Parameters
+        ----------
+        parking_coordinates : list
+            The list of parking spot dictionaries with their is_occupied flags.
+        timestamp : float
+            The time of the frame, in seconds.
+        """
+        current = np.fromiter(
+            (spot["is_occupied"] for spot in parking_coordinates),
+            dtype=bool,
+            count=len(parking_coordinates),
+        )
+        previous = self.__previous
+        if previous is None or len(previous) != len(current):
+            previous = None
+            changed = np.arange(len(current))
+        else:
+            changed = np.flatnonzero(current != previous)
+        self.__previous = current
+
+        for i in changed:
+            event = {
+                "spot_id": parking_coordinates[i]["id"],
+                "is_occupied": bool(current[i]),
+                "was_occupied": None if previous is None else bool(previous[i]),
+                "timestamp": timestamp,
+            }
+            if self.lot_id is not None:
+                event["lot_id"] = self.lot_id
+            self.__buffer.append(event)
+
+        if (
+            len(self.__buffer) >= self.buffer_size
+            or time.monotonic() - self.__last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        """
+        Delivers the buffered events to every sink.
+        """
+        self.__last_flush = time.monotonic()
+        if not self.__buffer:
+            return
+        events, self.__buffer = self.__buffer, []
+        for sink in self.sinks:
+            sink.write(events)
+        self.published += len(events)
+
+    def close(self):
+        """
+        Flushes the remaining events and closes every sink.
+        """
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
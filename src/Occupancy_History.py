@@ -0,0 +1,695 @@
+import argparse
+import glob
+import math
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+from Frame_Pipeline import BackgroundEncoder
+
+MINUTE = 60
+HOUR = 3600
+
+
+class RollupSeries:
+    """
+    A ring buffer of fixed-length time buckets with one column per parking spot.
+
+    Each row holds, for every spot, the number of seconds it was observed and
+    occupied during the bucket and the number of times a car arrived in it. Once
+    the buffer is full, a new row replaces the oldest one. A row appended with the
+    start of the last appended row is added into it, so a bucket split over two
+    runs stays a single row.
+
+    Attributes
+    ----------
+    bucket_seconds : float
+        The length of a bucket, e.g. 60 for minutes.
+    starts : numpy.ndarray
+        The start time of the bucket in each row, NaN for an empty row.
+    occupied : numpy.ndarray
+        An array of shape (rows, spots) of occupied seconds.
+    observed : numpy.ndarray
+        An array of shape (rows, spots) of observed seconds.
+    arrivals : numpy.ndarray
+        An array of shape (rows, spots) of free to occupied transitions.
+
+    Methods
+    -------
+    append(start, occupied, observed, arrivals)
+        Stores the totals of one bucket.
+    rows(start, end)
+        Returns the rows of the buckets lying entirely within [start, end), in time order.
+    select(start, end, spots)
+        Returns copies of the occupied, observed and arrivals of the given spots over [start, end).
+    totals(start, end, spots)
+        Returns the occupied seconds, observed seconds and arrivals of the given spots over [start, end).
+    """
+
+    def __init__(self, bucket_seconds, num_spots, capacity):
+        self.bucket_seconds = bucket_seconds
+        self.starts = np.full(capacity, np.nan)
+        self.occupied = np.zeros((capacity, num_spots), dtype=np.float32)
+        self.observed = np.zeros((capacity, num_spots), dtype=np.float32)
+        self.arrivals = np.zeros((capacity, num_spots), dtype=np.uint32)
+        self.__next = 0
+
+    def __len__(self):
+        return int(np.count_nonzero(~np.isnan(self.starts)))
+
+    def append(self, start, occupied, observed, arrivals):
+        last = (self.__next - 1) % len(self.starts)
+        if self.starts[last] == start:
+            self.occupied[last] += occupied
+            self.observed[last] += observed
+            self.arrivals[last] = self.arrivals[last] + arrivals
+            return
+        row = self.__next
+        self.starts[row] = start
+        self.occupied[row] = occupied
+        self.observed[row] = observed
+        self.arrivals[row] = arrivals
+        self.__next = (row + 1) % len(self.starts)
+
+    def rows(self, start, end):
+        """
+        Returns the rows of the buckets lying entirely within [start, end), in time order.
+        """
+        with np.errstate(invalid="ignore"):
+            inside = (self.starts >= start) & (self.starts + self.bucket_seconds <= end)
+        rows = np.flatnonzero(inside)
+        return rows[np.argsort(self.starts[rows], kind="stable")]
+
+    def select(self, start, end, spots):
+        """
+        Returns copies of the occupied, observed and arrivals of the given spots over [start, end).
+
+        Only the buckets lying entirely within the range are selected, one row each.
+        """
+        selection = np.ix_(self.rows(start, end), spots)
+        return (
+            self.occupied[selection],
+            self.observed[selection],
+            self.arrivals[selection],
+        )
+
+    def totals(self, start, end, spots):
+        """
+        Returns the occupied seconds, observed seconds and arrivals of the given spots over [start, end).
+
+        Only the buckets lying entirely within the range are counted.
+        """
+        return _sum_rows(self.select(start, end, spots))
+
+
+def _sum_rows(selection):
+    occupied, observed, arrivals = selection
+    return (
+        occupied.sum(axis=0, dtype=np.float64),
+        observed.sum(axis=0, dtype=np.float64),
+        arrivals.sum(axis=0, dtype=np.int64),
+    )
+
+
+class _HistoryFileWriter(BackgroundEncoder):
+    def __init__(self, directory):
+        self.directory = directory
+        super().__init__(queue_size=64, drop_oldest=False)
+
+    def encode(self, item):
+        prefix, arrays = item
+        path = os.path.join(self.directory, f"{prefix}.npz")
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{prefix}-{suffix}.npz")
+            suffix += 1
+        temporary = f"{path}.tmp.npz"
+        np.savez(temporary, **arrays)
+        os.replace(temporary, path)
+
+
+class OccupancyHistory:
+    """
+    A class that keeps the occupancy history of every parking spot, with minute and hour rollups.
+
+    Every recorded frame adds its time since the previous frame to the observed
+    time of each spot, and to the occupied time of the spots that were occupied.
+    These totals accumulate per minute and per hour in RollupSeries, from which the
+    occupancy ratio and turnover (car arrivals) of any spots over any period are
+    summed without replaying frames. State changes are also logged as raw columns
+    of spot index, timestamp and state, in fixed-size chunks.
+
+    Memory stays bounded: the series keep minute_retention and hour_retention
+    seconds of buckets, and at most max_chunks chunks of raw changes are kept.
+    With a directory, every sealed chunk and every completed hour, with its
+    minutes, is also saved there as an .npz file on a background thread. A file
+    only holds what this instance recorded, so an hour split over two runs is
+    saved in two files, which are added together when the history is reopened.
+    Timestamps should be wall clock times, so the runs line up.
+
+    Attributes
+    ----------
+    spot_ids : numpy.ndarray or None
+        The id of each parking spot, known from the first recorded frame or the saved files.
+    minutes : RollupSeries or None
+        The per-minute buckets.
+    hours : RollupSeries or None
+        The per-hour buckets.
+    frames : int
+        The number of frames recorded.
+
+    Methods
+    -------
+    record(parking_coordinates, timestamp)
+        Adds the occupancy of one frame to the history.
+    utilization(start, end, spot_ids=None)
+        Returns the occupancy ratio and turnover of each spot over a period.
+    series(start, end, spot_ids=None, resolution="hour")
+        Returns the occupancy ratio of each spot in every minute or hour of a period.
+    changes(start, end, spot_ids=None)
+        Returns the raw state changes logged over a period.
+    time_range()
+        Returns the first and last times covered by the history.
+    close()
+        Saves the open buckets and chunk, and stops the background writer.
+    """
+
+    def __init__(
+        self,
+        directory=None,
+        minute_retention=24 * 3600,
+        hour_retention=90 * 24 * 3600,
+        chunk_size=65536,
+        max_chunks=16,
+        max_gap=60.0,
+    ):
+        """
+        Parameters
+        ----------
+        directory : str, optional
+            A directory where the history is saved and loaded from, created if needed.
+        minute_retention : float, optional
+            The number of seconds of minute buckets kept in memory. The default is one day.
+        hour_retention : float, optional
+            The number of seconds of hour buckets kept in memory. The default is 90 days.
+        chunk_size : int, optional
+            The number of state changes per raw chunk. The default is 65536.
+        max_chunks : int, optional
+            The number of sealed raw chunks kept in memory. The default is 16.
+        max_gap : float, optional
+            Intervals between two frames longer than this many seconds, e.g. a stream
+            outage, are not counted as observed. The default is 60.
+        """
+        self.directory = directory
+        self.minute_capacity = max(1, math.ceil(minute_retention / MINUTE))
+        self.hour_capacity = max(1, math.ceil(hour_retention / HOUR))
+        self.chunk_size = chunk_size
+        self.max_gap = max_gap
+        self.spot_ids = None
+        self.minutes = None
+        self.hours = None
+        self.frames = 0
+        self.__indices = {}
+        self.__states = None
+        self.__last_time = None
+        self.__minute_start = None
+        self.__hour_start = None
+        self.__chunks = deque(maxlen=max_chunks)
+        self.__chunk = None
+        self.__chunk_length = 0
+        self.__chunk_sequence = 0
+        self.__lock = threading.RLock()
+        self.__writer = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self.__load()
+            self.__writer = _HistoryFileWriter(directory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __start(self, spot_ids):
+        self.spot_ids = np.asarray(spot_ids)
+        self.__indices = {
+            spot_id: i for i, spot_id in enumerate(self.spot_ids.tolist())
+        }
+        num_spots = len(self.spot_ids)
+        self.minutes = RollupSeries(MINUTE, num_spots, self.minute_capacity)
+        self.hours = RollupSeries(HOUR, num_spots, self.hour_capacity)
+        self.__minute_totals = self.__empty_totals()
+        self.__hour_totals = self.__empty_totals()
+        self.__hour_minutes = []
+        self.__chunk = self.__empty_chunk()
+
+    def __empty_totals(self):
+        num_spots = len(self.spot_ids)
+        return [
+            np.zeros(num_spots),
+            np.zeros(num_spots),
+            np.zeros(num_spots, dtype=np.int64),
+        ]
+
+    def __empty_chunk(self):
+        return {
+            "spot": np.zeros(self.chunk_size, dtype=np.int32),
+            "timestamp": np.zeros(self.chunk_size),
+            "state": np.zeros(self.chunk_size, dtype=bool),
+        }
+
+    def record(self, parking_coordinates, timestamp):
+        """
+        Adds the occupancy of one frame to the history.
+
+        Parameters
+        ----------
+        parking_coordinates : list
+            The list of parking spot dictionaries with their is_occupied flags.
+        timestamp : float
+            The time of the frame, in seconds.
+        """
+        states = np.fromiter(
+            (spot["is_occupied"] for spot in parking_coordinates),
+            dtype=bool,
+            count=len(parking_coordinates),
+        )
+        with self.__lock:
+            if self.spot_ids is None:
+                self.__start([spot["id"] for spot in parking_coordinates])
+            elif len(states) != len(self.spot_ids):
+                raise ValueError(
+                    f"The history holds {len(self.spot_ids)} spots, "
+                    f"got a frame with {len(states)}"
+                )
+            self.frames += 1
+
+            previous = self.__states
+            if previous is None:
+                self.__advance(timestamp)
+                self.__log(np.arange(len(states)), timestamp, states)
+            else:
+                elapsed = timestamp - self.__last_time
+                if 0 < elapsed <= self.max_gap:
+                    self.__accumulate(self.__last_time, timestamp, previous)
+                self.__advance(timestamp)
+                changed = np.flatnonzero(states != previous)
+                self.__minute_totals[2][changed[states[changed]]] += 1
+                self.__log(changed, timestamp, states[changed])
+            self.__states = states
+            self.__last_time = timestamp
+
+    def __accumulate(self, start, end, states):
+        time = start
+        while time < end:
+            self.__advance(time)
+            boundary = min(end, self.__minute_start + MINUTE)
+            self.__minute_totals[0] += (boundary - time) * states
+            self.__minute_totals[1] += boundary - time
+            time = boundary
+
+    def __advance(self, timestamp):
+        minute = math.floor(timestamp / MINUTE) * MINUTE
+        if minute == self.__minute_start:
+            return
+        if self.__minute_start is not None:
+            self.__seal_minute()
+        hour = math.floor(timestamp / HOUR) * HOUR
+        if hour != self.__hour_start:
+            if self.__hour_start is not None:
+                self.__seal_hour()
+            self.__hour_start = hour
+        self.__minute_start = minute
+
+    def __seal_minute(self):
+        totals = self.__minute_totals
+        if totals[1].any() or totals[2].any():
+            self.minutes.append(self.__minute_start, *totals)
+            self.__hour_minutes.append((self.__minute_start, *totals))
+            for hour_total, minute_total in zip(self.__hour_totals, totals):
+                hour_total += minute_total
+        self.__minute_totals = self.__empty_totals()
+
+    def __seal_hour(self):
+        totals = self.__hour_totals
+        if totals[1].any() or totals[2].any():
+            self.hours.append(self.__hour_start, *totals)
+            if self.__writer is not None:
+                # Only the minutes recorded by this instance: those loaded from
+                # an earlier file of the same hour are already saved.
+                num_spots = len(self.spot_ids)
+                minutes = list(zip(*self.__hour_minutes)) or [[], [], [], []]
+                self.__writer.submit(
+                    (
+                        f"hour-{int(self.__hour_start):011d}",
+                        {
+                            "spot_ids": self.spot_ids,
+                            "hour_start": np.array([self.__hour_start]),
+                            "hour_occupied": totals[0],
+                            "hour_observed": totals[1],
+                            "hour_arrivals": totals[2],
+                            "minute_starts": np.array(minutes[0], dtype=np.float64),
+                            "minute_occupied": np.array(
+                                minutes[1], dtype=np.float32
+                            ).reshape(-1, num_spots),
+                            "minute_observed": np.array(
+                                minutes[2], dtype=np.float32
+                            ).reshape(-1, num_spots),
+                            "minute_arrivals": np.array(
+                                minutes[3], dtype=np.uint32
+                            ).reshape(-1, num_spots),
+                        },
+                    )
+                )
+        self.__hour_totals = self.__empty_totals()
+        self.__hour_minutes = []
+
+    def __log(self, spots, timestamp, states):
+        written = 0
+        while written < len(spots):
+            count = min(len(spots) - written, self.chunk_size - self.__chunk_length)
+            chunk, start = self.__chunk, self.__chunk_length
+            chunk["spot"][start : start + count] = spots[written : written + count]
+            chunk["timestamp"][start : start + count] = timestamp
+            chunk["state"][start : start + count] = states[written : written + count]
+            self.__chunk_length += count
+            written += count
+            if self.__chunk_length == self.chunk_size:
+                self.__seal_chunk()
+
+    def __seal_chunk(self):
+        if self.__chunk_length == 0:
+            return
+        chunk = {
+            name: column[: self.__chunk_length] for name, column in self.__chunk.items()
+        }
+        self.__chunks.append(chunk)
+        if self.__writer is not None:
+            self.__writer.submit(
+                (
+                    f"changes-{self.__chunk_sequence:08d}",
+                    {"spot_ids": self.spot_ids, **chunk},
+                )
+            )
+        self.__chunk_sequence += 1
+        self.__chunk = self.__empty_chunk()
+        self.__chunk_length = 0
+
+    def __load(self):
+        paths = glob.glob(os.path.join(self.directory, "hour-*.npz"))
+        if not paths:
+            return
+        # hour-<start>.npz, or hour-<start>-<n>.npz for later runs in the same hour.
+        hour_starts = [int(os.path.basename(path)[5:16]) for path in paths]
+        oldest = max(hour_starts) - (self.hour_capacity - 1) * HOUR
+        hours, minutes = [], []
+        for path, hour_start in zip(paths, hour_starts):
+            if hour_start < oldest:
+                continue
+            with np.load(path) as data:
+                if self.spot_ids is None:
+                    self.__start(data["spot_ids"])
+                elif not np.array_equal(data["spot_ids"], self.spot_ids):
+                    raise ValueError(f"{path} holds the history of other parking spots")
+                hours.append(
+                    (
+                        data["hour_start"][0],
+                        data["hour_occupied"],
+                        data["hour_observed"],
+                        data["hour_arrivals"],
+                    )
+                )
+                minutes.extend(
+                    zip(
+                        data["minute_starts"],
+                        data["minute_occupied"],
+                        data["minute_observed"],
+                        data["minute_arrivals"],
+                    )
+                )
+        # In time order, the rows of a bucket saved by several runs are adjacent
+        # and append() adds them together.
+        for rollups, rows in ((self.hours, hours), (self.minutes, minutes)):
+            for row in sorted(rows, key=lambda row: row[0]):
+                rollups.append(*row)
+        changes = glob.glob(os.path.join(self.directory, "changes-*.npz"))
+        self.__chunk_sequence = len(changes)
+
+    def __spot_indices(self, spot_ids):
+        if spot_ids is None:
+            return np.arange(len(self.spot_ids))
+        try:
+            return np.array(
+                [self.__indices[spot_id] for spot_id in spot_ids], dtype=np.intp
+            )
+        except KeyError as error:
+            raise KeyError(f"Unknown parking spot id: {error.args[0]}") from None
+
+    def __open_minute(self, start, end):
+        """
+        Returns the totals of the open minute if it starts within [start, end).
+        """
+        minute = self.__minute_start
+        if minute is None or not start <= minute < end:
+            return None
+        return self.__minute_totals
+
+    def utilization(self, start, end, spot_ids=None):
+        """
+        Returns the occupancy ratio and turnover of each spot over a period.
+
+        Whole hours come from the hour buckets and the rest from the minute
+        buckets, so the period is rounded inwards to whole minutes. The minute in
+        progress counts if it starts within the period. The buckets are copied
+        under the lock and summed outside it, so a long period does not hold up
+        record().
+
+        Parameters
+        ----------
+        start : float
+            The start of the period, in seconds.
+        end : float
+            The end of the period, in seconds, excluded.
+        spot_ids : list, optional
+            The ids of the spots to report. All spots by default.
+
+        Returns
+        -------
+        dict
+            spot_ids, occupied_seconds, observed_seconds, occupancy_ratio (NaN for
+            spots never observed) and turnover (car arrivals) per spot, and the
+            utilization of all the given spots together.
+        """
+        with self.__lock:
+            if self.spot_ids is None:
+                spots = np.zeros(0, dtype=np.intp)
+                occupied = observed = np.zeros(0)
+                arrivals = np.zeros(0, dtype=np.int64)
+                selections = None
+            else:
+                spots = self.__spot_indices(spot_ids)
+                hours_start = math.ceil(start / HOUR) * HOUR
+                hours_end = math.floor(end / HOUR) * HOUR
+                if self.__hour_start is not None:
+                    # The hour in progress is only in the minute buckets.
+                    hours_end = min(hours_end, self.__hour_start)
+                selections = []
+                if hours_start < hours_end:
+                    selections.append(self.hours.select(hours_start, hours_end, spots))
+                    selections.append(self.minutes.select(start, hours_start, spots))
+                    selections.append(self.minutes.select(hours_end, end, spots))
+                else:
+                    selections.append(self.minutes.select(start, end, spots))
+                open_minute = self.__open_minute(start, end)
+                if open_minute is not None:
+                    selections.append(
+                        tuple(total[spots][None] for total in open_minute)
+                    )
+            spot_ids = [] if self.spot_ids is None else self.spot_ids[spots].tolist()
+
+        if selections is not None:
+            parts = [_sum_rows(selection) for selection in selections]
+            occupied, observed, arrivals = (sum(values) for values in zip(*parts))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = occupied / observed
+            total = occupied.sum() / observed.sum() if observed.sum() else float("nan")
+        return {
+            "spot_ids": spot_ids,
+            "occupied_seconds": occupied,
+            "observed_seconds": observed,
+            "occupancy_ratio": ratio,
+            "turnover": arrivals,
+            "utilization": float(total),
+        }
+
+    def series(self, start, end, spot_ids=None, resolution="hour"):
+        """
+        Returns the occupancy ratio of each spot in every minute or hour of a period.
+
+        Parameters
+        ----------
+        start : float
+            The start of the period, in seconds.
+        end : float
+            The end of the period, in seconds, excluded.
+        spot_ids : list, optional
+            The ids of the spots to report. All spots by default.
+        resolution : str, optional
+            "minute" or "hour". The default is "hour".
+
+        Returns
+        -------
+        dict
+            spot_ids, the starts of the buckets, and arrays of shape (buckets, spots)
+            of occupancy_ratio (NaN when not observed) and turnover.
+        """
+        if resolution not in ("minute", "hour"):
+            raise ValueError(f"Unknown resolution: {resolution}")
+        with self.__lock:
+            if self.spot_ids is None:
+                return {"spot_ids": [], "starts": np.zeros(0)}
+            spots = self.__spot_indices(spot_ids)
+            rollups = self.minutes if resolution == "minute" else self.hours
+            rows = rollups.rows(start, end)
+            selection = np.ix_(rows, spots)
+            occupied = rollups.occupied[selection].astype(np.float64)
+            observed = rollups.observed[selection].astype(np.float64)
+            arrivals = rollups.arrivals[selection].astype(np.int64)
+            starts = rollups.starts[rows]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = occupied / observed
+        return {
+            "spot_ids": self.spot_ids[spots].tolist(),
+            "starts": starts,
+            "occupancy_ratio": ratio,
+            "turnover": arrivals,
+        }
+
+    def changes(self, start, end, spot_ids=None):
+        """
+        Returns the raw state changes logged over a period, from the chunks still in memory.
+
+        The first recorded frame logs the state of every spot.
+
+        Returns
+        -------
+        dict
+            Arrays of spot_ids, timestamps and states, in time order.
+        """
+        with self.__lock:
+            if self.spot_ids is None:
+                return {
+                    "spot_ids": [],
+                    "timestamps": np.zeros(0),
+                    "states": np.zeros(0, dtype=bool),
+                }
+            chunks = list(self.__chunks)
+            chunks.append(
+                {
+                    name: column[: self.__chunk_length].copy()
+                    for name, column in self.__chunk.items()
+                }
+            )
+            spots = None if spot_ids is None else self.__spot_indices(spot_ids)
+        columns = {
+            name: np.concatenate([chunk[name] for chunk in chunks])
+            for name in ("spot", "timestamp", "state")
+        }
+        selected = (columns["timestamp"] >= start) & (columns["timestamp"] < end)
+        if spots is not None:
+            selected &= np.isin(columns["spot"], spots)
+        return {
+            "spot_ids": self.spot_ids[columns["spot"][selected]].tolist(),
+            "timestamps": columns["timestamp"][selected],
+            "states": columns["state"][selected],
+        }
+
+    def time_range(self):
+        """
+        Returns the first and last times covered by the history, or None if it is empty.
+        """
+        with self.__lock:
+            bounds = []
+            for rollups in (self.minutes, self.hours):
+                if rollups is not None and len(rollups):
+                    bounds.append(np.nanmin(rollups.starts))
+                    bounds.append(np.nanmax(rollups.starts) + rollups.bucket_seconds)
+            if self.__minute_start is not None:
+                bounds.append(self.__minute_start)
+                bounds.append(self.__last_time)
+        if not bounds:
+            return None
+        return float(min(bounds)), float(max(bounds))
+
+    def close(self):
+        """
+        Saves the open buckets and chunk, and stops the background writer.
+        """
+        with self.__lock:
+            if self.__minute_start is not None:
+                self.__seal_minute()
+                self.__seal_hour()
+                self.__minute_start = self.__hour_start = None
+                self.__states = None
+            if self.spot_ids is not None:
+                self.__seal_chunk()
+        if self.__writer is not None:
+            self.__writer.close()
+
+
+def parse_duration(value):
+    """
+    Parses a duration such as "90", "15m", "12h" or "7d" into seconds.
+    """
+    units = {"s": 1, "m": MINUTE, "h": HOUR, "d": 24 * HOUR}
+    try:
+        if value[-1:] in units:
+            return float(value[:-1]) * units[value[-1]]
+        return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a duration like 7d, got {value!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reports spot utilization from a saved occupancy history."
+    )
+    parser.add_argument("directory", help="the --history-dir of a previous run")
+    parser.add_argument("--spots", type=int, nargs="+", help="spot ids, all by default")
+    parser.add_argument("--start", type=float, help="start of the period, in seconds")
+    parser.add_argument("--end", type=float, help="end of the period, in seconds")
+    parser.add_argument(
+        "--last",
+        type=parse_duration,
+        help="report the last period of this length, e.g. 7d, ending with the history",
+    )
+    args = parser.parse_args()
+
+    history = OccupancyHistory(args.directory)
+    time_range = history.time_range()
+    history.close()
+    if time_range is None:
+        print(f"No occupancy history in {args.directory}")
+        return
+    end = args.end if args.end is not None else time_range[1]
+    start = args.start if args.start is not None else time_range[0]
+    if args.last is not None:
+        start = end - args.last
+
+    report = history.utilization(start, end, args.spots)
+    print(f"{'spot':>8s} {'ratio':>8s} {'turnover':>9s} {'observed_h':>11s}")
+    for spot_id, ratio, turnover, observed in zip(
+        report["spot_ids"],
+        report["occupancy_ratio"],
+        report["turnover"],
+        report["observed_seconds"],
+    ):
+        print(f"{spot_id!s:>8s} {ratio:8.1%} {turnover:9d} {observed / HOUR:11.2f}")
+    print(f"Utilization from {start:.0f} s to {end:.0f} s: {report['utilization']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
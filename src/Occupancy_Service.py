@@ -0,0 +1,387 @@
+import asyncio
+import json
+import math
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+
+class OccupancySnapshot:
+    """
+    An immutable view of the occupancy of every parking spot after one frame.
+
+    The detection loop builds a new snapshot per frame and never modifies it, so
+    readers on other threads can use it without any lock. Its JSON encodings
+    are made on first request, by the reader, and cached.
+
+    Attributes
+    ----------
+    sequence : int
+        The number of the snapshot, increasing with every published frame.
+    timestamp : float
+        The time of the frame, in seconds.
+    published_at : float
+        The wall clock time the snapshot was published, in seconds since the epoch.
+    spot_ids : tuple
+        The id of each parking spot.
+    states : numpy.ndarray
+        The read-only occupancy of each parking spot.
+    lot_id : str or None
+        The identifier of the lot.
+    """
+
+    def __init__(self, sequence, timestamp, spot_ids, index, states, lot_id=None):
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.published_at = time.time()
+        self.spot_ids = spot_ids
+        self.states = states
+        self.states.flags.writeable = False
+        self.lot_id = lot_id
+        self.__index = index
+        self.__bodies = {}
+
+    @property
+    def occupied(self):
+        return int(np.count_nonzero(self.states))
+
+    def lot(self):
+        """
+        Returns the occupancy summary of the lot as a dictionary.
+        """
+        occupied = self.occupied
+        return {
+            "lot_id": self.lot_id,
+            "sequence": self.sequence,
+            "timestamp": self.timestamp,
+            "published_at": self.published_at,
+            "total": len(self.spot_ids),
+            "occupied": occupied,
+            "free": len(self.spot_ids) - occupied,
+        }
+
+    def spot(self, spot_id):
+        """
+        Returns the occupancy of one parking spot, found by its id as a string, or None.
+        """
+        index = self.__index.get(str(spot_id))
+        if index is None:
+            return None
+        return {
+            "id": self.spot_ids[index],
+            "is_occupied": bool(self.states[index]),
+            "sequence": self.sequence,
+            "timestamp": self.timestamp,
+        }
+
+    def body(self, name):
+        """
+        Returns the cached JSON encoding of the "lot" summary or of the full "occupancy".
+        """
+        body = self.__bodies.get(name)
+        if body is None:
+            payload = self.lot()
+            if name == "occupancy":
+                payload["spots"] = [
+                    {"id": spot_id, "is_occupied": state}
+                    for spot_id, state in zip(self.spot_ids, self.states.tolist())
+                ]
+            body = json.dumps(payload).encode()
+            self.__bodies[name] = body
+        return body
+
+
+def _json_value(value):
+    if isinstance(value, np.ndarray):
+        return [_json_value(item) for item in value.tolist()]
+    if isinstance(value, list):
+        return [_json_value(item) for item in value]
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class OccupancyService:
+    """
+    A small HTTP server answering occupancy queries from the latest published snapshot.
+
+    The server runs an asyncio event loop on its own thread. The detection loop
+    calls publish() after each frame, which copies the spot states into a new
+    OccupancySnapshot and swaps it in with a single reference assignment, so
+    neither side ever waits for the other. Connections are kept alive between
+    requests. Utilization queries are summed on a worker thread, so a long period
+    never holds up the other requests.
+
+    Endpoints, all answering GET with JSON:
+
+    - /occupancy: the lot summary and the state of every spot.
+    - /lot: the lot summary only.
+    - /spots/<id>: the state of one spot.
+    - /utilization?start=&end=&spots=1,2: the occupancy ratio and turnover of
+      the spots over a period, when an OccupancyHistory is attached. The period
+      defaults to the last hour.
+    - /health: the liveness of the service and the age of the snapshot.
+
+    Attributes
+    ----------
+    host : str
+        The address the server listens on.
+    port : int
+        The port the server listens on, known once started.
+    snapshot : OccupancySnapshot or None
+        The latest published snapshot.
+    history : OccupancyHistory or None
+        The history answering utilization queries.
+    requests : int
+        The number of requests answered.
+
+    Methods
+    -------
+    start()
+        Starts the server thread and returns the port it listens on.
+    publish(parking_coordinates, timestamp)
+        Swaps in a snapshot of the current occupancy of the parking spots.
+    close()
+        Stops the server and closes the open connections.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, lot_id=None, history=None):
+        """
+        Parameters
+        ----------
+        host : str, optional
+            The address to listen on. The default only accepts local connections.
+        port : int, optional
+            The port to listen on. The default picks any free port.
+        lot_id : str, optional
+            The identifier of the lot, added to every answer.
+        history : OccupancyHistory, optional
+            A history answering the /utilization queries.
+        """
+        self.host = host
+        self.port = port
+        self.lot_id = lot_id
+        self.history = history
+        self.snapshot = None
+        self.requests = 0
+        self.__sequence = 0
+        self.__source = None
+        self.__spot_ids = ()
+        self.__index = {}
+        self.__loop = None
+        self.__server = None
+        self.__handlers = set()
+        self.__thread = None
+        self.__ready = threading.Event()
+        self.__error = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        """
+        Starts the server thread and returns the port it listens on.
+
+        Returns
+        -------
+        int
+            The port the server listens on.
+        """
+        self.__thread = threading.Thread(target=self.__serve, daemon=True)
+        self.__thread.start()
+        self.__ready.wait()
+        if self.__error is not None:
+            raise self.__error
+        return self.port
+
+    def publish(self, parking_coordinates, timestamp):
+        """
+        Swaps in a snapshot of the current occupancy of the parking spots.
+
+        Parameters
+        ----------
+        parking_coordinates : list
+            The list of parking spot dictionaries with their is_occupied flags.
+        timestamp : float
+            The time of the frame, in seconds.
+        """
+        if (
+            parking_coordinates is not self.__source
+            or len(parking_coordinates) != len(self.__spot_ids)
+        ):
+            self.__source = parking_coordinates
+            self.__spot_ids = tuple(spot["id"] for spot in parking_coordinates)
+            self.__index = {
+                str(spot_id): i for i, spot_id in enumerate(self.__spot_ids)
+            }
+        states = np.fromiter(
+            (spot["is_occupied"] for spot in parking_coordinates),
+            dtype=bool,
+            count=len(parking_coordinates),
+        )
+        self.__sequence += 1
+        self.snapshot = OccupancySnapshot(
+            self.__sequence,
+            timestamp,
+            self.__spot_ids,
+            self.__index,
+            states,
+            self.lot_id,
+        )
+
+    def close(self):
+        """
+        Stops the server and closes the open connections.
+        """
+        if self.__loop is not None and self.__thread.is_alive():
+            self.__loop.call_soon_threadsafe(self.__loop.stop)
+            self.__thread.join()
+
+    def __serve(self):
+        self.__loop = asyncio.new_event_loop()
+        try:
+            self.__server = self.__loop.run_until_complete(
+                asyncio.start_server(self.__handle, self.host, self.port)
+            )
+            self.port = self.__server.sockets[0].getsockname()[1]
+        except OSError as error:
+            self.__error = error
+            self.__ready.set()
+            self.__loop.close()
+            return
+        self.__ready.set()
+        try:
+            self.__loop.run_forever()
+        finally:
+            self.__server.close()
+            # Kept-alive connections wait in readline() for a request that may never
+            # come, and wait_closed() waits for their handlers since Python 3.12.
+            # Cancelling a handler closes its connection.
+            handlers = list(self.__handlers)
+            for handler in handlers:
+                handler.cancel()
+            if handlers:
+                self.__loop.run_until_complete(
+                    asyncio.gather(*handlers, return_exceptions=True)
+                )
+            self.__loop.run_until_complete(self.__server.wait_closed())
+            self.__loop.close()
+
+    async def __handle(self, reader, writer):
+        handler = asyncio.current_task()
+        self.__handlers.add(handler)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    writer.write(self.__response(400, {"error": "bad request"}, False))
+                    break
+                method, target, version = parts
+                keep_alive = (
+                    version == "HTTP/1.1"
+                    and headers.get("connection", "").lower() != "close"
+                )
+                if method not in ("GET", "HEAD"):
+                    status, body = 405, {"error": "method not allowed"}
+                else:
+                    status, body = await self.__route(target)
+                response = self.__response(status, body, keep_alive)
+                if method == "HEAD":
+                    response = response[: response.index(b"\r\n\r\n") + 4]
+                writer.write(response)
+                self.requests += 1
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            self.__handlers.discard(handler)
+
+    @staticmethod
+    def __response(status, body, keep_alive):
+        reasons = {
+            200: "OK",
+            400: "Bad Request",
+            404: "Not Found",
+            405: "Method Not Allowed",
+            503: "Service Unavailable",
+        }
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        return (
+            f"HTTP/1.1 {status} {reasons[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        ).encode() + body
+
+    async def __route(self, target):
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        snapshot = self.snapshot
+        if path == "/health":
+            age = None if snapshot is None else time.time() - snapshot.published_at
+            return 200, {
+                "status": "ok",
+                "sequence": None if snapshot is None else snapshot.sequence,
+                "snapshot_age": age,
+            }
+        if path not in ("/", "/occupancy", "/lot", "/utilization") and not (
+            path.startswith("/spots/")
+        ):
+            return 404, {"error": f"unknown path {url.path}"}
+        if snapshot is None:
+            return 503, {"error": "no frame processed yet"}
+
+        if path in ("/", "/occupancy"):
+            return 200, snapshot.body("occupancy")
+        if path == "/lot":
+            return 200, snapshot.body("lot")
+        if path.startswith("/spots/"):
+            spot = snapshot.spot(path[len("/spots/") :])
+            if spot is None:
+                return 404, {"error": f"unknown parking spot {path[len('/spots/'):]}"}
+            return 200, spot
+        return await self.__utilization(parse_qs(url.query), snapshot)
+
+    async def __utilization(self, query, snapshot):
+        if self.history is None:
+            return 404, {"error": "no occupancy history attached"}
+        try:
+            end = float(query["end"][0]) if "end" in query else snapshot.timestamp
+            start = float(query["start"][0]) if "start" in query else end - 3600
+            spot_ids = None
+            if "spots" in query:
+                index = {str(spot_id): spot_id for spot_id in snapshot.spot_ids}
+                spot_ids = [index[value] for value in query["spots"][0].split(",")]
+        except (ValueError, KeyError) as error:
+            return 400, {"error": f"bad query: {error}"}
+        report = await asyncio.get_running_loop().run_in_executor(
+            None, self.history.utilization, start, end, spot_ids
+        )
+        return 200, {
+            "lot_id": self.lot_id,
+            "start": start,
+            "end": end,
+            **{key: _json_value(value) for key, value in report.items()},
+        }
@@ -0,0 +1,116 @@
+import numpy as np
+
+
+class OccupancySmoother:
+    """
+    A class that debounces per-spot occupancy with N-of-M voting and time hysteresis.
+
+    The last window observations of every spot are kept in one boolean ring
+    buffer of shape (window, spots). A spot turns occupied once at least votes of
+    them are occupied, and free once at least votes of them are free; in between it
+    keeps its state, so votes above half the window leave a dead band in which
+    flickering detections change nothing. With min_hold, a spot must also have
+    kept its state for that many seconds before it may change again.
+
+    Attributes
+    ----------
+    spot_ids : numpy.ndarray
+        The id of each parking spot.
+    window : int
+        The number of recent observations kept per spot (M).
+    votes : int
+        The number of agreeing observations needed to change state (N).
+    min_hold : float
+        The number of seconds a spot keeps a state before it may change again.
+    state : numpy.ndarray
+        The debounced occupancy of each spot.
+
+    Methods
+    -------
+    update(observed, timestamp, spot_indices=None)
+        Adds one observation and returns the debounced transitions it caused.
+    """
+
+    def __init__(self, spot_ids, window=5, votes=4, min_hold=0.0):
+        """
+        Parameters
+        ----------
+        spot_ids : array_like
+            The id of each parking spot, in the order of the parking coordinates.
+        window : int, optional
+            The number of recent observations kept per spot (M). The default is 5.
+        votes : int, optional
+            The number of agreeing observations needed to change state (N), more than
+            half the window. The default is 4.
+        min_hold : float, optional
+            The number of seconds a spot keeps a state before it may change again.
+            The default is 0.
+        """
+        if not window / 2 < votes <= window:
+            raise ValueError(
+                f"votes must be more than half of {window} and at most {window}, got {votes}"
+            )
+
+        self.spot_ids = np.asarray(spot_ids)
+        self.window = window
+        self.votes = votes
+        self.min_hold = min_hold
+        num_spots = len(self.spot_ids)
+        self.state = np.zeros(num_spots, dtype=bool)
+        self.__history = np.zeros((window, num_spots), dtype=bool)
+        self.__observed = np.zeros(num_spots, dtype=bool)
+        self.__occupied_votes = np.zeros(num_spots, dtype=np.int16)
+        self.__position = 0
+        self.__count = 0
+        self.__changed_at = np.full(num_spots, -np.inf)
+
+    def update(self, observed, timestamp, spot_indices=None):
+        """
+        Adds one observation and returns the debounced transitions it caused.
+
+        Parameters
+        ----------
+        observed : array_like
+            The raw occupancy of the observed spots.
+        timestamp : float
+            The time of the observation, in seconds.
+        spot_indices : array_like, optional
+            The indices of the observed spots. Spots left out repeat their last
+            observation. All spots are observed if omitted.
+
+        Returns
+        -------
+        list
+            One (spot id, old state, new state, timestamp) tuple per spot that changed state.
+        """
+        if spot_indices is None:
+            self.__observed[:] = observed
+        else:
+            self.__observed[spot_indices] = observed
+
+        # Keep a running count of occupied votes instead of summing the window.
+        if self.__count == self.window:
+            self.__occupied_votes -= self.__history[self.__position]
+        else:
+            self.__count += 1
+        self.__history[self.__position] = self.__observed
+        self.__occupied_votes += self.__observed
+        self.__position = (self.__position + 1) % self.window
+
+        free_votes = self.__count - self.__occupied_votes
+        target = np.where(
+            self.__occupied_votes >= self.votes,
+            True,
+            np.where(free_votes >= self.votes, False, self.state),
+        )
+        changed = target != self.state
+        if self.min_hold > 0:
+            changed &= timestamp - self.__changed_at >= self.min_hold
+
+        changed_indices = np.flatnonzero(changed)
+        self.state[changed_indices] = target[changed_indices]
+        self.__changed_at[changed_indices] = timestamp
+        return [
+            (self.spot_ids[i].item(), not self.state[i], bool(self.state[i]), timestamp)
+            for i in changed_indices
+        ]
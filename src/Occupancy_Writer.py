@@ -0,0 +1,178 @@
+import csv
+import json
+import os
+
+
+class OccupancyWriter:
+    """
+    A base class for writers that stream per-frame occupancy records to a file.
+
+    Every processed frame produces one record per parking spot with the fields
+    listed in FIELDS.
+
+    Methods
+    -------
+    write_frame(frame_index, timestamp, parking_coordinates, total_occupied)
+        Writes the occupancy records of one frame.
+    write_records(records)
+        Writes a list of record dictionaries.
+    close()
+        Flushes and closes the output file.
+    """
+
+    FIELDS = ("timestamp", "frame_index", "spot_id", "is_occupied", "total_occupied")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_frame(self, frame_index, timestamp, parking_coordinates, total_occupied):
+        """
+        Writes the occupancy records of one frame.
+
+        Parameters
+        ----------
+        frame_index : int
+            The index of the frame in the video.
+        timestamp : float
+            The position of the frame in the video, in seconds.
+        parking_coordinates : list
+            The list of parking spot dictionaries with their is_occupied flags.
+        total_occupied : int
+            The number of occupied parking spots in the frame.
+        """
+        self.write_records(
+            [
+                {
+                    "timestamp": timestamp,
+                    "frame_index": frame_index,
+                    "spot_id": spot["id"],
+                    "is_occupied": bool(spot["is_occupied"]),
+                    "total_occupied": total_occupied,
+                }
+                for spot in parking_coordinates
+            ]
+        )
+
+    def write_records(self, records):
+        """
+        Writes a list of record dictionaries.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Flushes and closes the output file.
+        """
+        raise NotImplementedError
+
+
+class JsonLinesOccupancyWriter(OccupancyWriter):
+    """
+    Writes one JSON object per record and line.
+    """
+
+    def __init__(self, path):
+        self.output = open(path, "w")
+
+    def write_records(self, records):
+        self.output.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def close(self):
+        self.output.close()
+
+
+class CsvOccupancyWriter(OccupancyWriter):
+    """
+    Writes the records as CSV rows under a header line.
+    """
+
+    def __init__(self, path):
+        self.output = open(path, "w", newline="")
+        self.writer = csv.DictWriter(self.output, fieldnames=OccupancyWriter.FIELDS)
+        self.writer.writeheader()
+
+    def write_records(self, records):
+        self.writer.writerows(records)
+
+    def close(self):
+        self.output.close()
+
+
+class ParquetOccupancyWriter(OccupancyWriter):
+    """
+    Writes the records to a Parquet file, one row group per rows_per_group records.
+
+    Requires the optional pyarrow package.
+    """
+
+    def __init__(self, path, rows_per_group=65536):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError(
+                "Writing Parquet output requires the pyarrow package"
+            ) from error
+
+        self.pa = pa
+        self.schema = pa.schema(
+            [
+                ("timestamp", pa.float64()),
+                ("frame_index", pa.int64()),
+                ("spot_id", pa.int64()),
+                ("is_occupied", pa.bool_()),
+                ("total_occupied", pa.int64()),
+            ]
+        )
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.rows_per_group = rows_per_group
+        self.columns = {field: [] for field in OccupancyWriter.FIELDS}
+
+    def write_records(self, records):
+        for record in records:
+            for field in OccupancyWriter.FIELDS:
+                self.columns[field].append(record[field])
+        if len(self.columns["spot_id"]) >= self.rows_per_group:
+            self.__flush()
+
+    def __flush(self):
+        if self.columns["spot_id"]:
+            table = self.pa.Table.from_pydict(self.columns, schema=self.schema)
+            self.writer.write_table(table)
+            self.columns = {field: [] for field in OccupancyWriter.FIELDS}
+
+    def close(self):
+        self.__flush()
+        self.writer.close()
+
+
+OUTPUT_FORMATS = {
+    "jsonl": JsonLinesOccupancyWriter,
+    "csv": CsvOccupancyWriter,
+    "parquet": ParquetOccupancyWriter,
+}
+
+
+def open_occupancy_writer(path, output_format=None):
+    """
+    Opens an occupancy writer for the given path.
+
+    Args:
+        path (str): The path of the output file.
+        output_format (str, optional): One of "jsonl", "csv" or "parquet". Guessed from
+            the file extension when omitted.
+
+    Returns:
+        OccupancyWriter: The writer for the requested format.
+    """
+    if output_format is None:
+        extension = os.path.splitext(path)[1].lower().lstrip(".")
+        output_format = {"json": "jsonl", "ndjson": "jsonl", "pq": "parquet"}.get(
+            extension, extension
+        )
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+    return OUTPUT_FORMATS[output_format](path)
@@ -1,10 +1,19 @@
 import cv2
-from shapely.geometry import Point, Polygon
+import numpy as np
 from Coordinate_Generator import CoordinateGenerator
 from Car_Detector import CarDetector
-from util.utils import draw_rectangles
+from Occupancy_Engine import OccupancyEngine, SpotLabelMask
+from Frame_Pipeline import FramePipeline
+from Inference_Scheduler import InferenceScheduler
+from Spot_Change_Detector import SpotChangeDetector
+from Occupancy_Smoother import OccupancySmoother
+from Vehicle_Tracker import SpotDwellTimer, VehicleTracker
+from Spot_Overlay import SpotOverlay
+from Live_Capture import LiveCapture
+from util.transform import AffineTransform
 from util.colors import COLOR_WHITE, COLOR_RED
 import time
+from contextlib import nullcontext
 
 
 class ParkingSpaceDetector:
@@ -18,9 +27,43 @@ class ParkingSpaceDetector:
     - parking_coordinates (list): A list of dictionaries containing the coordinates of each parking spot.
     - car_detected_coordinates (list): A list of dictionaries containing the coordinates of each detected car.
     - car_detector (CarDetector): An instance of the CarDetector class used to detect cars in the video.
+    - draw_cars (bool): A flag indicating whether the detected cars are drawn on the displayed and written frames.
+    - batch_size (int): The number of frames passed to the car detector in one inference call.
+    - frame_delay (float): The number of seconds to wait before reading each frame in sequential mode.
+    - pipelined (bool): A flag indicating whether decode, inference and rendering run as separate pipeline stages.
+    - pipeline (FramePipeline): The pipeline of the last pipelined run, holding its per-stage statistics.
+    - scheduler (InferenceScheduler | None): Decides on which frames detection runs; None runs it on every frame.
+    - incremental (bool): A flag indicating whether only the parking spots whose image changed are re-evaluated.
+    - change_detector (SpotChangeDetector | None): Finds the changed parking spots in incremental mode.
+    - smoother (OccupancySmoother | None): Debounces the per-spot occupancy; None uses the raw detections.
+    - on_transition (callable | None): Called with each debounced (spot id, old state, new state, timestamp) transition.
+    - event_publisher (OccupancyEventPublisher | None): Publishes the occupancy changes of every processed frame.
+    - occupancy_mode (str): "polygon" to test points against the spot polygons, or "mask" to look them up in a cached label image.
+    - occupancy_engine (OccupancyEngine | SpotLabelMask): The classifier built from the parking coordinates.
+    - frame_size (tuple | None): The (width, height) working resolution of the parking spots and the display; None keeps the source resolution.
+    - source_size (tuple | None): The (width, height) of the video frames, known once the parking coordinates are set.
+    - transform (AffineTransform): Maps the cars detected on a source frame to the working resolution.
+    - tracker (VehicleTracker | None): Links the detected cars across frames; None uses the raw detections of each frame.
+    - dwell_timer (SpotDwellTimer | None): Measures how long the same tracked car has been in each parking spot, when tracking.
+    - profiler (Profiler | None): Records the latency of each processing stage, the frame rate and the dropped frames.
+    - spot_overlay (SpotOverlay | None): The cached outlines of the parking spots, built on the first drawn frame.
+    - video_output (AnnotatedVideoWriter | None): Encodes the annotated frames to a video file on a background thread.
+    - snapshot_writer (SpotSnapshotWriter | None): Saves a JPEG crop of every parking spot whose occupancy changed.
+    - live (bool): A flag indicating whether video_path is a live stream, read through a LiveCapture that keeps only the latest frame.
+    - loop (bool): A flag indicating whether a live video file starts over at its end.
+    - history (OccupancyHistory | None): Records the occupancy of every processed frame into minute and hour rollups.
+    - query_service (OccupancyService | None): Serves the occupancy of the latest processed frame over HTTP.
+    - clock_offset (float): The wall clock time, in seconds since the epoch, of frame timestamp 0. Set when a headless run opens its video, so the history, the events and the query service get wall clock times and successive runs line up.
+
+    Frames are read and inferred at their source resolution, and the car detector
+    resizes them only once, to its inference size. A source frame is resized to the
+    working resolution only where pixels are needed there: for display and for the
+    change detector of incremental mode.
     """
 
     KEY_QUIT = ord("q")
+    FRAME_SIZE = (1355, 700)
+    OCCUPANCY_MODES = ("polygon", "mask")
 
     def __init__(
         self,
@@ -28,6 +71,37 @@ class ParkingSpaceDetector:
         path_to_coordinate_data,
         update_coordinate=True,
         draw_cars=True,
+        occupancy_mode="polygon",
+        batch_size=1,
+        device=None,
+        frame_delay=0.1,
+        pipelined=False,
+        queue_size=4,
+        drop_oldest=False,
+        infer_every=None,
+        motion_threshold=None,
+        incremental=False,
+        change_threshold=12.0,
+        car_detector=None,
+        model_size="x",
+        backend="torch",
+        smoothing_window=1,
+        smoothing_votes=None,
+        min_hold=0.0,
+        on_transition=None,
+        event_publisher=None,
+        frame_size=FRAME_SIZE,
+        inference_size=None,
+        track=False,
+        track_iou=0.3,
+        track_max_age=2.0,
+        profiler=None,
+        video_output=None,
+        snapshot_writer=None,
+        live=False,
+        loop=False,
+        history=None,
+        query_service=None,
     ):
         """
         Initializes a new instance of the ParkingSpaceDetector class.
@@ -37,59 +111,621 @@ class ParkingSpaceDetector:
         - path_to_coordinate_data (str): The path to the coordinate data file.
         - update_coordinate (bool): A flag indicating whether to update the coordinate data file with new parking space coordinates.
         - draw_cars (bool): A flag indicating whether to draw bounding boxes around detected cars.
+        - occupancy_mode (str): "polygon" for the vectorized polygon test, or "mask" for the cached spot-ID label image.
+        - batch_size (int): The number of frames queued and passed to the car detector in one inference call.
+        - device (str | int | None): The inference device, e.g. "cpu" or 0. None lets ultralytics pick one.
+        - frame_delay (float): The number of seconds to wait before reading each frame in sequential mode.
+        - pipelined (bool): A flag indicating whether to run decode, inference and rendering as separate pipeline stages.
+        - queue_size (int): The capacity of each queue between pipeline stages.
+        - drop_oldest (bool): A flag indicating whether the pipeline drops the oldest decoded frame when inference falls behind, for live sources.
+        - infer_every (int | None): Run detection at least every this many frames and carry occupancy forward in between. None or 0 sets no such cap.
+        - motion_threshold (float | None): Also run detection when this share of the parking spot pixels changed since the last inference.
+        - incremental (bool): A flag indicating whether to re-evaluate only the parking spots whose image changed, detecting cars on the cropped union of those spots.
+        - change_threshold (float): The change in gray level mean or deviation that marks a parking spot as changed in incremental mode.
+        - car_detector (CarDetector | None): A car detector shared with other instances. A new one is created if None.
+        - model_size (str): The YOLOv8 model size of a new car detector, one of "n", "s", "m", "l" or "x".
+        - backend (str): The detector backend of a new car detector: "torch", "onnx" or "openvino".
+        - smoothing_window (int): The number of recent observations kept per parking spot for N-of-M voting (M).
+        - smoothing_votes (int | None): The number of agreeing observations a parking spot needs to change state (N). Defaults to a simple majority of the window.
+        - min_hold (float): The number of seconds a parking spot keeps a state before it may change again.
+        - on_transition (callable | None): Called with each debounced (spot id, old state, new state, timestamp) transition.
+        - event_publisher (OccupancyEventPublisher | None): Publishes the occupancy changes of every processed frame.
+        - frame_size (tuple | None): The (width, height) working resolution of the parking spots and the display. None keeps the source resolution.
+        - inference_size (int | None): The side of the square model input of a new car detector. None keeps the model default.
+        - track (bool): A flag indicating whether to compute occupancy from tracked cars with persistent ids, extrapolated on frames without detection.
+        - track_iou (float): The smallest intersection over union matching a detection to a track.
+        - track_max_age (float): The number of seconds a track survives without a matching detection.
+        - profiler (Profiler | None): Records the latency of each processing stage, the frame rate and the dropped frames.
+        - video_output (AnnotatedVideoWriter | None): Encodes the annotated frames to a video file on a background thread, also in headless mode.
+        - snapshot_writer (SpotSnapshotWriter | None): Saves a JPEG crop of every parking spot whose occupancy changed.
+        - live (bool): A flag indicating whether video_path is a live stream (an RTSP or HTTP URL, a device index, or a video file played in real time), read on a grabber thread that keeps only the latest frame and reconnects after failures.
+        - loop (bool): A flag indicating whether a live video file starts over at its end, to stand in for a camera.
+        - history (OccupancyHistory | None): Records the occupancy of every processed frame into minute and hour rollups.
+        - query_service (OccupancyService | None): Serves the occupancy of the latest processed frame over HTTP, from a snapshot swapped in after each frame.
         """
+        if occupancy_mode not in ParkingSpaceDetector.OCCUPANCY_MODES:
+            raise ValueError(f"Unknown occupancy mode: {occupancy_mode}")
+        if batch_size < 1:
+            raise ValueError(f"Batch size must be at least 1, got {batch_size}")
+        if track and incremental:
+            raise ValueError(
+                "Tracking needs full-frame detections and cannot be incremental"
+            )
+
         self.video_path = video_path
         self.path_to_data = path_to_coordinate_data
         self.is_generated = False
         self.parking_coordinates = None
         self.car_detected_coordinates = None
-        self.car_detector = CarDetector(draw_cars=draw_cars)
+        # Cars are drawn after the spot snapshots are cropped, not by the detector.
+        self.draw_cars = draw_cars
+        if car_detector is None:
+            car_detector = CarDetector(
+                draw_cars=False,
+                device=device,
+                model_size=model_size,
+                backend=backend,
+                inference_size=inference_size,
+            )
+        self.car_detector = car_detector
+        self.batch_size = batch_size
+        self.frame_delay = frame_delay
+        self.pipelined = pipelined
+        self.queue_size = queue_size
+        self.drop_oldest = drop_oldest
+        self.pipeline = None
+        self.scheduler = None
+        if (infer_every and infer_every != 1) or motion_threshold is not None:
+            self.scheduler = InferenceScheduler(infer_every, motion_threshold)
+        self.incremental = incremental
+        self.change_threshold = change_threshold
+        self.change_detector = None
+        self.smoothing_window = smoothing_window
+        if smoothing_votes is None:
+            smoothing_votes = smoothing_window // 2 + 1
+        self.smoothing_votes = smoothing_votes
+        self.min_hold = min_hold
+        self.smoother = None
+        self.on_transition = on_transition
+        self.event_publisher = event_publisher
+        self.occupancy_mode = occupancy_mode
+        self.occupancy_engine = None
         self.update_coordinate = update_coordinate
+        self.frame_size = None if frame_size is None else tuple(frame_size)
+        self.source_size = None
+        self.transform = AffineTransform()
+        self.tracker = None
+        if track:
+            self.tracker = VehicleTracker(
+                iou_threshold=track_iou, max_age=track_max_age
+            )
+        self.dwell_timer = None
+        self.profiler = profiler
+        self.spot_overlay = None
+        self.__legend_sizes = {}
+        self.video_output = video_output
+        self.snapshot_writer = snapshot_writer
+        self.live = live
+        self.loop = loop
+        self.history = history
+        self.query_service = query_service
+        self.clock_offset = 0.0
+        self.__reported_capture_drops = 0
 
     def check_parking_spot_occupied(self):
         """
         Checks whether each parking spot in the video is occupied and displays the result in a window.
+
+        In sequential mode frames are queued until batch_size of them are available,
+        inferred together and then displayed one by one in their original order. In
+        pipelined mode decoding and inference run on their own threads, connected to
+        the display loop by bounded queues.
+        """
+        video = self.open_video()
+        self.__start_outputs(video)
+        frame = self.read_frame(video)
+        if frame is not None:
+            if not self.is_generated:
+                self.generate_parking_coordinates(frame)
+            cv2.namedWindow("Parking Space Detector")
+            if self.pipelined:
+                self.__run_pipelined(video, frame)
+            else:
+                self.__run_sequential(video, frame)
+        video.release()
+        cv2.destroyAllWindows()
+
+    def open_video(self):
+        """
+        Opens the video source, through a LiveCapture in live mode.
+
+        Returns:
+        - video (cv2.VideoCapture | LiveCapture): The opened video source.
         """
-        video = cv2.VideoCapture(self.video_path)
-        total_occupied = 0
-        total_spaces = 0
+        if self.live:
+            return LiveCapture(self.video_path, loop=self.loop)
+        return cv2.VideoCapture(self.video_path)
+
+    def read_frame(self, video):
+        """
+        Reads the next frame of the video at its source resolution.
+
+        Args:
+        - video (cv2.VideoCapture): The video to read from.
 
-        for i in range((int(video.get(cv2.CAP_PROP_FRAME_COUNT)))):
-            time.sleep(0.1)
+        Returns:
+        - frame (numpy.ndarray | None): The frame, or None when no frame could be read.
+        """
+        with self.__stage("decode"):
             ret, frame = video.read()
-            frame = cv2.resize(frame, (1355, 700))
-            if ret:
+        if self.profiler is not None and isinstance(video, LiveCapture):
+            self.profiler.add_dropped(video.dropped - self.__reported_capture_drops)
+            self.__reported_capture_drops = video.dropped
+        if not ret:
+            return None
+        return frame
+
+    def working_frame(self, frame):
+        """
+        Returns the frame at the working resolution, resizing it only when its size differs.
+
+        Args:
+        - frame (numpy.ndarray): A frame at the source resolution.
+
+        Returns:
+        - frame (numpy.ndarray): The frame at the working resolution.
+        """
+        height, width = frame.shape[:2]
+        if self.frame_size is None or self.frame_size == (width, height):
+            return frame
+        with self.__stage("resize"):
+            return cv2.resize(frame, self.frame_size)
+
+    def __start_outputs(self, video):
+        if self.video_output is not None and self.video_output.fps is None:
+            self.video_output.fps = video.get(cv2.CAP_PROP_FPS) or None
+
+    def __capture_snapshots(self, frame):
+        if self.snapshot_writer is not None:
+            with self.__stage("snapshot"):
+                self.snapshot_writer.capture(frame, self.parking_coordinates)
+
+    def __write_annotated(self, frame):
+        if self.video_output is not None:
+            with self.__stage("video_output"):
+                self.video_output.write(frame)
+
+    def __draw_cars(self, frame, cars):
+        if self.draw_cars and cars:
+            with self.__stage("draw_cars"):
+                for car in cars:
+                    self.car_detector.draw_car_detected(car, frame)
+
+    def __write_headless_outputs(self, frame, cars, total_occupied):
+        if self.snapshot_writer is None and self.video_output is None:
+            return
+        frame = self.working_frame(frame)
+        self.__capture_snapshots(frame)
+        if self.video_output is not None:
+            self.__draw_cars(frame, cars)
+            with self.__stage("draw_spots"):
+                self.draw_parking_spots(frame)
+            with self.__stage("draw_legend"):
+                self.draw_legend(frame, total_occupied, len(self.parking_coordinates))
+            self.__write_annotated(frame)
+
+    def __stage(self, name, count=1):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(name, count)
+
+    def __frame_done(self):
+        if self.profiler is not None:
+            self.profiler.add_frames()
+            self.profiler.tick()
+
+    def __run_sequential(self, video, frame):
+        batch = []
+        while frame is not None:
+            batch.append(frame)
+            if len(batch) == self.batch_size:
+                is_quit = self.show_batch(batch)
+                batch = []
+                if is_quit:
+                    return
+
+            if not self.live:
+                time.sleep(self.frame_delay)
+            frame = self.read_frame(video)
+
+        if batch:
+            self.show_batch(batch)
+
+    def __run_pipelined(self, video, first_frame):
+        pending = [first_frame]
+        reported_drops = 0
+
+        def read_frame():
+            if pending:
+                return pending.pop()
+            return self.read_frame(video)
+
+        def render(frame, detection):
+            nonlocal reported_drops
+            if self.profiler is not None:
+                dropped = self.pipeline.decode_queue.dropped
+                self.profiler.add_dropped(dropped - reported_drops)
+                reported_drops = dropped
+            keep_going = not self.show_frame(frame, *detection)
+            if not keep_going and isinstance(video, LiveCapture):
+                # Wakes the decode stage if it waits in read() for the next frame.
+                video.release()
+            return keep_going
+
+        self.pipeline = FramePipeline(
+            read_frame,
+            self.detect_frames,
+            render,
+            queue_size=self.queue_size,
+            batch_size=self.batch_size,
+            drop_oldest=self.drop_oldest,
+        )
+        self.pipeline.run()
+
+    def process_headless(self, writer):
+        """
+        Processes the whole video without any window and streams the occupancy of every frame.
+
+        The parking coordinates are loaded from the coordinate data file, which must
+        already exist. Frames are inferred in batches of batch_size. Frames are only
+        drawn on when they are written to the video output.
+
+        Args:
+        - writer (OccupancyWriter): The writer receiving the per-frame occupancy records.
+
+        Returns:
+        - num_frames (int): The number of processed frames.
+        """
+        video = self.open_video()
+        # Frame timestamps count from the start of the video, or of the live capture.
+        self.clock_offset = time.time()
+        self.__start_outputs(video)
+        num_frames = 0
+        batch = []
+
+        while True:
+            frame = self.read_frame(video)
+            timestamp = video.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            if frame is not None:
                 if not self.is_generated:
-                    self.generate_parking_coordinates(frame)
+                    self.load_parking_coordinates(frame)
+                batch.append((num_frames, timestamp, frame))
+                num_frames += 1
+
+            if batch and (frame is None or len(batch) == self.batch_size):
+                frames = [item[2] for item in batch]
+                detections = self.detect_frames(frames)
+                for (frame_index, frame_timestamp, source), (cars, spot_indices) in zip(
+                    batch, detections
+                ):
+                    total_occupied = self.update_occupancy(
+                        cars, spot_indices, frame_timestamp
+                    )
+                    self.__write_headless_outputs(source, cars, total_occupied)
+                    with self.__stage("write"):
+                        writer.write_frame(
+                            frame_index,
+                            frame_timestamp,
+                            self.parking_coordinates,
+                            total_occupied,
+                        )
+                    self.__frame_done()
+                batch = []
+
+            if frame is None:
+                break
+
+        video.release()
+        return num_frames
+
+    def pipeline_stats(self):
+        """
+        Returns the per-stage latency and queue depth of the last pipelined run.
+
+        Returns:
+        - stats (dict | None): The pipeline statistics, or None if no pipelined run happened.
+        """
+        if self.pipeline is None:
+            return None
+        return self.pipeline.stats()
+
+    def detect_frames(self, frames):
+        """
+        Detects cars in a batch of frames with one inference call.
+
+        Frames the scheduler skips are not inferred. In incremental mode only the
+        cropped union of the changed parking spots of each frame is inferred, and
+        frames without any changed spot are skipped as well. The detected cars are
+        mapped to the working resolution with a single affine transform, crop offset
+        included.
 
-                self.detect_cars(frame)
+        Args:
+        - frames (list): The frames to process at their source resolution, in video order.
+
+        Returns:
+        - detections (list): One (cars, spot_indices) pair per frame. cars is None when the previous occupancy is kept, and spot_indices is None when every parking spot has to be re-evaluated.
+        """
+        if self.scheduler is None and self.change_detector is None:
+            jobs = [(frame, self.transform, None) for frame in frames]
+        else:
+            with self.__stage("gating", len(frames)):
+                jobs = self.__detection_jobs(frames)
+
+        inferred = [job[0] for job in jobs if job is not None]
+        if inferred:
+            with self.__stage("detect", len(inferred)):
+                detections = self.car_detector.detect_batch(inferred)
+        else:
+            detections = []
+
+        detections = iter(detections)
+        results = []
+        for job in jobs:
+            if job is None:
+                results.append((None, None))
+                continue
+            _, transform, spot_indices = job
+            cars = next(detections)
+            if not transform.is_identity:
+                cars = [transform.apply_car(car) for car in cars]
+            results.append((cars, spot_indices))
+        return results
+
+    def __detection_jobs(self, frames):
+        jobs = []
+        for frame in frames:
+            if self.scheduler is not None and not self.scheduler.should_infer(frame):
+                jobs.append(None)
+            elif self.change_detector is None:
+                jobs.append((frame, self.transform, None))
+            else:
+                dirty = np.flatnonzero(
+                    self.change_detector.dirty_spots(self.working_frame(frame))
+                )
+                if len(dirty) == 0:
+                    jobs.append(None)
+                    continue
+                self.change_detector.update_reference(dirty)
+                x_1, y_1, x_2, y_2 = self.__source_region(
+                    self.change_detector.dirty_region(dirty)
+                )
+                jobs.append(
+                    (
+                        frame[y_1:y_2, x_1:x_2],
+                        AffineTransform.translation(x_1, y_1).then(self.transform),
+                        dirty,
+                    )
+                )
+        return jobs
+
+    def __source_region(self, region):
+        if self.transform.is_identity:
+            return region
+        width, height = self.source_size
+        x_1, y_1, x_2, y_2 = self.transform.inverse().apply_box(*region)
+        return max(x_1, 0), max(y_1, 0), min(x_2, width), min(y_2, height)
 
-                if self.is_generated:
-                    cv2.namedWindow("Parking Space Detector")
+    def update_occupancy(self, cars, spot_indices=None, timestamp=None):
+        """
+        Updates the parking spots from the cars detected in a frame.
+
+        With tracking enabled, the detections are first linked to the vehicle
+        tracks, and a frame without detections uses the tracks extrapolated to it
+        instead of the previous occupancy. With smoothing enabled, the raw occupancy
+        is fed to the smoother, the parking spots take its debounced state, and every
+        debounced transition is passed to on_transition. The resulting occupancy is
+        then recorded in the history, its changes go to the event publisher, and
+        it is published to the query service, all with the wall clock time of the
+        frame: timestamp plus clock_offset. Frames on which detection did not run
+        keep the previous occupancy, which is recorded and published all the same,
+        so a held state counts in the history for as long as it lasts.
+
+        Args:
+        - cars (list | None): The cars detected in the frame, or None when detection did not run on it.
+        - spot_indices (numpy.ndarray | None): The indices of the parking spots to re-evaluate, or None for all of them.
+        - timestamp (float | None): The time of the frame in seconds, counted from clock_offset. Defaults to the current time.
 
-                if self.car_detected_coordinates is not None:
-                    total_spaces = len(self.parking_coordinates)
-                    total_occupied = self.set_parking_spots_occupied()
-                    self.draw_parking_spots(frame)
-                    self.draw_legend(frame, total_occupied, total_spaces)
-                cv2.imshow("Parking Space Detector", frame)
+        Returns:
+        - total_occupied (int): The total number of occupied parking spots.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+            clock_time = timestamp
+        else:
+            clock_time = timestamp + self.clock_offset
+        if cars is None and self.tracker is None:
+            spots = self.parking_coordinates
+            total_occupied = sum(spot["is_occupied"] for spot in spots)
+        else:
+            total_occupied = self.__apply_detections(cars, spot_indices, timestamp)
 
+        if self.history is not None:
+            with self.__stage("history"):
+                self.history.record(self.parking_coordinates, clock_time)
+        if self.event_publisher is not None:
+            with self.__stage("events"):
+                self.event_publisher.publish(self.parking_coordinates, clock_time)
+        if self.query_service is not None:
+            with self.__stage("publish"):
+                self.query_service.publish(self.parking_coordinates, clock_time)
+        return total_occupied
+
+    def __apply_detections(self, cars, spot_indices, timestamp):
+        if self.tracker is not None:
+            with self.__stage("track"):
+                if cars is None:
+                    cars = self.tracker.predict(timestamp)
+                else:
+                    cars = self.tracker.update(cars, timestamp)
+        self.car_detected_coordinates = cars
+        with self.__stage("occupancy"):
+            total_occupied = self.set_parking_spots_occupied(spot_indices)
+        if self.dwell_timer is not None:
+            self.__update_dwell(timestamp)
+
+        if self.smoother is not None:
+            indices = spot_indices
+            if indices is None:
+                indices = range(len(self.parking_coordinates))
+            observed = [self.parking_coordinates[i]["is_occupied"] for i in indices]
+            transitions = self.smoother.update(observed, timestamp, spot_indices)
+            for spot, is_occupied in zip(self.parking_coordinates, self.smoother.state):
+                spot["is_occupied"] = bool(is_occupied)
+            if self.on_transition is not None:
+                for transition in transitions:
+                    self.on_transition(transition)
+            total_occupied = int(self.smoother.state.sum())
+        return total_occupied
+
+    def __update_dwell(self, timestamp):
+        cars = self.car_detected_coordinates
+        car_tracks = np.array([car["track_id"] for car in cars], dtype=np.int64)
+        spots = self.occupancy_engine.spot_indices([car["low_center"] for car in cars])
+        # Where several tracks share a spot, the oldest one is assigned last and keeps it.
+        order = np.argsort(-car_tracks)
+        order = order[spots[order] != OccupancyEngine.NO_SPOT]
+        track_ids = np.full(
+            len(self.parking_coordinates), SpotDwellTimer.NO_TRACK, dtype=np.int64
+        )
+        track_ids[spots[order]] = car_tracks[order]
+        self.dwell_timer.update(track_ids, timestamp)
+        for spot, track_id in zip(self.parking_coordinates, self.dwell_timer.track_ids):
+            if track_id == SpotDwellTimer.NO_TRACK:
+                spot["track_id"] = None
+            else:
+                spot["track_id"] = int(track_id)
+
+    def dwell_times(self, timestamp=None):
+        """
+        Returns how long the same tracked car has been in each parking spot.
+
+        Args:
+        - timestamp (float | None): The current time in seconds. Defaults to the current time.
+
+        Returns:
+        - dwell_times (dict): The number of seconds per parking spot id, 0 for an empty spot. Empty if tracking is disabled.
+        """
+        if self.dwell_timer is None:
+            return {}
+        if timestamp is None:
+            timestamp = time.time()
+        return {
+            spot["id"]: float(dwell)
+            for spot, dwell in zip(
+                self.parking_coordinates, self.dwell_timer.dwell_times(timestamp)
+            )
+        }
+
+    def show_batch(self, frames):
+        """
+        Detects cars in a batch of frames and displays each annotated frame in order.
+
+        Args:
+        - frames (list): The frames of the batch, in video order.
+
+        Returns:
+        - is_quit (bool): True if the user asked to quit while the batch was displayed.
+        """
+        for frame, (cars, spot_indices) in zip(frames, self.detect_frames(frames)):
+            if self.show_frame(frame, cars, spot_indices):
+                return True
+        return False
+
+    def show_frame(self, frame, cars, spot_indices=None):
+        """
+        Updates the parking spots from the cars detected in a frame and displays the annotated frame.
+
+        Args:
+        - frame (numpy.ndarray): The current frame of the video, at its source resolution.
+        - cars (list | None): The cars detected in the frame, or None to keep the previous occupancy.
+        - spot_indices (numpy.ndarray | None): The indices of the parking spots to re-evaluate, or None for all of them.
+
+        Returns:
+        - is_quit (bool): True if the user asked to quit.
+        """
+        frame = self.working_frame(frame)
+        total_spaces = len(self.parking_coordinates)
+        total_occupied = self.update_occupancy(cars, spot_indices)
+        self.__capture_snapshots(frame)
+        self.__draw_cars(frame, cars)
+        with self.__stage("draw_spots"):
+            self.draw_parking_spots(frame)
+        with self.__stage("draw_legend"):
+            self.draw_legend(frame, total_occupied, total_spaces)
+        self.__write_annotated(frame)
+        with self.__stage("display"):
+            cv2.imshow("Parking Space Detector", frame)
             k = cv2.waitKey(1) & 0xFF
-            if k == ParkingSpaceDetector.KEY_QUIT:
-                break
-        cv2.destroyAllWindows()
+        self.__frame_done()
+        return k == ParkingSpaceDetector.KEY_QUIT
 
     def generate_parking_coordinates(self, frame):
         """
         Generates the coordinates of each parking spot in the video.
 
         Args:
-        - frame (numpy.ndarray): The current frame of the video.
+        - frame (numpy.ndarray): The current frame of the video, at its source resolution.
         """
 
-        coordinate = CoordinateGenerator(frame, self.path_to_data)
+        coordinate = CoordinateGenerator(self.working_frame(frame), self.path_to_data)
         coordinate.generate(is_update=self.update_coordinate)
+        self.__set_parking_coordinates(coordinate, frame)
+
+    def load_parking_coordinates(self, frame):
+        """
+        Loads the saved coordinates of each parking spot without opening any window.
+
+        The coordinates are scaled from the frame size they were saved with to the working resolution.
+
+        Args:
+        - frame (numpy.ndarray): The current frame of the video, at its source resolution.
+        """
+        coordinate = CoordinateGenerator(self.working_frame(frame), self.path_to_data)
+        coordinate.load()
+        self.__set_parking_coordinates(coordinate, frame)
+
+    def __set_parking_coordinates(self, coordinate, frame):
+        height, width = frame.shape[:2]
+        self.source_size = (width, height)
+        working_size = self.frame_size or self.source_size
+        self.transform = AffineTransform.between(self.source_size, working_size)
         self.parking_coordinates = coordinate.get_Coordinates()
+        self.spot_overlay = None
+        if self.scheduler is not None:
+            self.scheduler.set_region(self.parking_coordinates, working_size)
+        if self.smoothing_window > 1 or self.min_hold > 0:
+            self.smoother = OccupancySmoother(
+                [spot["id"] for spot in self.parking_coordinates],
+                window=self.smoothing_window,
+                votes=self.smoothing_votes,
+                min_hold=self.min_hold,
+            )
+        if self.tracker is not None:
+            self.dwell_timer = SpotDwellTimer(len(self.parking_coordinates))
+        if self.incremental:
+            self.change_detector = SpotChangeDetector(
+                self.parking_coordinates,
+                working_size,
+                threshold=self.change_threshold,
+            )
+        if self.occupancy_mode == "mask":
+            self.occupancy_engine = SpotLabelMask.load_or_build(
+                self.parking_coordinates,
+                working_size,
+                self.path_to_data,
+            )
+        else:
+            self.occupancy_engine = OccupancyEngine(self.parking_coordinates)
         self.is_generated = True
 
     def detect_cars(self, frame):
@@ -102,40 +738,38 @@ class ParkingSpaceDetector:
         self.car_detector.detect(frame)
         self.car_detected_coordinates = self.car_detector.get_Car_Coordinates()
 
-    def set_parking_spots_occupied(self):
+    def set_parking_spots_occupied(self, spot_indices=None):
         """
         Sets the 'is_occupied' flag for each parking spot based on whether a car is detected within its boundaries.
 
+        Args:
+        - spot_indices (numpy.ndarray | None): The indices of the parking spots to re-evaluate, or None for all of them.
+
         Returns:
         - total_occupied (int): The total number of occupied parking spots.
         """
-        total_occupied = 0
-        for i in range(len(self.parking_coordinates)):
-            for car in self.car_detected_coordinates:
-                cx = car["low_center"][0]
-                cy = car["low_center"][1]
-                polygon = Polygon(self.parking_coordinates[i]["coordinates"])
-                point = Point(cx, cy)
-                is_occupied = polygon.contains(point)
-                self.parking_coordinates[i]["is_occupied"] = is_occupied
-                if is_occupied:
-                    total_occupied += 1
-                    break
-        return total_occupied
+        low_centers = [car["low_center"] for car in self.car_detected_coordinates]
+        occupied = self.occupancy_engine.classify(low_centers, spot_indices)
+        if spot_indices is None:
+            spot_indices = range(len(self.parking_coordinates))
+        for index, is_occupied in zip(spot_indices, occupied):
+            self.parking_coordinates[index]["is_occupied"] = bool(is_occupied)
+        return sum(spot["is_occupied"] for spot in self.parking_coordinates)
 
     def draw_parking_spots(self, frame):
         """
         Draws rectangles around each parking spot in the video.
 
+        The outlines come from a SpotOverlay rendered once for the frame size, in
+        which only the parking spots whose occupancy changed are recolored.
+
         Args:
         - frame (numpy.ndarray): The current frame of the video.
         """
-        for coordinate in self.parking_coordinates:
-            draw_rectangles(
-                coordinate["coordinates"],
-                frame,
-                is_occupied=coordinate["is_occupied"],
-            )
+        height, width = frame.shape[:2]
+        if self.spot_overlay is None or self.spot_overlay.frame_size != (width, height):
+            self.spot_overlay = SpotOverlay(self.parking_coordinates, (width, height))
+        self.spot_overlay.draw(frame, self.parking_coordinates)
 
     def draw_legend(self, frame, total_occupied, total_spaces):
         """
@@ -147,7 +781,10 @@ class ParkingSpaceDetector:
         - total_spaces (int): The total number of parking spots.
         """
         text_to_show = f"Occupied: {total_occupied}/{total_spaces}"
-        text_size, _ = cv2.getTextSize(text_to_show, cv2.FONT_HERSHEY_PLAIN, 2, 2)
+        text_size = self.__legend_sizes.get(text_to_show)
+        if text_size is None:
+            text_size, _ = cv2.getTextSize(text_to_show, cv2.FONT_HERSHEY_PLAIN, 2, 2)
+            self.__legend_sizes[text_to_show] = text_size
         rect_width = text_size[0] + 10
         rect_height = text_size[1] + 10
         rect_x = int(frame.shape[1] / 2 - rect_width / 2)
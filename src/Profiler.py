@@ -0,0 +1,340 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+class LatencyWindow:
+    """
+    A class that keeps the most recent latencies of one stage in a ring buffer.
+
+    Percentiles are computed over the window, so they follow the current load
+    instead of the whole run, while the count and sum cover the whole run.
+
+    Attributes
+    ----------
+    count : int
+        The number of items recorded since the start.
+    total_time : float
+        The total processing time recorded since the start, in seconds.
+
+    Methods
+    -------
+    record(seconds, count=1)
+        Records the processing time of one call covering count items.
+    percentiles(quantiles)
+        Returns the latency at each quantile of the window, in seconds.
+    """
+
+    def __init__(self, size=1024):
+        self.count = 0
+        self.total_time = 0.0
+        self.__samples = np.zeros(size)
+        self.__position = 0
+        self.__filled = 0
+        self.__lock = threading.Lock()
+
+    def record(self, seconds, count=1):
+        """
+        Records the processing time of one call covering count items.
+
+        The per-item latency, seconds / count, enters the window.
+        """
+        with self.__lock:
+            self.count += count
+            self.total_time += seconds
+            self.__samples[self.__position] = seconds / count
+            self.__position = (self.__position + 1) % len(self.__samples)
+            self.__filled = min(self.__filled + 1, len(self.__samples))
+
+    def percentiles(self, quantiles):
+        """
+        Returns the latency at each quantile of the window, in seconds.
+
+        Parameters
+        ----------
+        quantiles : list
+            The quantiles to compute, between 0 and 1.
+
+        Returns
+        -------
+        numpy.ndarray
+            One latency per quantile, all zero while the window is empty.
+        """
+        with self.__lock:
+            samples = self.__samples[: self.__filled].copy()
+        if len(samples) == 0:
+            return np.zeros(len(quantiles))
+        return np.quantile(samples, quantiles)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.profiler.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Profiler:
+    """
+    A class that records per-stage latencies, frame throughput and dropped frames.
+
+    Stages are timed with the stage() context manager from any thread. Every
+    report_interval seconds, tick() prints one summary line and rewrites the
+    metrics file, if any, in the Prometheus text format. The same metrics can be
+    served over HTTP for scraping.
+
+    Attributes
+    ----------
+    stages : dict
+        The LatencyWindow of each stage, by name, in first use order.
+    frames : int
+        The number of frames fully processed.
+    dropped : int
+        The number of frames dropped before processing.
+    labels : dict
+        Constant labels added to every exported metric, e.g. the lot id.
+
+    Methods
+    -------
+    stage(name, count=1)
+        Times the enclosed block as one call of the stage covering count items.
+    record(name, seconds, count=1)
+        Records the processing time of one call of a stage.
+    add_frames(count=1)
+        Counts fully processed frames.
+    add_dropped(count=1)
+        Counts frames dropped before processing.
+    tick()
+        Reports the metrics if the report interval has elapsed.
+    report()
+        Updates the frame rate, logs the summary line and rewrites the metrics file.
+    summary()
+        Returns the one line summary of the current metrics.
+    render_prometheus()
+        Returns the metrics in the Prometheus text exposition format.
+    serve(port, host="127.0.0.1")
+        Serves the metrics over HTTP on a background thread.
+    close()
+        Reports the final metrics and stops the HTTP server.
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+    PREFIX = "parking"
+
+    def __init__(
+        self,
+        report_interval=10.0,
+        metrics_path=None,
+        labels=None,
+        window=1024,
+        log=print,
+    ):
+        """
+        Parameters
+        ----------
+        report_interval : float, optional
+            The number of seconds between two reports. The default is 10.
+        metrics_path : str, optional
+            A file rewritten with the Prometheus metrics at every report, e.g. for
+            the node_exporter textfile collector.
+        labels : dict, optional
+            Constant labels added to every exported metric, e.g. {"lot": "north"}.
+        window : int, optional
+            The number of recent latencies kept per stage for the percentiles. The default is 1024.
+        log : callable, optional
+            Called with the summary line of every report. The default is print.
+        """
+        self.report_interval = report_interval
+        self.metrics_path = metrics_path
+        self.labels = dict(labels or {})
+        self.window = window
+        self.log = log
+        self.stages = {}
+        self.frames = 0
+        self.dropped = 0
+        self.__lock = threading.Lock()
+        self.__started = time.monotonic()
+        self.__last_report = self.__started
+        self.__frames_at_report = 0
+        self.__fps = 0.0
+        self.__server = None
+
+    @contextmanager
+    def stage(self, name, count=1):
+        """
+        Times the enclosed block as one call of the stage covering count items.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, count)
+
+    def record(self, name, seconds, count=1):
+        """
+        Records the processing time of one call of a stage.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+        seconds : float
+            The duration of the call.
+        count : int, optional
+            The number of items, e.g. frames of a batch, the call covered. The default is 1.
+        """
+        window = self.stages.get(name)
+        if window is None:
+            with self.__lock:
+                window = self.stages.setdefault(name, LatencyWindow(self.window))
+        window.record(seconds, count)
+
+    def add_frames(self, count=1):
+        with self.__lock:
+            self.frames += count
+
+    def add_dropped(self, count=1):
+        with self.__lock:
+            self.dropped += count
+
+    def tick(self):
+        """
+        Reports the metrics if the report interval has elapsed.
+
+        Returns
+        -------
+        bool
+            True if a report was made.
+        """
+        if time.monotonic() - self.__last_report < self.report_interval:
+            return False
+        self.report()
+        return True
+
+    def report(self):
+        """
+        Updates the frame rate, logs the summary line and rewrites the metrics file.
+        """
+        now = time.monotonic()
+        with self.__lock:
+            elapsed = now - self.__last_report
+            if elapsed > 0:
+                self.__fps = (self.frames - self.__frames_at_report) / elapsed
+            self.__frames_at_report = self.frames
+            self.__last_report = now
+        if self.log is not None:
+            self.log(self.summary())
+        if self.metrics_path is not None:
+            # Write then rename, so readers never see a half-written file.
+            temporary = f"{self.metrics_path}.tmp"
+            with open(temporary, "w") as output:
+                output.write(self.render_prometheus())
+            os.replace(temporary, self.metrics_path)
+
+    @property
+    def fps(self):
+        """
+        The frame rate over the last report interval.
+        """
+        return self.__fps
+
+    def summary(self):
+        """
+        Returns the one line summary of the current metrics.
+        """
+        parts = [
+            f"{self.__fps:.1f} fps",
+            f"{self.frames} frames",
+            f"{self.dropped} dropped",
+        ]
+        for name, window in list(self.stages.items()):
+            p50, p95, p99 = window.percentiles(Profiler.QUANTILES) * 1000
+            parts.append(f"{name} p50/p95/p99 {p50:.1f}/{p95:.1f}/{p99:.1f} ms")
+        return " | ".join(parts)
+
+    def __labels(self, **extra):
+        labels = {**self.labels, **extra}
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+    def render_prometheus(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+
+        Stage latencies are a summary with the p50, p95 and p99 quantiles of the
+        recent window, and the count and sum of the whole run.
+        """
+        name = f"{Profiler.PREFIX}_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Per-item latency of each processing stage.",
+            f"# TYPE {name} summary",
+        ]
+        for stage, window in list(self.stages.items()):
+            for quantile, value in zip(
+                Profiler.QUANTILES, window.percentiles(Profiler.QUANTILES)
+            ):
+                labels = self.__labels(stage=stage, quantile=quantile)
+                lines.append(f"{name}{labels} {value:.6f}")
+            labels = self.__labels(stage=stage)
+            lines.append(f"{name}_sum{labels} {window.total_time:.6f}")
+            lines.append(f"{name}_count{labels} {window.count}")
+
+        labels = self.__labels()
+        uptime = time.monotonic() - self.__started
+        for metric, kind, help_text, value in (
+            ("frames_total", "counter", "Frames fully processed.", self.frames),
+            ("dropped_frames_total", "counter", "Frames dropped.", self.dropped),
+            ("frames_per_second", "gauge", "Recent frame rate.", self.__fps),
+            ("uptime_seconds", "gauge", "Seconds since profiling started.", uptime),
+        ):
+            metric = f"{Profiler.PREFIX}_{metric}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"{metric}{labels} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+        Serves the metrics over HTTP on a background thread, at / and /metrics.
+
+        Parameters
+        ----------
+        port : int
+            The port to listen on, 0 for any free port.
+        host : str, optional
+            The address to listen on. The default only accepts local connections.
+
+        Returns
+        -------
+        int
+            The port the server listens on.
+        """
+        self.__server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.__server.daemon_threads = True
+        self.__server.profiler = self
+        threading.Thread(target=self.__server.serve_forever, daemon=True).start()
+        return self.__server.server_address[1]
+
+    def close(self):
+        """
+        Reports the final metrics and stops the HTTP server.
+        """
+        self.report()
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
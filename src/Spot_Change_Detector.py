@@ -0,0 +1,157 @@
+import cv2
+import numpy as np
+
+
+class SpotChangeDetector:
+    """
+    A class that finds the parking spots whose image content changed since they were last classified.
+
+    Each spot keeps a reference statistic (the mean and standard deviation of the
+    grayscale pixels in its bounding box). Both are computed for every spot at once
+    from one integral image, so checking a frame costs a single pass over it. A spot
+    is dirty when either statistic moved by more than the threshold.
+
+    Attributes
+    ----------
+    bounding_boxes : numpy.ndarray
+        An array of shape (spots, 4) with the x_1, y_1, x_2, y_2 bounds of each spot, margin included.
+    threshold : float
+        The change in gray level that marks a spot as dirty.
+    checked : int
+        The number of spot checks made so far.
+    dirty : int
+        The number of spot checks that found the spot dirty.
+
+    Methods
+    -------
+    dirty_spots(frame)
+        Returns a boolean array telling which spots changed since their reference.
+    update_reference(spot_indices)
+        Stores the statistic of the given spots in the last checked frame as their new reference.
+    dirty_region(spot_indices)
+        Returns the bounding box enclosing the given spots.
+    stats()
+        Returns the number of checked and dirty spots and the dirty ratio.
+    """
+
+    def __init__(self, parking_coordinates, frame_size, threshold=12.0, margin=20):
+        """
+        Parameters
+        ----------
+        parking_coordinates : list
+            A list of dictionaries containing the coordinates of each parking spot.
+        frame_size : tuple
+            The (width, height) of the frames the coordinates refer to.
+        threshold : float, optional
+            The change in mean or standard deviation gray level that marks a spot as dirty.
+            The default is 12.
+        margin : int, optional
+            The number of pixels added around each spot, so a car overlapping the spot
+            edge is still seen in full. The default is 20.
+        """
+        width, height = frame_size
+        self.threshold = threshold
+        self.checked = 0
+        self.dirty = 0
+        boxes = []
+        for spot in parking_coordinates:
+            points = np.asarray(spot["coordinates"]).reshape(-1, 2)
+            boxes.append(
+                (
+                    max(int(points[:, 0].min()) - margin, 0),
+                    max(int(points[:, 1].min()) - margin, 0),
+                    min(int(points[:, 0].max()) + margin + 1, width),
+                    min(int(points[:, 1].max()) + margin + 1, height),
+                )
+            )
+        self.bounding_boxes = np.array(boxes, dtype=np.int64).reshape(-1, 4)
+        self.__reference = None
+        self.__last_statistics = None
+
+    def __statistics(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        sums, square_sums = cv2.integral2(gray, sdepth=cv2.CV_64F)
+        x_1, y_1, x_2, y_2 = self.bounding_boxes.T
+
+        def box_sum(table):
+            return table[y_2, x_2] - table[y_1, x_2] - table[y_2, x_1] + table[y_1, x_1]
+
+        area = np.maximum((x_2 - x_1) * (y_2 - y_1), 1)
+        mean = box_sum(sums) / area
+        variance = np.maximum(box_sum(square_sums) / area - mean**2, 0)
+        return np.stack([mean, np.sqrt(variance)], axis=1)
+
+    def dirty_spots(self, frame):
+        """
+        Returns a boolean array telling which spots changed since their reference.
+
+        Every spot is dirty until a reference has been stored for it.
+
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            The current frame of the video.
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean array with one entry per parking spot.
+        """
+        statistics = self.__statistics(frame)
+        if self.__reference is None:
+            self.__reference = np.full_like(statistics, np.nan)
+        self.__last_statistics = statistics
+        change = np.abs(statistics - self.__reference)
+        dirty = ~(change <= self.threshold).all(axis=1)
+        self.checked += len(dirty)
+        self.dirty += int(dirty.sum())
+        return dirty
+
+    def update_reference(self, spot_indices):
+        """
+        Stores the statistic of the given spots in the last checked frame as their new reference.
+
+        Parameters
+        ----------
+        spot_indices : array_like
+            The indices of the spots that were classified on the last checked frame.
+        """
+        if self.__last_statistics is not None:
+            self.__reference[spot_indices] = self.__last_statistics[spot_indices]
+
+    def dirty_region(self, spot_indices):
+        """
+        Returns the bounding box enclosing the given spots.
+
+        Parameters
+        ----------
+        spot_indices : array_like
+            The indices of the spots to enclose.
+
+        Returns
+        -------
+        tuple
+            The (x_1, y_1, x_2, y_2) bounds of the region.
+        """
+        boxes = self.bounding_boxes[spot_indices]
+        return (
+            int(boxes[:, 0].min()),
+            int(boxes[:, 1].min()),
+            int(boxes[:, 2].max()),
+            int(boxes[:, 3].max()),
+        )
+
+    def stats(self):
+        """
+        Returns the number of checked and dirty spots and the dirty ratio.
+
+        Returns
+        -------
+        dict
+            The checked and dirty spot counts and the share of dirty spots.
+        """
+        return {
+            "checked": self.checked,
+            "dirty": self.dirty,
+            "dirty_ratio": self.dirty / self.checked if self.checked else 0.0,
+        }
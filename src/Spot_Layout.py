@@ -0,0 +1,268 @@
+import json
+import os
+import struct
+import zipfile
+
+import numpy as np
+import yaml
+
+from util.transform import AffineTransform
+
+
+class SpotLayout:
+    """
+    A class that stores the polygons of a parking lot layout in flat NumPy arrays.
+
+    The vertices of every spot are concatenated into one (vertices, 2) array and
+    spot i owns vertices[offsets[i]:offsets[i + 1]], so spots may have any number
+    of vertices. A layout is saved as .npz (binary, loads in milliseconds and can
+    be memory-mapped by many worker processes), .json, or .yml/.yaml, all carrying
+    a schema version. The original YAML files, a bare list of four-point spots,
+    are still read.
+
+    Attributes
+    ----------
+    ids : numpy.ndarray
+        The id of each spot.
+    offsets : numpy.ndarray
+        The start of each spot in vertices, followed by the total number of vertices.
+    vertices : numpy.ndarray
+        The (x, y) vertices of all spots, spot after spot.
+    frame_size : tuple or None
+        The (width, height) of the frames the coordinates were drawn on, or None for
+        the original files, which were all drawn at LEGACY_FRAME_SIZE.
+
+    Methods
+    -------
+    from_coordinates(coordinates, frame_size=None)
+        Builds a layout from a dictionary of id to points.
+    scaled(frame_size)
+        Returns the layout mapped to frames of another size.
+    to_coordinates()
+        Returns the layout as a dictionary of id to a list of (x, y) tuples.
+    to_parking_coordinates()
+        Returns the layout as the list of spot dictionaries used by ParkingSpaceDetector.
+    load(path, mmap=False)
+        Loads a layout, picking the format from the file extension.
+    save(path)
+        Saves the layout in one write, picking the format from the file extension.
+    """
+
+    SCHEMA_VERSION = 1
+    # The fixed working resolution of the detector before layouts recorded their size.
+    LEGACY_FRAME_SIZE = (1355, 700)
+
+    def __init__(self, ids, offsets, vertices, frame_size=None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.vertices = np.asarray(vertices, dtype=np.int32).reshape(-1, 2)
+        self.frame_size = None if frame_size is None else tuple(int(v) for v in frame_size)
+        if len(self.offsets) != len(self.ids) + 1:
+            raise ValueError("A layout needs one offset per spot plus the total")
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_coordinates(cls, coordinates, frame_size=None):
+        """
+        Builds a layout from a dictionary of id to points.
+
+        Parameters
+        ----------
+        coordinates : dict
+            The points of each spot, keyed by spot id.
+        frame_size : tuple, optional
+            The (width, height) of the frames the coordinates were drawn on.
+
+        Returns
+        -------
+        SpotLayout
+            The layout holding the given spots.
+        """
+        ids = list(coordinates)
+        counts = [len(coordinates[i]) for i in ids]
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        vertices = [point for i in ids for point in coordinates[i]]
+        return cls(ids, offsets, vertices, frame_size)
+
+    def polygon(self, index):
+        """
+        Returns the (vertices, 2) array of the spot at the given position.
+        """
+        return self.vertices[self.offsets[index] : self.offsets[index + 1]]
+
+    def scaled(self, frame_size):
+        """
+        Returns the layout mapped to frames of another size.
+
+        A layout without a known frame size is taken to be drawn at LEGACY_FRAME_SIZE.
+
+        Parameters
+        ----------
+        frame_size : tuple
+            The (width, height) of the target frames.
+
+        Returns
+        -------
+        SpotLayout
+            The layout with its vertices scaled to frame_size.
+        """
+        frame_size = tuple(int(v) for v in frame_size)
+        if self.frame_size == frame_size:
+            return self
+        source_size = self.frame_size or SpotLayout.LEGACY_FRAME_SIZE
+        vertices = AffineTransform.between(source_size, frame_size).apply(self.vertices)
+        return SpotLayout(self.ids, self.offsets, np.rint(vertices), frame_size)
+
+    def to_coordinates(self):
+        """
+        Returns the layout as a dictionary of id to a list of (x, y) tuples.
+        """
+        return {
+            int(spot_id): [tuple(int(v) for v in point) for point in self.polygon(i)]
+            for i, spot_id in enumerate(self.ids)
+        }
+
+    def to_parking_coordinates(self):
+        """
+        Returns the layout as the list of spot dictionaries used by ParkingSpaceDetector.
+        """
+        return [
+            {"id": spot_id, "coordinates": points, "is_occupied": False}
+            for spot_id, points in self.to_coordinates().items()
+        ]
+
+    def to_dict(self):
+        """
+        Returns the layout as a versioned, JSON and YAML friendly dictionary.
+        """
+        return {
+            "schema_version": SpotLayout.SCHEMA_VERSION,
+            "frame_size": None if self.frame_size is None else list(self.frame_size),
+            "spots": [
+                {"id": spot_id, "coordinates": [list(point) for point in points]}
+                for spot_id, points in self.to_coordinates().items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds a layout from a versioned dictionary or from the original bare list of spots.
+        """
+        if data is None:
+            return cls.from_coordinates({})
+        if isinstance(data, list):
+            spots, frame_size = data, None
+        else:
+            version = data.get("schema_version")
+            if version != SpotLayout.SCHEMA_VERSION:
+                raise ValueError(f"Unsupported spot layout schema version: {version}")
+            spots, frame_size = data.get("spots") or [], data.get("frame_size")
+        return cls.from_coordinates(
+            {spot["id"]: [tuple(point) for point in spot["coordinates"]] for spot in spots},
+            frame_size,
+        )
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        """
+        Loads a layout, picking the format from the file extension.
+
+        Parameters
+        ----------
+        path : str
+            The path to a .npz, .json, .yml or .yaml layout file.
+        mmap : bool, optional
+            Memory-map the arrays of an .npz file instead of reading them. The default is False.
+
+        Returns
+        -------
+        SpotLayout
+            The loaded layout.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".npz":
+            arrays = _memmap_npz(path) if mmap else dict(np.load(path))
+            version = int(arrays["schema_version"])
+            if version != SpotLayout.SCHEMA_VERSION:
+                raise ValueError(f"Unsupported spot layout schema version: {version}")
+            frame_size = arrays["frame_size"]
+            return cls(
+                arrays["ids"],
+                arrays["offsets"],
+                arrays["vertices"],
+                None if frame_size.min() < 0 else frame_size,
+            )
+
+        with open(path, "r") as data:
+            if extension == ".json":
+                content = data.read()
+                return cls.from_dict(json.loads(content) if content.strip() else None)
+            return cls.from_dict(yaml.safe_load(data))
+
+    def save(self, path):
+        """
+        Saves the layout in one write, picking the format from the file extension.
+
+        Parameters
+        ----------
+        path : str
+            The path to a .npz, .json, .yml or .yaml layout file.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".npz":
+            frame_size = (-1, -1) if self.frame_size is None else self.frame_size
+            with open(path, "wb") as output:
+                np.savez(
+                    output,
+                    schema_version=np.int64(SpotLayout.SCHEMA_VERSION),
+                    ids=self.ids,
+                    offsets=self.offsets,
+                    vertices=self.vertices,
+                    frame_size=np.array(frame_size, dtype=np.int64),
+                )
+            return
+
+        if extension == ".json":
+            content = json.dumps(self.to_dict())
+        else:
+            content = yaml.safe_dump(
+                self.to_dict(), default_flow_style=None, sort_keys=False
+            )
+        with open(path, "w") as output:
+            output.write(content)
+
+
+def _memmap_npz(path):
+    """
+    Memory-maps every array of an uncompressed .npz file.
+
+    np.load ignores mmap_mode for .npz archives, so the offset of each member is
+    read from its zip local header and the .npy header behind it.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as raw:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed and cannot be memory-mapped")
+            raw.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", raw.read(4))
+            raw.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(raw)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(raw)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(raw)
+            arrays[os.path.splitext(info.filename)[0]] = np.memmap(
+                path,
+                dtype=dtype,
+                mode="r",
+                shape=shape,
+                order="F" if fortran_order else "C",
+                offset=raw.tell(),
+            )
+    return arrays
@@ -0,0 +1,135 @@
+import cv2
+import numpy as np
+
+from util.colors import COLOR_BLUE, COLOR_RED
+
+
+class SpotOverlay:
+    """
+    A class that draws the parking spot outlines from a layer rendered once, instead of drawing lines on every frame.
+
+    The outlines are rasterized once, with the same lines as draw_rectangles, into
+    the list of pixels they cover, grouped by the spot drawn last on each pixel.
+    Every pixel keeps the color of its spot's occupancy state, and only the pixels
+    of the spots whose state changed are recolored. Drawing a frame is then one
+    vectorized copy of the cached colors, whatever the number of spots.
+
+    Attributes
+    ----------
+    frame_size : tuple
+        The (width, height) of the frames the overlay is drawn on.
+    states : numpy.ndarray
+        The occupancy state each spot is currently rendered with.
+    redrawn : int
+        The number of spot recolorings made since the overlay was built.
+
+    Methods
+    -------
+    update(parking_coordinates)
+        Recolors the spots whose occupancy changed since the last update.
+    draw(frame, parking_coordinates)
+        Updates the overlay and draws it on the frame.
+    """
+
+    def __init__(
+        self,
+        parking_coordinates,
+        frame_size,
+        colors=(COLOR_BLUE, COLOR_RED),
+        thickness=2,
+    ):
+        """
+        Parameters
+        ----------
+        parking_coordinates : list
+            A list of dictionaries containing the coordinates of each parking spot.
+        frame_size : tuple
+            The (width, height) of the frames the overlay is drawn on.
+        colors : tuple, optional
+            The BGR color of a free and of an occupied spot. The default is blue and red.
+        thickness : int, optional
+            The thickness of the outlines, in pixels. The default is 2.
+        """
+        self.frame_size = tuple(frame_size)
+        width, height = self.frame_size
+        # Spots are numbered from 1, so 0 marks the pixels of no outline, and a
+        # later spot overwrites the pixels it shares with an earlier one, as when
+        # drawing directly.
+        owners = np.zeros((height, width), dtype=np.int32)
+        for index, spot in enumerate(parking_coordinates):
+            points = [tuple(int(v) for v in point) for point in spot["coordinates"]]
+            for start, end in zip(points, points[1:] + points[:1]):
+                cv2.line(owners, start, end, index + 1, thickness)
+
+        pixels = np.flatnonzero(owners)
+        spots = owners.ravel()[pixels] - 1
+        order = np.argsort(spots, kind="stable")
+        self.__pixels = pixels[order]
+        self.__spots = spots[order]
+        self.__offsets = np.searchsorted(
+            self.__spots, np.arange(len(parking_coordinates) + 1)
+        )
+        self.__palette = np.array(colors, dtype=np.uint8)
+        self.states = np.zeros(len(parking_coordinates), dtype=bool)
+        self.__colors = self.__palette[self.states[self.__spots].astype(np.intp)]
+        self.redrawn = 0
+
+    def update(self, parking_coordinates):
+        """
+        Recolors the spots whose occupancy changed since the last update.
+
+        Parameters
+        ----------
+        parking_coordinates : list
+            The parking spots, in the order the overlay was built with.
+
+        Returns
+        -------
+        numpy.ndarray
+            The indices of the recolored spots.
+        """
+        states = np.fromiter(
+            (spot["is_occupied"] for spot in parking_coordinates),
+            dtype=bool,
+            count=len(self.states),
+        )
+        changed = np.flatnonzero(states != self.states)
+        self.states = states
+        if len(changed) > len(states) // 4:
+            # Recoloring everything at once is cheaper than many small slices.
+            self.__colors = self.__palette[states[self.__spots].astype(np.intp)]
+        else:
+            for spot in changed:
+                start, end = self.__offsets[spot], self.__offsets[spot + 1]
+                self.__colors[start:end] = self.__palette[int(states[spot])]
+        self.redrawn += len(changed)
+        return changed
+
+    def draw(self, frame, parking_coordinates):
+        """
+        Updates the overlay and draws it on the frame.
+
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            A BGR frame of frame_size, drawn on in place.
+        parking_coordinates : list
+            The parking spots, in the order the overlay was built with.
+        """
+        height, width = frame.shape[:2]
+        if (width, height) != self.frame_size:
+            raise ValueError(
+                f"The overlay was built for {self.frame_size} frames, "
+                f"got {(width, height)}"
+            )
+        self.update(parking_coordinates)
+        if frame.flags.c_contiguous and frame.dtype == np.uint8:
+            # Copy whole BGR pixels as 3-byte items, the fastest scatter numpy offers.
+            np.put(
+                frame.reshape(-1).view("V3"),
+                self.__pixels,
+                self.__colors.reshape(-1).view("V3"),
+            )
+        else:
+            rows, columns = np.divmod(self.__pixels, width)
+            frame[rows, columns] = self.__colors
@@ -0,0 +1,274 @@
+import numpy as np
+
+from Car_Detector import CarDetector
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Returns the intersection over union of every pair of boxes.
+
+    Args:
+        boxes_a (numpy.ndarray): An array of shape (n, 4) of x_1, y_1, x_2, y_2 boxes.
+        boxes_b (numpy.ndarray): An array of shape (m, 4) of x_1, y_1, x_2, y_2 boxes.
+
+    Returns:
+        numpy.ndarray: An array of shape (n, m).
+    """
+    a, b = boxes_a[:, None, :], boxes_b[None, :, :]
+    top_left = np.maximum(a[..., :2], b[..., :2])
+    bottom_right = np.minimum(a[..., 2:], b[..., 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=-1)
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - intersection
+    return np.divide(
+        intersection, union, out=np.zeros_like(intersection), where=union > 0
+    )
+
+
+def _greedy_match(scores, threshold, rows, columns):
+    """
+    Pairs the free rows and columns with the highest scores first, keeping scores of at least threshold.
+
+    rows and columns are boolean arrays of the free entries, updated in place.
+    """
+    matches = []
+    if scores.size == 0:
+        return matches
+    order = np.argsort(scores, axis=None)[::-1]
+    for row, column in zip(*np.unravel_index(order, scores.shape)):
+        if scores[row, column] < threshold:
+            break
+        if rows[row] and columns[column]:
+            rows[row] = columns[column] = False
+            matches.append((row, column))
+    return matches
+
+
+class VehicleTracker:
+    """
+    A class that links the cars detected in consecutive frames into tracks with persistent ids.
+
+    Detections are matched to the predicted track boxes greedily by intersection
+    over union, then by centroid distance for the boxes that no longer overlap,
+    e.g. after a fast move between two inferred frames. Each track keeps a
+    constant velocity estimate, so its box can be extrapolated on frames where
+    detection is skipped or the car was missed. A track disappears after max_age
+    seconds without a matching detection.
+
+    Attributes
+    ----------
+    iou_threshold : float
+        The smallest intersection over union matching a detection to a track.
+    max_age : float
+        The number of seconds a track survives without a matching detection.
+    min_hits : int
+        The number of matched detections before a track is reported.
+    next_id : int
+        The id given to the next new track.
+
+    Methods
+    -------
+    update(cars, timestamp)
+        Matches the cars detected in a frame to the tracks and returns the tracked cars.
+    predict(timestamp)
+        Returns the tracked cars extrapolated to a frame without detections.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_age=2.0, min_hits=1, smoothing=0.5):
+        """
+        Parameters
+        ----------
+        iou_threshold : float, optional
+            The smallest intersection over union matching a detection to a track. The default is 0.3.
+        max_age : float, optional
+            The number of seconds a track survives without a matching detection.
+            It should exceed the time between two inferred frames. The default is 2.
+        min_hits : int, optional
+            The number of matched detections before a track is reported, to hide
+            one-frame false positives. The default is 1.
+        smoothing : float, optional
+            The weight of the newest motion in the velocity estimate, between 0 and 1. The default is 0.5.
+        """
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.smoothing = smoothing
+        self.next_id = 0
+        self.__ids = np.empty(0, dtype=np.int64)
+        self.__boxes = np.empty((0, 4))
+        self.__velocities = np.empty((0, 4))
+        self.__updated_at = np.empty(0)
+        self.__hits = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def __predicted_boxes(self, timestamp):
+        elapsed = np.clip(timestamp - self.__updated_at, 0, None)
+        return self.__boxes + self.__velocities * elapsed[:, None]
+
+    def __drop_expired(self, timestamp):
+        alive = timestamp - self.__updated_at <= self.max_age
+        if not alive.all():
+            self.__ids = self.__ids[alive]
+            self.__boxes = self.__boxes[alive]
+            self.__velocities = self.__velocities[alive]
+            self.__updated_at = self.__updated_at[alive]
+            self.__hits = self.__hits[alive]
+
+    def update(self, cars, timestamp):
+        """
+        Matches the cars detected in a frame to the tracks and returns the tracked cars.
+
+        Parameters
+        ----------
+        cars : list
+            The car dictionaries detected in the frame.
+        timestamp : float
+            The time of the frame, in seconds.
+
+        Returns
+        -------
+        list
+            One car dictionary, with its track_id, per confirmed track. Tracks
+            without a matching detection are reported at their extrapolated box.
+        """
+        # An expired track must not be revived by a car reaching its old box.
+        self.__drop_expired(timestamp)
+        boxes = np.array(
+            [[car["x_1"], car["y_1"], car["x_2"], car["y_2"]] for car in cars],
+            dtype=np.float64,
+        ).reshape(-1, 4)
+        predicted = self.__predicted_boxes(timestamp)
+
+        free_tracks = np.ones(len(predicted), dtype=bool)
+        free_boxes = np.ones(len(boxes), dtype=bool)
+        matches = _greedy_match(
+            box_iou(predicted, boxes), self.iou_threshold, free_tracks, free_boxes
+        )
+
+        # Boxes that moved too far to overlap are matched by centroid distance,
+        # relative to the size of the track box.
+        centers_a = (predicted[:, :2] + predicted[:, 2:]) / 2
+        centers_b = (boxes[:, :2] + boxes[:, 2:]) / 2
+        sizes = np.maximum(predicted[:, 2:] - predicted[:, :2], 1).max(axis=1)
+        distances = np.linalg.norm(centers_a[:, None] - centers_b[None], axis=2)
+        matches += _greedy_match(
+            -distances / sizes[:, None], -0.5, free_tracks, free_boxes
+        )
+
+        for track, box in matches:
+            elapsed = timestamp - self.__updated_at[track]
+            if elapsed > 0:
+                velocity = (boxes[box] - self.__boxes[track]) / elapsed
+                self.__velocities[track] = (
+                    self.smoothing * velocity
+                    + (1 - self.smoothing) * self.__velocities[track]
+                )
+            self.__boxes[track] = boxes[box]
+            self.__updated_at[track] = timestamp
+            self.__hits[track] += 1
+
+        new_boxes = boxes[free_boxes]
+        self.__ids = np.concatenate(
+            [self.__ids, np.arange(self.next_id, self.next_id + len(new_boxes))]
+        )
+        self.next_id += len(new_boxes)
+        self.__boxes = np.concatenate([self.__boxes, new_boxes])
+        self.__velocities = np.concatenate(
+            [self.__velocities, np.zeros_like(new_boxes)]
+        )
+        self.__updated_at = np.concatenate(
+            [self.__updated_at, np.full(len(new_boxes), timestamp)]
+        )
+        self.__hits = np.concatenate(
+            [self.__hits, np.ones(len(new_boxes), dtype=np.int64)]
+        )
+        return self.predict(timestamp)
+
+    def predict(self, timestamp):
+        """
+        Returns the tracked cars extrapolated to a frame without detections.
+
+        Parameters
+        ----------
+        timestamp : float
+            The time of the frame, in seconds.
+
+        Returns
+        -------
+        list
+            One car dictionary, with its track_id, per confirmed track.
+        """
+        self.__drop_expired(timestamp)
+        confirmed = self.__hits >= self.min_hits
+        boxes = np.rint(self.__predicted_boxes(timestamp)[confirmed]).astype(int)
+        return [
+            {
+                "x_1": int(box[0]),
+                "y_1": int(box[1]),
+                "x_2": int(box[2]),
+                "y_2": int(box[3]),
+                "low_center": CarDetector.low_center(box),
+                "track_id": int(track_id),
+            }
+            for track_id, box in zip(self.__ids[confirmed], boxes)
+        ]
+
+
+class SpotDwellTimer:
+    """
+    A class that measures how long the same tracked car has been in each parking spot.
+
+    Attributes
+    ----------
+    track_ids : numpy.ndarray
+        The id of the track in each spot, or -1 for an empty spot.
+    since : numpy.ndarray
+        The time the current track entered each spot, NaN for an empty spot.
+
+    Methods
+    -------
+    update(track_ids, timestamp, spot_indices=None)
+        Records the track found in each spot and restarts the timer of the spots whose track changed.
+    dwell_times(timestamp)
+        Returns the number of seconds the current track has been in each spot.
+    """
+
+    NO_TRACK = -1
+
+    def __init__(self, num_spots):
+        self.track_ids = np.full(num_spots, SpotDwellTimer.NO_TRACK, dtype=np.int64)
+        self.since = np.full(num_spots, np.nan)
+
+    def update(self, track_ids, timestamp, spot_indices=None):
+        """
+        Records the track found in each spot and restarts the timer of the spots whose track changed.
+
+        Parameters
+        ----------
+        track_ids : array_like
+            The id of the track in each observed spot, or NO_TRACK.
+        timestamp : float
+            The time of the frame, in seconds.
+        spot_indices : array_like, optional
+            The indices of the observed spots. All spots are observed if omitted.
+        """
+        if spot_indices is None:
+            spot_indices = np.arange(len(self.track_ids))
+        spot_indices = np.asarray(spot_indices, dtype=np.int64)
+        track_ids = np.asarray(track_ids, dtype=np.int64)
+
+        changed = self.track_ids[spot_indices] != track_ids
+        changed_spots = spot_indices[changed]
+        self.track_ids[changed_spots] = track_ids[changed]
+        self.since[changed_spots] = np.where(
+            track_ids[changed] == SpotDwellTimer.NO_TRACK, np.nan, timestamp
+        )
+
+    def dwell_times(self, timestamp):
+        """
+        Returns the number of seconds the current track has been in each spot, 0 for an empty spot.
+        """
+        return np.nan_to_num(timestamp - self.since, nan=0.0)
@@ -0,0 +1,83 @@
+"""
+Accuracy-vs-throughput benchmark of the detector backends and model sizes on lot footage.
+
+Every candidate is compared with the reference model (PyTorch YOLOv8x by default)
+on the occupancy decisions it leads to, so the cheapest model that still agrees
+with the reference can be picked. Run from the src directory:
+
+    python -m benchmarks.backend_benchmark --video ../parking1.mp4 \
+        --coordinates ../data/coordinates1.yml --candidates torch:n torch:s onnx:n openvino:n
+"""
+import argparse
+import time
+
+import numpy as np
+
+from Car_Detector import CarDetector
+from Occupancy_Engine import OccupancyEngine
+from Parking_Space_Detector import ParkingSpaceDetector
+from Spot_Layout import SpotLayout
+from benchmarks.detector_benchmark import load_frames
+
+
+def run_candidate(backend, model_size, device, frames, engine, batch_size):
+    """
+    Runs one backend over the frames.
+
+    Returns:
+        tuple: The frames/s and a boolean (frames, spots) occupancy matrix.
+    """
+    detector = CarDetector(device=device, model_size=model_size, backend=backend)
+    detector.detect_batch(frames[:1])
+
+    occupancy = []
+    start = time.perf_counter()
+    for i in range(0, len(frames), batch_size):
+        for cars in detector.detect_batch(frames[i : i + batch_size]):
+            occupancy.append(engine.classify([car["low_center"] for car in cars]))
+    elapsed = time.perf_counter() - start
+    return len(frames) / elapsed, np.array(occupancy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--coordinates", required=True)
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--reference", default="torch:x")
+    parser.add_argument(
+        "--candidates",
+        nargs="+",
+        default=["torch:n", "torch:s", "torch:m", "torch:l", "onnx:n", "openvino:n"],
+        help="backend:model_size pairs",
+    )
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    # load_frames resizes the frames to the working resolution, so the spots must match.
+    layout = SpotLayout.load(args.coordinates).scaled(ParkingSpaceDetector.FRAME_SIZE)
+    engine = OccupancyEngine(layout.to_parking_coordinates())
+
+    reference_backend, reference_size = args.reference.split(":")
+    reference_fps, reference = run_candidate(
+        reference_backend, reference_size, args.device, frames, engine, args.batch_size
+    )
+    print(f"{'candidate':<12} {'frames/s':>9} {'spot agreement':>15} {'frame agreement':>16}")
+    print(f"{args.reference:<12} {reference_fps:9.2f} {'reference':>15} {'reference':>16}")
+
+    for candidate in args.candidates:
+        backend, model_size = candidate.split(":")
+        fps, occupancy = run_candidate(
+            backend, model_size, args.device, frames, engine, args.batch_size
+        )
+        spot_agreement = (occupancy == reference).mean()
+        frame_agreement = (occupancy == reference).all(axis=1).mean()
+        print(
+            f"{candidate:<12} {fps:9.2f} {spot_agreement:15.1%} {frame_agreement:16.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Throughput benchmark of CarDetector.detect_batch at several batch sizes.
+
+Run from the src directory:
+
+    python -m benchmarks.detector_benchmark --video ../parking1.mp4 --device cpu
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from Car_Detector import CarDetector
+from Detector_Backends import BACKENDS, MODEL_SIZES
+from Parking_Space_Detector import ParkingSpaceDetector
+
+
+def load_frames(video_path, num_frames):
+    """
+    Reads frames from a video, or makes random frames when no video is given.
+
+    Args:
+        video_path (str): The path to the video file, or None.
+        num_frames (int): The number of frames to return.
+
+    Returns:
+        list: The frames, resized to the detector's working resolution.
+    """
+    width, height = ParkingSpaceDetector.FRAME_SIZE
+    if video_path is None:
+        rng = np.random.default_rng(0)
+        return [
+            rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+            for _ in range(num_frames)
+        ]
+
+    frames = []
+    video = cv2.VideoCapture(video_path)
+    while len(frames) < num_frames:
+        ret, frame = video.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (width, height)))
+    video.release()
+    if not frames:
+        raise SystemExit(f"Could not read any frame from {video_path}")
+    while len(frames) < num_frames:
+        frames.extend(frames[: num_frames - len(frames)])
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--video", default=None)
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--model-size", choices=MODEL_SIZES, default="x")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch")
+    parser.add_argument("--frames", type=int, default=64)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    detector = CarDetector(
+        device=args.device, model_size=args.model_size, backend=args.backend
+    )
+    detector.detect_batch(frames[:1])
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(frames), batch_size):
+            detector.detect_batch(frames[i : i + batch_size])
+        elapsed = time.perf_counter() - start
+        print(f"batch={batch_size:3d}  {len(frames) / elapsed:8.2f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Micro-benchmark of the vectorized OccupancyEngine against the per-spot shapely loop.
+
+Run from the src directory:
+
+    python -m benchmarks.occupancy_benchmark --spots 200 --cars 100
+"""
+import argparse
+import timeit
+
+import numpy as np
+from shapely.geometry import Point, Polygon
+
+from Occupancy_Engine import OccupancyEngine
+
+
+def make_lot(num_spots, num_cars, seed=0):
+    """
+    Builds a synthetic lot of slightly skewed quadrilateral spots and random car points.
+
+    Args:
+        num_spots (int): The number of parking spots to generate.
+        num_cars (int): The number of car low_center points to generate.
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        tuple: The parking coordinates list and a list of (x, y) points.
+    """
+    rng = np.random.default_rng(seed)
+    columns = 25
+    parking_coordinates = []
+    for i in range(num_spots):
+        x = 10 + (i % columns) * 52
+        y = 10 + (i // columns) * 90
+        jitter = rng.integers(-4, 5, size=(4, 2))
+        corners = np.array([[x, y], [x - 6, y + 80], [x + 44, y + 80], [x + 50, y]])
+        points = [tuple(int(v) for v in p) for p in corners + jitter]
+        parking_coordinates.append({"id": i, "coordinates": points, "is_occupied": False})
+
+    height = 10 + (num_spots // columns + 1) * 90
+    cars = [
+        (int(x), int(y))
+        for x, y in zip(
+            rng.integers(0, 1355, size=num_cars), rng.integers(0, height, size=num_cars)
+        )
+    ]
+    return parking_coordinates, cars
+
+
+def shapely_occupied(parking_coordinates, cars):
+    """
+    Reference implementation: a spot is occupied if any car point lies inside it.
+    """
+    occupied = []
+    for spot in parking_coordinates:
+        is_occupied = False
+        for cx, cy in cars:
+            polygon = Polygon(spot["coordinates"])
+            if polygon.contains(Point(cx, cy)):
+                is_occupied = True
+                break
+        occupied.append(is_occupied)
+    return np.array(occupied, dtype=bool)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spots", type=int, default=200)
+    parser.add_argument("--cars", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    parking_coordinates, cars = make_lot(args.spots, args.cars)
+    engine = OccupancyEngine(parking_coordinates)
+
+    expected = shapely_occupied(parking_coordinates, cars)
+    actual = engine.classify(cars)
+    assert np.array_equal(expected, actual), "engine disagrees with shapely"
+
+    shapely_time = min(
+        timeit.repeat(
+            lambda: shapely_occupied(parking_coordinates, cars),
+            number=1,
+            repeat=args.repeat,
+        )
+    )
+    engine_time = min(
+        timeit.repeat(lambda: engine.classify(cars), number=1, repeat=args.repeat)
+    )
+
+    print(f"spots={args.spots} cars={args.cars} occupied={int(expected.sum())}")
+    print(f"shapely loop : {shapely_time * 1000:8.3f} ms/frame")
+    print(f"engine       : {engine_time * 1000:8.3f} ms/frame")
+    print(f"speedup      : {shapely_time / engine_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Records CarDetector outputs to a file and replays them without the model.
+
+Record the detections of a video once, on a machine with the model:
+
+    python -m benchmarks.replay --video ../parking1.mp4 --output detections.jsonl
+
+RecordedCarDetector then stands in for CarDetector anywhere, e.g. passed as the
+car_detector of a ParkingSpaceDetector, so the stages after detection can be
+measured without the model or a GPU.
+"""
+import argparse
+import json
+
+import cv2
+
+from Car_Detector import CarDetector
+from Detector_Backends import BACKENDS, MODEL_SIZES
+
+SCHEMA_VERSION = 1
+
+
+class DetectionRecorder:
+    """
+    Wraps a car detector and appends every frame it detects to a JSON Lines file.
+
+    The first line is a header with the schema version and the metadata given;
+    every other line holds the [x_1, y_1, x_2, y_2] boxes of one frame.
+    """
+
+    def __init__(self, car_detector, path, **metadata):
+        self.car_detector = car_detector
+        self.frames = 0
+        self.output = open(path, "w")
+        self.output.write(
+            json.dumps({"schema_version": SCHEMA_VERSION, **metadata}) + "\n"
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.car_detector, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def detect_batch(self, frames):
+        cars_per_frame = self.car_detector.detect_batch(frames)
+        for cars in cars_per_frame:
+            boxes = [
+                [int(car[key]) for key in ("x_1", "y_1", "x_2", "y_2")] for car in cars
+            ]
+            self.output.write(json.dumps(boxes) + "\n")
+        self.frames += len(cars_per_frame)
+        return cars_per_frame
+
+    def close(self):
+        self.output.close()
+
+
+def load_recording(path):
+    """
+    Loads a file written by DetectionRecorder.
+
+    Args:
+        path (str): The path to the recording.
+
+    Returns:
+        tuple: The header dictionary and one list of car dictionaries per frame.
+    """
+    with open(path, "r") as data:
+        header = json.loads(next(data))
+        if header.get("schema_version") != SCHEMA_VERSION:
+            raise ValueError(
+                f"Unsupported recording schema version: {header.get('schema_version')}"
+            )
+        frames = []
+        for line in data:
+            frames.append(
+                [
+                    {
+                        "x_1": box[0],
+                        "y_1": box[1],
+                        "x_2": box[2],
+                        "y_2": box[3],
+                        "low_center": CarDetector.low_center(box),
+                    }
+                    for box in json.loads(line)
+                ]
+            )
+    return header, frames
+
+
+class RecordedCarDetector(CarDetector):
+    """
+    A CarDetector that returns recorded detections instead of running a model.
+
+    Every call returns the next recorded frames, in order, whatever frames it is
+    given, starting over at the end of the recording.
+
+    Attributes
+    ----------
+    header : dict
+        The header of the recording.
+    recorded_frames : list
+        One list of car dictionaries per recorded frame.
+    """
+
+    def __init__(self, recording, draw_cars=False):
+        """
+        Parameters
+        ----------
+        recording : str or list
+            The path to a recording, or the list of car dictionaries of each frame.
+        draw_cars : bool, optional
+            A flag indicating whether to draw the replayed cars on the frames. The default is False.
+        """
+        super().__init__(draw_cars=draw_cars)
+        if isinstance(recording, str):
+            self.header, self.recorded_frames = load_recording(recording)
+        else:
+            self.header, self.recorded_frames = {}, list(recording)
+        if not self.recorded_frames:
+            raise ValueError("The recording holds no frame")
+        self.position = 0
+
+    def detect_batch(self, frames):
+        cars_per_frame = []
+        for frame in frames:
+            cars = self.recorded_frames[self.position]
+            self.position = (self.position + 1) % len(self.recorded_frames)
+            cars_per_frame.append([dict(car) for car in cars])
+            if self.draw_cars:
+                for car in cars:
+                    self.draw_car_detected(car, frame)
+        return cars_per_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--model-size", choices=MODEL_SIZES, default="x")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="torch")
+    parser.add_argument("--inference-size", type=int)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--frames", type=int, help="stop after this many frames")
+    args = parser.parse_args()
+
+    video = cv2.VideoCapture(args.video)
+    frame_size = (
+        int(video.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    )
+    car_detector = CarDetector(
+        device=args.device,
+        model_size=args.model_size,
+        backend=args.backend,
+        inference_size=args.inference_size,
+    )
+    with DetectionRecorder(
+        car_detector,
+        args.output,
+        video=args.video,
+        frame_size=frame_size,
+        model_size=args.model_size,
+        backend=args.backend,
+        inference_size=args.inference_size,
+    ) as recorder:
+        batch = []
+        while args.frames is None or recorder.frames + len(batch) < args.frames:
+            ret, frame = video.read()
+            if not ret:
+                break
+            batch.append(frame)
+            if len(batch) == args.batch_size:
+                recorder.detect_batch(batch)
+                batch = []
+        if batch:
+            recorder.detect_batch(batch)
+    video.release()
+    print(f"Recorded {recorder.frames} frames to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
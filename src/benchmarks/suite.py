@@ -0,0 +1,259 @@
+"""
+Reproducible benchmark suite of the stages after detection, on synthetic or recorded lots.
+
+Run from the src directory:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --output new.json --compare results.json
+
+Lots of 10 to 5000 spots and their detections are generated with fixed seeds,
+so two runs measure the same work and their result files can be compared
+across commits. --detections replays a recording made with benchmarks.replay
+against the lot of --coordinates instead.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import cv2
+import numpy as np
+
+from Occupancy_Engine import OccupancyEngine, SpotLabelMask
+from Occupancy_Events import EventSink, OccupancyEventPublisher
+from Occupancy_Writer import open_occupancy_writer
+from Parking_Space_Detector import ParkingSpaceDetector
+from Spot_Layout import SpotLayout
+from util.transform import AffineTransform
+from benchmarks.replay import RecordedCarDetector, load_recording
+from benchmarks.synthetic import make_detections, make_frame, make_layout
+
+CASES = (
+    "engine_polygon",
+    "engine_mask",
+    "mask_build",
+    "update_occupancy",
+    "smoothing",
+    "tracking",
+    "draw",
+    "write_jsonl",
+    "write_csv",
+    "events",
+)
+# Greedy track matching is quadratic in the number of cars.
+TRACKING_MAX_SPOTS = 1000
+
+
+class _NullEventSink(EventSink):
+    def write(self, events):
+        pass
+
+
+def _detector(layout_path, cars_per_frame, frame, **options):
+    detector = ParkingSpaceDetector(
+        None,
+        layout_path,
+        update_coordinate=False,
+        draw_cars=False,
+        car_detector=RecordedCarDetector(cars_per_frame),
+        frame_size=(frame.shape[1], frame.shape[0]),
+        **options,
+    )
+    detector.load_parking_coordinates(frame)
+    return detector
+
+
+def _lot_cases(layout, cars_per_frame, directory):
+    """
+    Returns the name and per-frame callable of every case on one lot.
+    """
+    frame = make_frame(layout.frame_size)
+    layout_path = os.path.join(directory, "layout.npz")
+    layout.save(layout_path)
+    parking_coordinates = layout.to_parking_coordinates()
+    points = [[car["low_center"] for car in cars] for cars in cars_per_frame]
+
+    def frame_cars(i):
+        return cars_per_frame[i % len(cars_per_frame)]
+
+    def engine_case(engine):
+        return lambda i: engine.classify(points[i % len(points)])
+
+    def update_case(detector):
+        return lambda i: detector.update_occupancy(frame_cars(i), timestamp=i * 0.1)
+
+    def writer_case(output_format):
+        writer = open_occupancy_writer(
+            os.path.join(directory, f"occupancy.{output_format}"), output_format
+        )
+        detector.update_occupancy(frame_cars(0), timestamp=0.0)
+        return (
+            lambda i: writer.write_frame(i, i * 0.1, detector.parking_coordinates, 0),
+            writer.close,
+        )
+
+    def draw(i):
+        detector.draw_parking_spots(frame)
+        detector.draw_legend(frame, 0, len(parking_coordinates))
+
+    def publish(i):
+        detector.update_occupancy(frame_cars(i), timestamp=i * 0.1)
+        publisher.publish(detector.parking_coordinates, i * 0.1)
+
+    detector = _detector(layout_path, cars_per_frame, frame)
+    publisher = OccupancyEventPublisher([_NullEventSink()])
+    yield "engine_polygon", engine_case(OccupancyEngine(parking_coordinates)), None
+    yield "engine_mask", engine_case(
+        SpotLabelMask(parking_coordinates, layout.frame_size)
+    ), None
+    yield "mask_build", lambda i: SpotLabelMask(
+        parking_coordinates, layout.frame_size
+    ), None
+    yield "update_occupancy", update_case(detector), None
+    yield "smoothing", update_case(
+        _detector(layout_path, cars_per_frame, frame, smoothing_window=5)
+    ), None
+    if len(layout) <= TRACKING_MAX_SPOTS:
+        yield "tracking", update_case(
+            _detector(layout_path, cars_per_frame, frame, track=True)
+        ), None
+    yield "draw", draw, None
+    yield ("write_jsonl", *writer_case("jsonl"))
+    yield ("write_csv", *writer_case("csv"))
+    yield "events", publish, None
+
+
+def time_case(run, frames, repeat):
+    """
+    Times a per-frame callable and returns its median and best time per frame, in milliseconds.
+    """
+    run(0)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(frames):
+            run(i)
+        timings.append((time.perf_counter() - start) / frames * 1000)
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings)}
+
+
+def metadata(args):
+    """
+    Returns the commit, library versions and settings a result file was produced with.
+    """
+
+    def git(*command):
+        try:
+            return subprocess.run(
+                ["git", *command], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "frames": args.frames,
+        "repeat": args.repeat,
+        "seed": args.seed,
+    }
+
+
+def compare(results, baseline):
+    """
+    Prints the change of every case against a previous result file.
+    """
+    for key in ("platform", "processor", "python", "numpy", "opencv"):
+        if results["meta"].get(key) != baseline["meta"].get(key):
+            print(
+                f"warning: {key} differs from the baseline "
+                f"({baseline['meta'].get(key)} -> {results['meta'].get(key)})"
+            )
+    print(f"{'case':32s} {'baseline':>10s} {'current':>10s} {'change':>8s}")
+    for name, result in results["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:32s} {'-':>10s} {result['median_ms']:10.3f}")
+            continue
+        change = result["median_ms"] / old["median_ms"] - 1 if old["median_ms"] else 0.0
+        print(
+            f"{name:32s} {old['median_ms']:10.3f} {result['median_ms']:10.3f} "
+            f"{change:+8.1%}"
+        )
+
+
+def _recorded_lot(args):
+    layout = SpotLayout.load(args.coordinates)
+    if layout.frame_size is None:
+        layout = SpotLayout(
+            layout.ids, layout.offsets, layout.vertices, ParkingSpaceDetector.FRAME_SIZE
+        )
+    header, cars_per_frame = load_recording(args.detections)
+    if header.get("frame_size"):
+        # Recordings hold source pixels; map them to the lot once, outside the timings.
+        transform = AffineTransform.between(header["frame_size"], layout.frame_size)
+        cars_per_frame = [
+            [transform.apply_car(car) for car in cars] for cars in cars_per_frame
+        ]
+    return layout, cars_per_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spots", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--frames", type=int, default=20, help="frames per timing")
+    parser.add_argument("--repeat", type=int, default=5, help="timings per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--detections", help="recording made with benchmarks.replay")
+    parser.add_argument("--coordinates", help="spot layout of the --detections lot")
+    parser.add_argument("--output", help="JSON file receiving the results")
+    parser.add_argument("--compare", help="previous JSON result file to compare with")
+    args = parser.parse_args()
+    if bool(args.detections) != bool(args.coordinates):
+        parser.error("--detections and --coordinates go together")
+
+    if args.detections:
+        lots = [("recorded", *_recorded_lot(args))]
+    else:
+        lots = []
+        for num_spots in args.spots:
+            layout = make_layout(num_spots, seed=args.seed)
+            cars_per_frame = make_detections(layout, args.frames, seed=args.seed)
+            lots.append((num_spots, layout, cars_per_frame))
+
+    results = {"meta": metadata(args), "results": {}}
+    for lot_name, layout, cars_per_frame in lots:
+        with tempfile.TemporaryDirectory() as directory:
+            for name, run, close in _lot_cases(layout, cars_per_frame, directory):
+                if name in args.cases:
+                    key = f"{name}/{lot_name}"
+                    result = time_case(run, args.frames, args.repeat)
+                    results["results"][key] = result
+                    print(f"{key:32s} {result['median_ms']:10.3f} ms/frame")
+                if close is not None:
+                    close()
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as data:
+            compare(results, json.load(data))
+
+
+if __name__ == "__main__":
+    main()
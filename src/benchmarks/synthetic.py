@@ -0,0 +1,111 @@
+"""
+Deterministic synthetic parking lots and detection sets for the benchmarks.
+"""
+import math
+
+import numpy as np
+
+from Car_Detector import CarDetector
+from Spot_Layout import SpotLayout
+
+SPOT_WIDTH = 52
+SPOT_HEIGHT = 90
+
+
+def make_layout(num_spots, frame_size=(1920, 1080), seed=0):
+    """
+    Builds a grid of slightly skewed quadrilateral spots filling a frame.
+
+    The spots shrink as their number grows, so lots of 10 to several thousand
+    spots fit the same frame and stress the engines rather than the memory.
+
+    Args:
+        num_spots (int): The number of parking spots to generate.
+        frame_size (tuple, optional): The (width, height) of the frame. Defaults to (1920, 1080).
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        SpotLayout: The layout of the generated spots.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = frame_size
+    aspect = SPOT_HEIGHT / SPOT_WIDTH
+    columns = max(1, math.ceil(math.sqrt(num_spots * width * aspect / height)))
+    rows = math.ceil(num_spots / columns)
+    scale = min(1.0, width / (columns * SPOT_WIDTH), height / (rows * SPOT_HEIGHT))
+    cell_width, cell_height = SPOT_WIDTH * scale, SPOT_HEIGHT * scale
+
+    index = np.arange(num_spots)
+    origins = np.stack(
+        [(index % columns) * cell_width, (index // columns) * cell_height], axis=1
+    )
+    # A spot leans a little to the left, like the ones drawn on real footage.
+    corners = np.array([[0.15, 0.05], [0.05, 0.95], [0.85, 0.95], [0.95, 0.05]])
+    jitter = rng.uniform(-0.03, 0.03, size=(num_spots, 4, 2))
+    vertices = origins[:, None, :] + (corners + jitter) * [cell_width, cell_height]
+    return SpotLayout(
+        index,
+        np.arange(num_spots + 1) * 4,
+        np.rint(vertices).astype(np.int32),
+        frame_size,
+    )
+
+
+def _car(x_1, y_1, x_2, y_2):
+    box = (int(x_1), int(y_1), int(x_2), int(y_2))
+    return {
+        "x_1": box[0],
+        "y_1": box[1],
+        "x_2": box[2],
+        "y_2": box[3],
+        "low_center": CarDetector.low_center(box),
+    }
+
+
+def make_detections(layout, num_frames, occupancy=0.6, churn=0.02, noise_cars=5, seed=0):
+    """
+    Builds a sequence of detected cars parked in a synthetic lot.
+
+    A share of the spots starts occupied, and every frame each spot flips with
+    probability churn. Each parked car gets a box around its spot, with a little
+    jitter, and noise_cars extra cars drive around outside any spot.
+
+    Args:
+        layout (SpotLayout): The lot, as returned by make_layout.
+        num_frames (int): The number of frames to generate.
+        occupancy (float, optional): The share of spots occupied at first. Defaults to 0.6.
+        churn (float, optional): The probability a spot changes state between frames. Defaults to 0.02.
+        noise_cars (int, optional): The number of cars outside the spots in every frame. Defaults to 5.
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        list: One list of car dictionaries, as returned by CarDetector.detect_batch, per frame.
+    """
+    rng = np.random.default_rng(seed)
+    polygons = layout.vertices.reshape(len(layout), -1, 2)
+    low, high = polygons.min(axis=1), polygons.max(axis=1)
+    size = high - low
+    width, height = layout.frame_size
+
+    occupied = rng.random(len(layout)) < occupancy
+    frames = []
+    for _ in range(num_frames):
+        occupied ^= rng.random(len(layout)) < churn
+        spots = np.flatnonzero(occupied)
+        jitter = rng.uniform(-0.05, 0.05, size=(len(spots), 4))
+        boxes = np.hstack([low[spots], high[spots]]) + jitter * np.tile(size[spots], 2)
+        cars = [_car(*box) for box in boxes]
+
+        centers = rng.uniform([0, 0], [width, height], size=(noise_cars, 2))
+        cars += [_car(x - 20, y - 12, x + 20, y + 12) for x, y in centers]
+        frames.append(cars)
+    return frames
+
+
+def make_frame(frame_size, seed=0):
+    """
+    Returns a random BGR frame of the given (width, height).
+    """
+    width, height = frame_size
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
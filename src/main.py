@@ -1,16 +1,543 @@
+import argparse
+import os
+from contextlib import ExitStack
+
 from Parking_Space_Detector import ParkingSpaceDetector
+from Occupancy_Writer import OUTPUT_FORMATS, open_occupancy_writer
+from Multi_Stream_Runner import MultiStreamRunner, load_manifest
+from Detector_Backends import BACKENDS, MODEL_SIZES
+from Occupancy_Events import OccupancyEventPublisher, create_event_sink
+from Chunked_Video_Processor import ChunkedVideoProcessor
+from Profiler import Profiler
+from Annotated_Output import AnnotatedVideoWriter, SpotSnapshotWriter
+from Occupancy_History import OccupancyHistory
+from Occupancy_Service import OccupancyService
 
 
-def main():
+def frame_size(value):
     """
-    Runs the Parking Space Detector program with the specified video and data paths.
+    Parses a WIDTHxHEIGHT frame size, or "native" to keep the source resolution.
+    """
+    if value == "native":
+        return None
+    try:
+        width, height = (int(v) for v in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f'expected WIDTHxHEIGHT or "native", got {value!r}'
+        )
+    return (width, height)
+
+
+def parse_args(argv=None):
     """
-    path_to_data = "./data/coordinates1.yml"
-    video_path = "./parking1.mp4"
-    parking_space_detector = ParkingSpaceDetector(
-        video_path, path_to_data, update_coordinate=True, draw_cars=True
+    Parses the command line arguments of the Parking Space Detector program.
+    """
+    parser = argparse.ArgumentParser(
+        description="Detects occupied parking spaces in a video."
+    )
+    parser.add_argument("--video", default="./parking1.mp4", help="video file to analyze")
+    parser.add_argument(
+        "--coordinates",
+        default="./data/coordinates1.yml",
+        help="parking spot coordinates file",
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="treat --video as a live stream: an RTSP/HTTP URL, a device index, or a "
+        "file played in real time; only the latest frame is processed",
+    )
+    parser.add_argument(
+        "--loop",
+        action="store_true",
+        help="with --live, start a video file over at its end, to stand in for a camera",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="process without any window and write occupancy records to --output",
+    )
+    parser.add_argument("--output", help="occupancy output file for --headless")
+    parser.add_argument(
+        "--format",
+        choices=sorted(OUTPUT_FORMATS),
+        help="output format, guessed from the --output extension by default",
+    )
+    parser.add_argument(
+        "--no-update",
+        action="store_true",
+        help="start the coordinate generator from scratch instead of updating the file",
+    )
+    parser.add_argument(
+        "--no-draw-cars", action="store_true", help="do not draw detected cars"
+    )
+    parser.add_argument(
+        "--occupancy-mode",
+        choices=ParkingSpaceDetector.OCCUPANCY_MODES,
+        default="polygon",
+    )
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--device", help='inference device, e.g. "cpu" or "0"')
+    parser.add_argument(
+        "--model-size", choices=MODEL_SIZES, default="x", help="YOLOv8 model size"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(BACKENDS),
+        default="torch",
+        help="detector backend; onnx and openvino export the model for CPU inference",
+    )
+    parser.add_argument(
+        "--frame-size",
+        type=frame_size,
+        default=ParkingSpaceDetector.FRAME_SIZE,
+        metavar="WIDTHxHEIGHT",
+        help='working resolution of the parking spots and the display, or "native"',
+    )
+    parser.add_argument(
+        "--inference-size",
+        type=int,
+        help="side of the square model input, e.g. 320 for fast high resolution cameras",
+    )
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="run decode, inference and display as separate pipeline stages",
+    )
+    parser.add_argument(
+        "--frame-delay",
+        type=float,
+        default=0.1,
+        help="seconds to wait between displayed frames so recordings play at a "
+        "watchable pace; only the sequential window loop waits, never --headless, "
+        "--live or --pipelined",
+    )
+    parser.add_argument(
+        "--infer-every",
+        type=int,
+        help="also run detection at least every N frames, motion or not; off by default",
+    )
+    parser.add_argument(
+        "--motion-threshold",
+        type=float,
+        help="also run detection when this share of spot pixels changed, e.g. 0.02",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="re-evaluate only the parking spots whose image changed",
+    )
+    parser.add_argument("--change-threshold", type=float, default=12.0)
+    parser.add_argument(
+        "--smoothing-window",
+        type=int,
+        default=1,
+        help="recent observations kept per spot for N-of-M voting (M)",
+    )
+    parser.add_argument(
+        "--smoothing-votes",
+        type=int,
+        help="agreeing observations a spot needs to change state (N), a majority by default",
+    )
+    parser.add_argument(
+        "--min-hold",
+        type=float,
+        default=0.0,
+        help="seconds a spot keeps a state before it may change again",
+    )
+    parser.add_argument(
+        "--track",
+        action="store_true",
+        help="link detections into vehicle tracks, extrapolated on frames without detection",
+    )
+    parser.add_argument(
+        "--track-iou",
+        type=float,
+        default=0.3,
+        help="smallest box overlap matching a detection to a track",
+    )
+    parser.add_argument(
+        "--track-max-age",
+        type=float,
+        default=2.0,
+        help="seconds a track survives without a matching detection",
+    )
+    parser.add_argument(
+        "--events",
+        action="append",
+        default=[],
+        metavar="SINK",
+        help='publish occupancy changes to "stdout", "file:<path>", '
+        '"tcp://<host>:<port>" or an http URL; repeatable',
+    )
+    parser.add_argument("--lot-id", help="lot identifier added to every published event")
+    parser.add_argument(
+        "--history-dir",
+        help="keep per-minute and per-hour occupancy rollups of every spot in this directory",
+    )
+    parser.add_argument(
+        "--api-port",
+        type=int,
+        help="serve the current occupancy as JSON over HTTP on this port",
+    )
+    parser.add_argument(
+        "--api-host",
+        default="127.0.0.1",
+        help="address of the --api-port server, localhost only by default",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="log per-stage p50/p95/p99 latencies, frames/s and dropped frames",
+    )
+    parser.add_argument(
+        "--profile-interval",
+        type=float,
+        default=10.0,
+        help="seconds between two profiling reports",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="file rewritten with Prometheus metrics at every profiling report",
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, help="serve Prometheus metrics on localhost:PORT"
     )
-    parking_space_detector.check_parking_spot_occupied()
+    parser.add_argument(
+        "--video-output",
+        help="write the annotated frames to this video file, also with --headless",
+    )
+    parser.add_argument(
+        "--segment-seconds",
+        type=float,
+        help="split --video-output into files of this many seconds of video",
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        help="save a JPEG crop of every parking spot whose occupancy changed here",
+    )
+    parser.add_argument(
+        "--manifest",
+        help="YAML list of video/coordinates pairs processed headless with one shared model",
+    )
+    parser.add_argument(
+        "--output-dir", help="directory receiving one occupancy file per --manifest stream"
+    )
+    parser.add_argument("--decode-workers", type=int, help="decoding processes for --manifest")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="split a --headless video file into chunks processed by this many processes",
+    )
+    parser.add_argument(
+        "--sample-every",
+        type=float,
+        metavar="SECONDS",
+        help="with --headless, process only one frame every this many seconds",
+    )
+    args = parser.parse_args(argv)
+
+    if args.headless and args.output is None:
+        parser.error("--headless requires --output")
+    if args.manifest and args.output_dir is None:
+        parser.error("--manifest requires --output-dir")
+    if args.track and args.incremental:
+        parser.error("--track cannot be combined with --incremental")
+    if (args.workers > 1 or args.sample_every) and not args.headless:
+        parser.error("--workers and --sample-every require --headless")
+    if (args.video_output or args.snapshot_dir) and (
+        args.manifest or args.workers > 1 or args.sample_every
+    ):
+        parser.error(
+            "--video-output and --snapshot-dir cannot be combined with --manifest, "
+            "--workers or --sample-every"
+        )
+    if (args.history_dir or args.api_port is not None) and (
+        args.manifest or args.workers > 1 or args.sample_every
+    ):
+        parser.error(
+            "--history-dir and --api-port cannot be combined with --manifest, "
+            "--workers or --sample-every"
+        )
+    if args.loop and not args.live:
+        parser.error("--loop requires --live")
+    if args.live and (args.manifest or args.workers > 1 or args.sample_every):
+        parser.error(
+            "--live cannot be combined with --manifest, --workers or --sample-every"
+        )
+    if args.segment_seconds is not None and not args.video_output:
+        parser.error("--segment-seconds requires --video-output")
+    if args.manifest:
+        reject_options(
+            parser,
+            args,
+            "--manifest",
+            [
+                "--output",
+                "--pipelined",
+                "--infer-every",
+                "--motion-threshold",
+                "--incremental",
+                "--change-threshold",
+                "--events",
+                "--lot-id",
+                "--profile",
+                "--metrics-file",
+                "--metrics-port",
+            ],
+        )
+    elif args.headless and (args.workers > 1 or args.sample_every):
+        reject_options(
+            parser,
+            args,
+            "--workers or --sample-every",
+            ["--pipelined", "--profile", "--metrics-file", "--metrics-port"],
+        )
+    return args
+
+
+def reject_options(parser, args, mode, options):
+    """
+    Exits with a usage error if any of the options is set to a value other than its default.
+    """
+    given = [
+        option
+        for option in options
+        if getattr(args, option[2:].replace("-", "_"))
+        != parser.get_default(option[2:].replace("-", "_"))
+    ]
+    if given:
+        parser.error(f"{', '.join(given)} cannot be combined with {mode}")
+
+
+def run_chunked(args):
+    """
+    Processes the video file in parallel chunks and writes the occupancy records in video order.
+    """
+    processor = ChunkedVideoProcessor(
+        args.video,
+        args.coordinates,
+        workers=args.workers,
+        sample_every=args.sample_every,
+        occupancy_mode=args.occupancy_mode,
+        batch_size=args.batch_size,
+        device=args.device,
+        model_size=args.model_size,
+        backend=args.backend,
+        smoothing_window=args.smoothing_window,
+        smoothing_votes=args.smoothing_votes,
+        min_hold=args.min_hold,
+        frame_size=args.frame_size,
+        inference_size=args.inference_size,
+        track=args.track,
+        track_iou=args.track_iou,
+        track_max_age=args.track_max_age,
+        infer_every=args.infer_every,
+        motion_threshold=args.motion_threshold,
+        incremental=args.incremental,
+        change_threshold=args.change_threshold,
+    )
+    event_publisher = None
+    if args.events:
+        event_publisher = OccupancyEventPublisher(
+            [create_event_sink(spec) for spec in args.events], lot_id=args.lot_id
+        )
+    try:
+        with open_occupancy_writer(args.output, args.format) as writer:
+            processor.run(writer, event_publisher)
+    finally:
+        if event_publisher is not None:
+            event_publisher.close()
+    print(f"Processed {processor.frames_processed} frames with {processor.workers} workers")
+
+
+def run_manifest(args):
+    """
+    Processes every stream of the manifest with a shared car detector and writes one occupancy file per stream.
+    """
+    streams = load_manifest(args.manifest)
+    runner = MultiStreamRunner(
+        streams,
+        batch_size=args.batch_size,
+        decode_workers=args.decode_workers,
+        device=args.device,
+        occupancy_mode=args.occupancy_mode,
+        model_size=args.model_size,
+        backend=args.backend,
+        frame_size=args.frame_size,
+        inference_size=args.inference_size,
+        smoothing_window=args.smoothing_window,
+        smoothing_votes=args.smoothing_votes,
+        min_hold=args.min_hold,
+        track=args.track,
+        track_iou=args.track_iou,
+        track_max_age=args.track_max_age,
+    )
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_format = args.format or "jsonl"
+    writers = [
+        open_occupancy_writer(
+            os.path.join(args.output_dir, f"{stream['name']}.{output_format}"),
+            output_format,
+        )
+        for stream in streams
+    ]
+    try:
+        runner.run(
+            lambda index, *record: writers[index].write_frame(*record),
+        )
+    finally:
+        for writer in writers:
+            writer.close()
+    print(f"Processed {runner.frames_processed} frames in {runner.batches} batches")
+
+
+def main(argv=None):
+    """
+    Runs the Parking Space Detector program with the specified video and data paths.
+    """
+    args = parse_args(argv)
+    if args.manifest:
+        run_manifest(args)
+        return
+    if args.headless and (args.workers > 1 or args.sample_every):
+        run_chunked(args)
+        return
+
+    # Every output registers its close() as soon as it exists, and all of them run
+    # even when one raises.
+    with ExitStack() as outputs:
+        profiler = None
+        if args.profile or args.metrics_file or args.metrics_port is not None:
+            profiler = Profiler(
+                report_interval=args.profile_interval,
+                metrics_path=args.metrics_file,
+                labels={"lot": args.lot_id} if args.lot_id else None,
+                log=print if args.profile else None,
+            )
+            outputs.callback(profiler.close)
+            if args.metrics_port is not None:
+                profiler.serve(args.metrics_port)
+
+        event_publisher = None
+        if args.events:
+            event_publisher = OccupancyEventPublisher(
+                [create_event_sink(spec) for spec in args.events], lot_id=args.lot_id
+            )
+            outputs.callback(event_publisher.close)
+
+        history = None
+        if args.history_dir:
+            history = OccupancyHistory(args.history_dir)
+            outputs.callback(history.close)
+
+        query_service = None
+        if args.api_port is not None:
+            query_service = OccupancyService(
+                args.api_host, args.api_port, lot_id=args.lot_id, history=history
+            )
+            outputs.callback(query_service.close)
+            port = query_service.start()
+            print(f"Serving occupancy on http://{args.api_host}:{port}/occupancy")
+
+        video_output = None
+        if args.video_output:
+            video_output = AnnotatedVideoWriter(
+                args.video_output, segment_seconds=args.segment_seconds
+            )
+            outputs.callback(video_output.close)
+        snapshot_writer = None
+        if args.snapshot_dir:
+            snapshot_writer = SpotSnapshotWriter(args.snapshot_dir)
+            outputs.callback(snapshot_writer.close)
+
+        parking_space_detector = ParkingSpaceDetector(
+            args.video,
+            args.coordinates,
+            update_coordinate=not args.no_update,
+            draw_cars=not args.no_draw_cars and not args.headless,
+            occupancy_mode=args.occupancy_mode,
+            batch_size=args.batch_size,
+            device=args.device,
+            frame_delay=args.frame_delay,
+            pipelined=args.pipelined,
+            infer_every=args.infer_every,
+            motion_threshold=args.motion_threshold,
+            incremental=args.incremental,
+            change_threshold=args.change_threshold,
+            model_size=args.model_size,
+            backend=args.backend,
+            smoothing_window=args.smoothing_window,
+            smoothing_votes=args.smoothing_votes,
+            min_hold=args.min_hold,
+            event_publisher=event_publisher,
+            frame_size=args.frame_size,
+            inference_size=args.inference_size,
+            track=args.track,
+            track_iou=args.track_iou,
+            track_max_age=args.track_max_age,
+            profiler=profiler,
+            video_output=video_output,
+            snapshot_writer=snapshot_writer,
+            live=args.live,
+            loop=args.loop,
+            history=history,
+            query_service=query_service,
+        )
+
+        if args.headless:
+            with open_occupancy_writer(args.output, args.format) as writer:
+                parking_space_detector.process_headless(writer)
+        else:
+            parking_space_detector.check_parking_spot_occupied()
+
+    if parking_space_detector.scheduler is not None:
+        stats = parking_space_detector.scheduler.stats()
+        print(
+            f"Inferred {stats['inferred']} frames, skipped {stats['skipped']} "
+            f"(skip ratio {stats['skip_ratio']:.1%})"
+        )
+    pipeline_stats = parking_space_detector.pipeline_stats()
+    if pipeline_stats is not None:
+        for name in ("decode", "inference", "render"):
+            stage = pipeline_stats[name]
+            print(
+                f"Pipeline {name}: {stage['count']} items, "
+                f"mean {stage['mean_ms']:.1f} ms, max {stage['max_ms']:.1f} ms"
+            )
+        for name in ("decode", "render"):
+            queue = pipeline_stats[f"{name}_queue"]
+            print(
+                f"Pipeline {name} queue: max depth {queue['max_depth']}, "
+                f"dropped {queue['dropped']}"
+            )
+    if video_output is not None:
+        print(
+            f"Wrote {video_output.written} annotated frames to "
+            f"{len(video_output.segments)} file(s), dropped {video_output.dropped}"
+        )
+    if snapshot_writer is not None:
+        print(
+            f"Saved {snapshot_writer.written} spot snapshots, "
+            f"dropped {snapshot_writer.dropped}"
+        )
+    if history is not None and history.time_range() is not None:
+        report = history.utilization(*history.time_range())
+        print(
+            f"Recorded {history.frames} frames of occupancy history, "
+            f"utilization {report['utilization']:.1%}"
+        )
+    if parking_space_detector.tracker is not None:
+        print(f"Tracked {parking_space_detector.tracker.next_id} vehicles")
+    if parking_space_detector.change_detector is not None:
+        stats = parking_space_detector.change_detector.stats()
+        print(
+            f"Re-evaluated {stats['dirty']} of {stats['checked']} spot checks "
+            f"(dirty ratio {stats['dirty_ratio']:.1%})"
+        )
 
 
 if __name__ == "__main__":
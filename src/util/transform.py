@@ -0,0 +1,146 @@
+import numpy as np
+
+
+class AffineTransform:
+    """
+    A 2D affine transform, stored as a 2x3 matrix, mapping points between pixel spaces.
+
+    Transforms are composed with then(), so a crop offset followed by a change of
+    resolution is still applied to the detections in a single step.
+
+    Attributes
+    ----------
+    matrix : numpy.ndarray
+        The 2x3 matrix mapping (x, y, 1) to the transformed (x, y).
+
+    Methods
+    -------
+    scaling(sx, sy)
+        Returns a transform scaling the x and y axes.
+    translation(dx, dy)
+        Returns a transform shifting points by an offset.
+    between(source_size, target_size)
+        Returns the transform mapping the pixels of a frame to the same frame resized.
+    then(other)
+        Returns the transform applying this one, then other.
+    inverse()
+        Returns the transform undoing this one.
+    apply(points)
+        Maps an array of (x, y) points.
+    apply_box(x_1, y_1, x_2, y_2)
+        Maps an axis-aligned box, rounding it outwards to whole pixels.
+    apply_car(car)
+        Returns a copy of a detected car in the target pixel space.
+    """
+
+    def __init__(self, matrix=None):
+        """
+        Parameters
+        ----------
+        matrix : array_like, optional
+            The 2x3 matrix of the transform. The default is the identity.
+        """
+        if matrix is None:
+            matrix = np.eye(2, 3)
+        self.matrix = np.asarray(matrix, dtype=np.float64).reshape(2, 3)
+
+    @classmethod
+    def scaling(cls, sx, sy):
+        return cls([[sx, 0, 0], [0, sy, 0]])
+
+    @classmethod
+    def translation(cls, dx, dy):
+        return cls([[1, 0, dx], [0, 1, dy]])
+
+    @classmethod
+    def between(cls, source_size, target_size):
+        """
+        Returns the transform mapping the pixels of a frame to the same frame resized.
+
+        Parameters
+        ----------
+        source_size : tuple
+            The (width, height) of the original frame.
+        target_size : tuple
+            The (width, height) of the resized frame.
+        """
+        return cls.scaling(
+            target_size[0] / source_size[0], target_size[1] / source_size[1]
+        )
+
+    @property
+    def is_identity(self):
+        return np.array_equal(self.matrix, np.eye(2, 3))
+
+    def __homogeneous(self):
+        return np.vstack([self.matrix, [0, 0, 1]])
+
+    def then(self, other):
+        """
+        Returns the transform applying this one, then other.
+        """
+        return AffineTransform((other.__homogeneous() @ self.__homogeneous())[:2])
+
+    def inverse(self):
+        """
+        Returns the transform undoing this one.
+        """
+        return AffineTransform(np.linalg.inv(self.__homogeneous())[:2])
+
+    def apply(self, points):
+        """
+        Maps an array of (x, y) points.
+
+        Parameters
+        ----------
+        points : array_like
+            The points to map, of shape (points, 2).
+
+        Returns
+        -------
+        numpy.ndarray
+            The mapped points as floats, of shape (points, 2).
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return points @ self.matrix[:, :2].T + self.matrix[:, 2]
+
+    def apply_box(self, x_1, y_1, x_2, y_2):
+        """
+        Maps an axis-aligned box, rounding it outwards to whole pixels.
+
+        Returns
+        -------
+        tuple
+            The x_1, y_1, x_2, y_2 bounds of the box enclosing the mapped corners.
+        """
+        corners = self.apply([(x_1, y_1), (x_2, y_1), (x_1, y_2), (x_2, y_2)])
+        low = np.floor(corners.min(axis=0)).astype(int)
+        high = np.ceil(corners.max(axis=0)).astype(int)
+        return int(low[0]), int(low[1]), int(high[0]), int(high[1])
+
+    def apply_car(self, car):
+        """
+        Returns a copy of a detected car in the target pixel space.
+
+        Parameters
+        ----------
+        car : dict
+            A dictionary containing the coordinates of the detected car.
+
+        Returns
+        -------
+        dict
+            The detected car with its box corners and low center mapped.
+        """
+        (x_1, y_1), (x_2, y_2), low_center = np.rint(
+            self.apply(
+                [(car["x_1"], car["y_1"]), (car["x_2"], car["y_2"]), car["low_center"]]
+            )
+        ).astype(int)
+        return {
+            "x_1": int(x_1),
+            "y_1": int(y_1),
+            "x_2": int(x_2),
+            "y_2": int(y_2),
+            "low_center": (int(low_center[0]), int(low_center[1])),
+        }
@@ -0,0 +1,25 @@
+import sys
+
+from Chunked_Video_Processor import split_chunks
+
+
+def test_chunks_cover_the_video_in_order():
+    assert split_chunks(10, 3) == [(0, 3), (3, 6), (6, 10)]
+
+
+def test_chunks_start_on_the_sampling_grid():
+    chunks = split_chunks(100, 4, step=7)
+
+    assert chunks[0][0] == 0 and chunks[-1][1] == 100
+    assert all(start % 7 == 0 for start, _ in chunks)
+    assert all(end == start for (_, end), (start, _) in zip(chunks, chunks[1:]))
+
+
+def test_no_more_chunks_than_sampled_frames():
+    assert split_chunks(3, 8) == [(0, 1), (1, 2), (2, 3)]
+    assert split_chunks(10, 8, step=5) == [(0, 5), (5, 10)]
+
+
+def test_unknown_frame_count_is_read_as_one_chunk():
+    assert split_chunks(0, 4) == [(0, sys.maxsize)]
+    assert split_chunks(-1, 4, step=5) == [(0, sys.maxsize)]
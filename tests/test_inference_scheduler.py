@@ -0,0 +1,41 @@
+import numpy as np
+
+from Inference_Scheduler import InferenceScheduler
+
+SPOT = [{"id": 0, "coordinates": [(8, 8), (8, 56), (56, 56), (56, 8)]}]
+
+
+def run(scheduler, frames):
+    scheduler.set_region(SPOT, (64, 64))
+    return [scheduler.should_infer(frame) for frame in frames]
+
+
+def test_motion_threshold_alone_skips_static_frames():
+    frames = [np.full((64, 64, 3), 100, dtype=np.uint8)] * 10
+    decisions = run(InferenceScheduler(motion_threshold=0.5), frames)
+
+    assert decisions == [True] + [False] * 9
+
+
+def test_motion_threshold_alone_infers_on_change():
+    still = np.full((64, 64, 3), 100, dtype=np.uint8)
+    moved = still.copy()
+    moved[8:56, 8:56] = 250
+    decisions = run(
+        InferenceScheduler(motion_threshold=0.5), [still, still, moved, moved]
+    )
+
+    assert decisions == [True, False, True, False]
+
+
+def test_every_n_frames_caps_the_gap_when_set():
+    frames = [np.full((64, 64, 3), 100, dtype=np.uint8)] * 7
+    decisions = run(InferenceScheduler(3, motion_threshold=0.5), frames)
+
+    assert decisions == [True, False, False, True, False, False, True]
+
+
+def test_zero_every_n_frames_disables_the_cap():
+    scheduler = InferenceScheduler(0, motion_threshold=0.5)
+
+    assert scheduler.every_n_frames is None
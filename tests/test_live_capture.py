@@ -0,0 +1,62 @@
+import threading
+
+import cv2
+import numpy as np
+
+from Live_Capture import LiveCapture
+
+
+def write_video(path, num_frames, fps=50.0):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (32, 24))
+    for i in range(num_frames):
+        writer.write(np.full((24, 32, 3), i * 10, dtype=np.uint8))
+    writer.release()
+
+
+def read_in_thread(capture):
+    result = []
+    reader = threading.Thread(target=lambda: result.append(capture.read()))
+    reader.start()
+    return reader, result
+
+
+def test_video_file_ends_the_stream(tmp_path):
+    path = tmp_path / "clip.avi"
+    write_video(path, 5)
+
+    with LiveCapture(str(path)) as capture:
+        frames = []
+        while True:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            frames.append(frame)
+
+        assert 1 <= len(frames) <= 5
+        assert not capture.isOpened()
+
+
+def test_outage_does_not_end_the_stream(tmp_path):
+    capture = LiveCapture(
+        str(tmp_path / "camera"), reconnect_delay=0.01, max_reconnect_delay=0.02
+    )
+    reader, result = read_in_thread(capture)
+
+    reader.join(0.5)
+    assert reader.is_alive() and capture.isOpened()
+
+    capture.release()
+    reader.join(1.0)
+    assert result == [(False, None)]
+    assert not capture.isOpened()
+
+
+def test_stream_ends_after_max_reconnects(tmp_path):
+    capture = LiveCapture(
+        str(tmp_path / "camera"), reconnect_delay=0.01, max_reconnects=2
+    )
+    reader, result = read_in_thread(capture)
+
+    reader.join(2.0)
+    assert result == [(False, None)]
+    capture.release()
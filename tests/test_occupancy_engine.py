@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from Occupancy_Engine import OccupancyEngine
+
+SPOTS = [
+    {"id": 10, "coordinates": [(10, 10), (5, 90), (55, 90), (60, 10)]},
+    {"id": 11, "coordinates": [(60, 10), (55, 90), (105, 90), (110, 10)]},
+    {"id": 12, "coordinates": [(200, 200), (260, 210), (230, 280)]},
+]
+
+
+def test_points_inside_mark_their_spot_occupied():
+    engine = OccupancyEngine(SPOTS)
+
+    occupied = engine.classify([(30, 50), (230, 230)])
+
+    assert occupied.tolist() == [True, False, True]
+
+
+def test_points_on_a_boundary_are_outside():
+    engine = OccupancyEngine(SPOTS)
+
+    # On the edge shared by spots 10 and 11, and on a vertex of spot 12.
+    occupied = engine.classify([(59, 26), (200, 200)])
+
+    assert occupied.tolist() == [False, False, False]
+
+
+def test_spot_indices_and_subsets():
+    engine = OccupancyEngine(SPOTS)
+
+    assert engine.spot_indices([(80, 50), (500, 500)]).tolist() == [
+        1,
+        OccupancyEngine.NO_SPOT,
+    ]
+    assert engine.classify([(80, 50)], spot_indices=[1, 2]).tolist() == [True, False]
+
+
+def test_empty_inputs():
+    assert OccupancyEngine(SPOTS).classify([]).tolist() == [False, False, False]
+    assert OccupancyEngine([]).classify([(1, 1)]).shape == (0,)
+
+
+def test_matches_shapely_on_a_random_lot():
+    geometry = pytest.importorskip("shapely.geometry")
+    from benchmarks.occupancy_benchmark import make_lot
+
+    parking_coordinates, cars = make_lot(150, 400, seed=3)
+    # Points on the polygon vertices and edge midpoints exercise the boundary rule.
+    for spot in parking_coordinates[:20]:
+        points = np.asarray(spot["coordinates"])
+        cars += [tuple(p) for p in points.tolist()]
+        cars += [tuple(p) for p in ((points + np.roll(points, -1, 0)) // 2).tolist()]
+
+    contains = OccupancyEngine(parking_coordinates).contains(cars)
+
+    for i, spot in enumerate(parking_coordinates):
+        polygon = geometry.Polygon(spot["coordinates"])
+        expected = [polygon.contains(geometry.Point(x, y)) for x, y in cars]
+        assert contains[i].tolist() == expected
@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pytest
+
+from Occupancy_History import HOUR, MINUTE, OccupancyHistory
+
+# A wall clock time on an hour boundary.
+START = 1_700_000_000 // HOUR * HOUR
+
+
+def record(history, frames):
+    """
+    Records (timestamp, states) frames of a lot whose spot ids are 10, 11, ...
+    """
+    for timestamp, states in frames:
+        spots = [
+            {"id": 10 + i, "is_occupied": bool(state)} for i, state in enumerate(states)
+        ]
+        history.record(spots, timestamp)
+
+
+def test_interval_is_split_at_the_minute_boundary():
+    history = OccupancyHistory()
+    record(history, [(START + 30, [True, False]), (START + 90, [False, False])])
+
+    assert history.minutes.starts[0] == START
+    assert history.minutes.occupied[0].tolist() == [30, 0]
+    assert history.minutes.observed[0].tolist() == [30, 30]
+
+    # An interval takes the state of the frame that starts it.
+    report = history.utilization(START, START + 2 * MINUTE)
+    assert report["spot_ids"] == [10, 11]
+    assert report["observed_seconds"].tolist() == [60, 60]
+    assert report["occupied_seconds"].tolist() == [60, 0]
+    assert report["utilization"] == pytest.approx(0.5)
+
+
+def test_hour_is_sealed_when_the_next_one_starts():
+    history = OccupancyHistory()
+    record(
+        history,
+        [
+            (START + HOUR - 30, [True]),
+            (START + HOUR + 30, [True]),
+            (START + HOUR + 90, [False]),
+        ],
+    )
+
+    assert len(history.hours) == 1
+    assert history.hours.starts[0] == START
+    assert history.hours.occupied[0].tolist() == [30]
+
+    # The hour in progress comes from the minute buckets.
+    report = history.utilization(START, START + 2 * HOUR)
+    assert report["occupied_seconds"].tolist() == [120]
+    assert history.series(START, START + 2 * HOUR)["starts"].tolist() == [START]
+
+
+def test_arrivals_count_free_to_occupied_changes():
+    history = OccupancyHistory()
+    states = [[False], [True], [False], [True], [True]]
+    record(history, [(START + i, s) for i, s in enumerate(states)])
+
+    assert history.utilization(START, START + MINUTE)["turnover"].tolist() == [2]
+    changes = history.changes(START, START + MINUTE)
+    assert changes["timestamps"].tolist() == [START, START + 1, START + 2, START + 3]
+
+
+@pytest.mark.parametrize("max_gap, observed", [(60.0, 30), (200.0, 130)])
+def test_gaps_longer_than_max_gap_are_not_observed(max_gap, observed):
+    history = OccupancyHistory(max_gap=max_gap)
+    record(
+        history,
+        [(START, [True]), (START + 30, [True]), (START + 130, [True])],
+    )
+
+    report = history.utilization(START, START + 5 * MINUTE)
+    assert report["observed_seconds"].tolist() == [observed]
+    assert report["occupied_seconds"].tolist() == [observed]
+
+
+def test_hour_split_over_two_runs_is_merged_on_reload(tmp_path):
+    directory = str(tmp_path)
+    first = [(START + t, [True, False]) for t in range(0, 630, 5)]
+    second = [(START + t, [True, t >= 900]) for t in range(635, 1200, 5)]
+    for frames in (first, second):
+        with OccupancyHistory(directory) as history:
+            record(history, frames)
+
+    assert sorted(os.listdir(directory)) == [
+        f"changes-{i:08d}.npz" for i in range(2)
+    ] + [f"hour-{START:011d}-1.npz", f"hour-{START:011d}.npz"]
+
+    with OccupancyHistory(directory) as history:
+        assert len(history.hours) == 1
+        report = history.utilization(START, START + HOUR)
+        # 625 s in the first run and 560 s in the second, none in the 10 s between.
+        assert report["observed_seconds"].tolist() == [1185, 1185]
+        assert report["occupied_seconds"].tolist() == [1185, 295]
+        assert report["turnover"].tolist() == [0, 1]
+
+        minutes = history.series(START, START + HOUR, resolution="minute")
+        assert minutes["starts"].tolist() == [START + m * MINUTE for m in range(20)]
+        # The minute split between the runs is a single bucket again.
+        split = history.minutes.rows(START + 600, START + 660)
+        assert history.minutes.observed[split, 0].tolist() == [50]
+        assert np.isclose(minutes["occupancy_ratio"][:, 0], 1).all()
+
+
+def test_reload_rejects_another_lot(tmp_path):
+    with OccupancyHistory(str(tmp_path)) as history:
+        record(history, [(START, [True]), (START + 10, [True])])
+
+    other = OccupancyHistory(str(tmp_path))
+    with pytest.raises(ValueError, match="spots"):
+        record(other, [(START + HOUR, [True, False])])
+    other.close()
@@ -0,0 +1,129 @@
+import http.client
+import json
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from Occupancy_Service import OccupancyService
+
+SPOTS = [
+    {"id": 1, "is_occupied": True},
+    {"id": 2, "is_occupied": False},
+    {"id": 3, "is_occupied": True},
+]
+
+
+class BlockingHistory:
+    """
+    Answers utilization queries once released, like a long period being summed.
+    """
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def utilization(self, start, end, spot_ids=None):
+        self.started.set()
+        self.release.wait(5)
+        spot_ids = spot_ids or [spot["id"] for spot in SPOTS]
+        return {
+            "spot_ids": spot_ids,
+            "occupancy_ratio": np.full(len(spot_ids), np.nan),
+            "turnover": np.zeros(len(spot_ids), dtype=np.int64),
+            "utilization": 0.5,
+        }
+
+
+@pytest.fixture
+def service():
+    with OccupancyService(lot_id="north") as service:
+        yield service
+
+
+def get(service, path, connection=None, method="GET"):
+    connection = connection or http.client.HTTPConnection(
+        "127.0.0.1", service.port, timeout=5
+    )
+    connection.request(method, path)
+    response = connection.getresponse()
+    body = response.read()
+    return response.status, json.loads(body) if body else None
+
+
+def test_endpoints_answer_from_the_latest_snapshot(service):
+    assert get(service, "/occupancy")[0] == 503
+    service.publish(SPOTS, 12.5)
+
+    status, occupancy = get(service, "/occupancy")
+    assert status == 200
+    assert occupancy["lot_id"] == "north"
+    assert (occupancy["total"], occupancy["occupied"], occupancy["free"]) == (3, 2, 1)
+    assert occupancy["spots"][1] == {"id": 2, "is_occupied": False}
+
+    SPOTS[1]["is_occupied"] = True
+    try:
+        service.publish(SPOTS, 13.0)
+        status, lot = get(service, "/lot")
+        assert (lot["sequence"], lot["timestamp"], lot["occupied"]) == (2, 13.0, 3)
+    finally:
+        SPOTS[1]["is_occupied"] = False
+
+    assert get(service, "/spots/3")[1]["is_occupied"] is True
+    assert get(service, "/spots/9")[0] == 404
+    assert get(service, "/nowhere")[0] == 404
+    assert get(service, "/health")[1]["sequence"] == 2
+    assert get(service, "/lot", method="POST")[0] == 405
+    assert get(service, "/utilization")[0] == 404
+
+
+def test_connection_is_kept_alive(service):
+    service.publish(SPOTS, 1.0)
+    connection = http.client.HTTPConnection("127.0.0.1", service.port, timeout=5)
+
+    for _ in range(3):
+        assert get(service, "/lot", connection)[0] == 200
+    assert service.requests == 3
+
+
+def test_utilization_runs_off_the_event_loop(service):
+    history = BlockingHistory()
+    service.history = history
+    service.publish(SPOTS, 7200.0)
+    result = []
+    query = threading.Thread(
+        target=lambda: result.append(get(service, "/utilization?spots=1,3"))
+    )
+    query.start()
+    assert history.started.wait(5)
+
+    # The loop still answers while the query is being summed.
+    assert get(service, "/health")[0] == 200
+    history.release.set()
+    query.join(5)
+
+    status, report = result[0]
+    assert status == 200
+    assert (report["start"], report["end"]) == (3600.0, 7200.0)
+    assert report["spot_ids"] == [1, 3]
+    assert report["occupancy_ratio"] == [None, None]
+    assert get(service, "/utilization?spots=8")[0] == 400
+
+
+def test_close_ends_kept_alive_connections():
+    service = OccupancyService()
+    service.start()
+    service.publish(SPOTS, 1.0)
+    idle = http.client.HTTPConnection("127.0.0.1", service.port, timeout=5)
+    assert get(service, "/lot", idle)[0] == 200
+
+    closing = threading.Thread(target=service.close)
+    closing.start()
+    closing.join(5)
+
+    assert not closing.is_alive()
+    idle.sock.settimeout(5)
+    assert idle.sock.recv(1) == b""
+    with pytest.raises(OSError):
+        socket.create_connection(("127.0.0.1", service.port), timeout=1)
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+from Occupancy_Engine import SpotLabelMask
+
+SPOTS = [
+    {"id": 0, "coordinates": [(10, 10), (10, 40), (40, 40), (40, 10)]},
+    {"id": 1, "coordinates": [(50, 10), (50, 40), (90, 40), (90, 10)]},
+]
+FRAME_SIZE = (100, 60)
+
+
+def write_coordinates(tmp_path, content="spots"):
+    path = tmp_path / "lot.yml"
+    path.write_text(content)
+    return str(path)
+
+
+def test_points_resolve_to_their_spot():
+    mask = SpotLabelMask(SPOTS, FRAME_SIZE)
+
+    indices = mask.spot_indices([(20, 20), (60, 30), (45, 20), (-5, 20), (20, 500)])
+
+    assert indices.tolist() == [0, 1] + [SpotLabelMask.NO_SPOT] * 3
+    assert mask.classify([(60, 30)]).tolist() == [False, True]
+    assert mask.classify([(60, 30)], spot_indices=[1]).tolist() == [True]
+
+
+def test_boundary_pixels_belong_to_the_spot():
+    mask = SpotLabelMask(SPOTS, FRAME_SIZE)
+
+    assert mask.spot_indices([(10, 10), (40, 40)]).tolist() == [0, 0]
+
+
+def test_cache_is_written_then_reused(tmp_path):
+    coordinates = write_coordinates(tmp_path)
+    cache = tmp_path / ("lot" + SpotLabelMask.CACHE_SUFFIX)
+
+    built = SpotLabelMask.load_or_build(SPOTS, FRAME_SIZE, coordinates)
+    modified = os.path.getmtime(cache)
+    loaded = SpotLabelMask.load_or_build(SPOTS, FRAME_SIZE, coordinates)
+
+    assert np.array_equal(built.labels, loaded.labels)
+    assert os.path.getmtime(cache) == modified
+    assert [p.name for p in tmp_path.iterdir() if ".tmp" in p.name] == []
+
+
+def test_cache_is_rebuilt_when_the_coordinates_or_size_change(tmp_path):
+    coordinates = write_coordinates(tmp_path)
+    SpotLabelMask.load_or_build(SPOTS, FRAME_SIZE, coordinates)
+
+    write_coordinates(tmp_path, "other spots")
+    moved = [dict(SPOTS[0], coordinates=[(60, 10), (60, 40), (90, 40), (90, 10)])]
+    rebuilt = SpotLabelMask.load_or_build(moved, FRAME_SIZE, coordinates)
+    assert rebuilt.spot_indices([(70, 20)]).tolist() == [0]
+
+    resized = SpotLabelMask.load_or_build(moved, (200, 120), coordinates)
+    assert resized.labels.shape == (120, 200)
+
+
+def test_corrupt_cache_is_rebuilt(tmp_path):
+    coordinates = write_coordinates(tmp_path)
+    built = SpotLabelMask.load_or_build(SPOTS, FRAME_SIZE, coordinates)
+    cache = tmp_path / ("lot" + SpotLabelMask.CACHE_SUFFIX)
+
+    for content in (cache.read_bytes()[:40], b""):
+        cache.write_bytes(content)
+        rebuilt = SpotLabelMask.load_or_build(SPOTS, FRAME_SIZE, coordinates)
+        assert np.array_equal(rebuilt.labels, built.labels)
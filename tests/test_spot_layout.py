@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from Spot_Layout import SpotLayout
+
+COORDINATES = {
+    3: [(10, 20), (10, 60), (50, 60), (50, 20)],
+    7: [(100, 20), (100, 60), (160, 70), (170, 30), (130, 10)],
+}
+
+
+def assert_same_layout(layout, expected):
+    assert layout.to_coordinates() == expected.to_coordinates()
+    assert layout.frame_size == expected.frame_size
+
+
+@pytest.mark.parametrize("extension", [".yml", ".yaml", ".json", ".npz"])
+@pytest.mark.parametrize("frame_size", [(1355, 700), None])
+def test_round_trip(tmp_path, extension, frame_size):
+    layout = SpotLayout.from_coordinates(COORDINATES, frame_size)
+    path = str(tmp_path / f"lot{extension}")
+
+    layout.save(path)
+
+    assert_same_layout(SpotLayout.load(path), layout)
+
+
+def test_memory_mapped_npz(tmp_path):
+    layout = SpotLayout.from_coordinates(COORDINATES, (1355, 700))
+    path = str(tmp_path / "lot.npz")
+    layout.save(path)
+
+    loaded = SpotLayout.load(path, mmap=True)
+
+    # The arrays are read-only views of the file, not copies.
+    assert not loaded.vertices.flags.writeable
+    assert not loaded.vertices.flags.owndata
+    assert_same_layout(loaded, layout)
+
+
+def test_compressed_npz_cannot_be_memory_mapped(tmp_path):
+    path = str(tmp_path / "lot.npz")
+    np.savez_compressed(path, schema_version=np.int64(1))
+
+    with pytest.raises(ValueError, match="compressed"):
+        SpotLayout.load(path, mmap=True)
+
+
+def test_legacy_yaml_is_read(tmp_path):
+    path = tmp_path / "coordinates.yml"
+    path.write_text(
+        "- id: 0\n  coordinates: [[1, 2], [1, 9], [8, 9], [8, 2]]\n"
+        "- id: 1\n  coordinates: [[20, 2], [20, 9], [28, 9], [28, 2]]\n"
+    )
+
+    layout = SpotLayout.load(str(path))
+
+    assert layout.frame_size is None
+    assert layout.to_coordinates() == {
+        0: [(1, 2), (1, 9), (8, 9), (8, 2)],
+        1: [(20, 2), (20, 9), (28, 9), (28, 2)],
+    }
+
+
+@pytest.mark.parametrize("content", ["", "null\n"])
+def test_empty_files_load_as_empty_layouts(tmp_path, content):
+    for name in ("lot.yml", "lot.json"):
+        path = tmp_path / name
+        path.write_text(content if name.endswith(".yml") else content.strip())
+
+        assert len(SpotLayout.load(str(path))) == 0
+
+
+def test_unknown_schema_version_is_rejected():
+    with pytest.raises(ValueError, match="schema version"):
+        SpotLayout.from_dict({"schema_version": 99, "spots": []})
+
+
+def test_scaled_maps_vertices_to_the_target_size():
+    layout = SpotLayout.from_coordinates(COORDINATES, (200, 100))
+
+    scaled = layout.scaled((400, 50))
+
+    assert scaled.frame_size == (400, 50)
+    assert scaled.to_coordinates()[3] == [(20, 10), (20, 30), (100, 30), (100, 10)]
+    assert layout.scaled((200, 100)) is layout
+
+
+def test_layouts_without_a_frame_size_are_scaled_from_the_legacy_size():
+    legacy = SpotLayout.from_coordinates({0: [(0, 0), (0, 350), (1355, 700)]})
+
+    scaled = legacy.scaled((2710, 1400))
+
+    assert scaled.frame_size == (2710, 1400)
+    assert scaled.to_coordinates()[0] == [(0, 0), (0, 700), (2710, 1400)]
+    assert legacy.scaled(SpotLayout.LEGACY_FRAME_SIZE).to_coordinates() == (
+        legacy.to_coordinates()
+    )
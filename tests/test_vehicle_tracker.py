@@ -0,0 +1,58 @@
+import numpy as np
+
+from Vehicle_Tracker import SpotDwellTimer, VehicleTracker
+
+
+def car(x, y, size=20):
+    return {"x_1": x, "y_1": y, "x_2": x + size, "y_2": y + size}
+
+
+def test_tracks_keep_their_id_while_the_car_moves():
+    tracker = VehicleTracker()
+
+    first = tracker.update([car(0, 0), car(100, 0)], 0.0)
+    second = tracker.update([car(104, 0), car(4, 0)], 0.1)
+
+    assert [c["track_id"] for c in first] == [0, 1]
+    assert sorted((c["track_id"], c["x_1"]) for c in second) == [(0, 4), (1, 104)]
+    assert tracker.next_id == 2
+
+
+def test_missed_cars_are_extrapolated_until_they_expire():
+    tracker = VehicleTracker(max_age=1.0)
+    tracker.update([car(0, 0)], 0.0)
+    tracker.update([car(10, 0)], 0.5)
+
+    (predicted,) = tracker.predict(0.9)
+
+    assert predicted["track_id"] == 0
+    assert predicted["x_1"] == 14
+    assert tracker.predict(1.6) == []
+
+
+def test_expired_track_is_not_revived_by_update():
+    tracker = VehicleTracker(max_age=1.0)
+    tracker.update([car(0, 0)], 0.0)
+
+    # Only update() runs, e.g. when every frame is inferred: the first track
+    # expired long ago, so the car at its old place is a new vehicle.
+    (revisited,) = tracker.update([car(0, 0)], 5.0)
+
+    assert revisited["track_id"] == 1
+    assert len(tracker) == 1
+
+
+def test_tracks_are_reported_after_min_hits():
+    tracker = VehicleTracker(min_hits=2)
+
+    assert tracker.update([car(0, 0)], 0.0) == []
+    assert [c["track_id"] for c in tracker.update([car(1, 0)], 0.1)] == [0]
+
+
+def test_dwell_timer_restarts_when_the_track_changes():
+    timer = SpotDwellTimer(3)
+    timer.update([5, SpotDwellTimer.NO_TRACK, 7], 10.0)
+    timer.update([5, 8], 12.0, spot_indices=[0, 2])
+
+    assert timer.dwell_times(15.0).tolist() == [5.0, 0.0, 3.0]
+    assert np.isnan(timer.since[1])